@@ -0,0 +1,98 @@
+"""
+Timing of the stages of the animal population model, to find which stages the time of
+the model goes into.
+
+The profiler is off by default, and then costs one check of a boolean per stage. To
+use it, enable it, run the model, and save or print the summary:
+
+    AnimalModelProfiler.enable()
+    main("ARG", available_feed, available_grass, "baseline")
+    AnimalModelProfiler.save_summary("results/animal_model_profile")
+
+The time of each stage is added up for each country. Countries that are run together
+(see main_for_countries) share the time of the monthly stages, which is added up under
+the countries' codes joined by commas.
+"""
+
+import json
+import time
+
+import pandas as pd
+
+
+class AnimalModelProfiler:
+    enabled = False
+
+    # the total seconds and number of runs of each stage, for each country
+    totals = {}
+
+    def enable():
+        """
+        Starts timing the stages of the model, from zero.
+        """
+        AnimalModelProfiler.clear()
+        AnimalModelProfiler.enabled = True
+
+    def disable():
+        AnimalModelProfiler.enabled = False
+
+    def clear():
+        AnimalModelProfiler.totals = {}
+
+    def start():
+        return time.perf_counter()
+
+    def add(country, stage, start):
+        """
+        Adds the time since start (from AnimalModelProfiler.start) to the stage of the
+        country.
+        """
+        seconds = time.perf_counter() - start
+        stages = AnimalModelProfiler.totals.setdefault(country, {})
+        if stage not in stages:
+            stages[stage] = [0.0, 0]
+        stages[stage][0] += seconds
+        stages[stage][1] += 1
+
+    def get_summary():
+        """
+        Returns a table of the total seconds and number of runs of each stage of each
+        country, with the fraction of the country's time spent in each stage. The
+        stages of each country are in order of the time spent in them.
+        """
+        rows = []
+        for country, stages in AnimalModelProfiler.totals.items():
+            country_seconds = sum(seconds for seconds, calls in stages.values())
+            for stage, (seconds, calls) in sorted(
+                stages.items(), key=lambda item: item[1][0], reverse=True
+            ):
+                rows.append(
+                    {
+                        "country": country,
+                        "stage": stage,
+                        "seconds": seconds,
+                        "calls": calls,
+                        "fraction_of_country": (
+                            seconds / country_seconds if country_seconds > 0 else 0
+                        ),
+                    }
+                )
+        return pd.DataFrame(
+            rows,
+            columns=["country", "stage", "seconds", "calls", "fraction_of_country"],
+        )
+
+    def print_summary():
+        print("")
+        print("Time spent in each stage of the animal model")
+        print(AnimalModelProfiler.get_summary().to_string(index=False))
+        print("")
+
+    def save_summary(file_root):
+        """
+        Saves the summary as file_root + ".json" and file_root + ".csv".
+        """
+        summary = AnimalModelProfiler.get_summary()
+        with open(str(file_root) + ".json", "w") as f:
+            json.dump(summary.to_dict(orient="records"), f, indent=4)
+        summary.to_csv(str(file_root) + ".csv", index=False)
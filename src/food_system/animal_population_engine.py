@@ -0,0 +1,817 @@
+"""
+Runs the monthly loop of the animal population model on arrays.
+
+The animal population model (see animal_populations.py) keeps the state of each
+species in an AnimalSpecies object, as lists that grow by one entry each month, and
+steps through the species one at a time every month. This engine instead stores every
+time series of all the species of one or more countries in one preallocated
+(number of countries, number of species, NMONTHS + 1) array, and does each step of the
+month (births, transfers, slaughter, homekill and starvation) for all the species of
+all the countries at once.
+
+Each country's species are in its own order (the order they are fed and slaughtered
+in), followed by empty species, so that every country has the same number of species.
+The empty species have no animals and need no food, so they don't change the results.
+
+Two steps share a limited resource between the species in order of priority: feeding
+(grass, then feed) and slaughter (the slaughter hours of each animal size). These are
+done with np.subtract.accumulate, which takes away each species' use in the same order
+as the species loop, so the results are the same as the species loop, not only close.
+
+The columns of the arrays line up with the lists of AnimalSpecies: column 0 is month
+zero (the baseline appended by append_month_zero) and column month + 1 is the result
+of month. Series which are not appended in month zero (births, transfers and retiring
+milk animals) have column month for the result of month instead.
+
+The state carried from each month to the next is saved at the start of the month, so
+a run can be resumed with new feed and grass from the first month they change in,
+rather than run again from the start.
+
+Created on Tue Oct 18
+
+@author: morgan
+"""
+
+import numpy as np
+
+from src.food_system.animal_model_profiler import AnimalModelProfiler
+from src.food_system.food import Food
+
+ANIMAL_SIZES = ["small", "medium", "large"]
+
+# the time series of AnimalSpecies that have an entry for month zero, and an entry
+# appended each month
+MONTHLY_SERIES = [
+    "population",
+    "population_starving_pre_slaughter",
+    "other_death_causes_other_than_starving",
+    "other_death_starving",
+    "other_death_total",
+    "slaughter",
+    "pregnant_animals_total",
+    "pregnant_animals_birthing_this_month",
+    "slaughtered_pregnant_animals",
+    "homekill_other_death_this_month",
+    "homekill_healthy_this_month",
+    "homekill_starving_this_month",
+    "total_homekill_this_month",
+]
+
+
+class AnimalPopulationArrays:
+    def __init__(
+        self, all_animals_by_country, country_objects, months_to_run, save_states=False
+    ):
+        """
+        Copies the attributes and month zero values of the species into arrays.
+
+        Args:
+            all_animals_by_country (list): the AnimalSpecies of each country, in the
+                order they are fed and slaughtered, after append_month_zero
+            country_objects (list): the CountryData of each country
+            months_to_run (int): the number of months to run
+            save_states (bool): whether to save the state at the start of each month,
+                so that the run can be resumed (see resume)
+        """
+        self.all_animals_by_country = all_animals_by_country
+        self.country_objects = country_objects
+        self.months_to_run = months_to_run
+        # the countries the time of the monthly stages is added to when profiling
+        self.profiled_countries = ",".join(
+            country_object.country_name for country_object in country_objects
+        )
+        n_countries = len(all_animals_by_country)
+        # there is always at least one empty species at the end (see species_of_size)
+        n_species = max(len(all_animals) for all_animals in all_animals_by_country) + 1
+
+        def values(get, empty, dtype=float):
+            """
+            The value of each species of each country, and empty for the empty
+            species.
+            """
+            species_values = np.full((n_countries, n_species), empty, dtype=dtype)
+            for c, all_animals in enumerate(all_animals_by_country):
+                species_values[c, : len(all_animals)] = [
+                    get(animal) for animal in all_animals
+                ]
+            return species_values
+
+        def attribute(name, empty=0):
+            return values(lambda animal: getattr(animal, name), empty)
+
+        # (the empty values are chosen so that nothing is ever divided by zero)
+        self.gestation = attribute("gestation", np.inf)
+        self.animals_per_pregnancy = attribute("animals_per_pregnancy")
+        self.birth_ratio = attribute("birth_ratio", 1)
+        self.transfer_culling_fraction = attribute("transfer_culling_fraction")
+        self.animal_slaughter_hours = attribute("animal_slaughter_hours", 1)
+        self.baseline_slaughter = attribute("baseline_slaughter")
+        self.target_population_head = attribute("target_population_head")
+        self.target_population_fraction = attribute("target_population_fraction", 1)
+        self.other_animal_death_rate_monthly = attribute(
+            "other_animal_death_rate_monthly"
+        )
+        self.reduction_in_animal_breeding = attribute("reduction_in_animal_breeding")
+        self.starvation_death_fraction = attribute("starvation_death_fraction")
+        self.pregnant_animal_slaughter_fraction = attribute(
+            "pregnant_animal_slaughter_fraction"
+        )
+        self.population_fed = attribute("population_fed")
+        self.current_population = attribute("current_population")
+        self.net_energy_per_head = values(
+            lambda animal: animal.net_energy_required_per_month(), 0
+        )
+        self.digestion_efficiency_grass = values(
+            lambda animal: animal.digestion_efficiency["grass"], 1
+        )
+        self.digestion_efficiency_feed = values(
+            lambda animal: animal.digestion_efficiency["feed"], 1
+        )
+        self.is_ruminant = values(
+            lambda animal: animal.digestion_type == "ruminant", False, bool
+        )
+        self.is_milk = values(
+            lambda animal: animal.animal_function == "milk", False, bool
+        )
+        self.retiring_milk_animals_fraction = np.where(
+            self.is_milk,
+            values(
+                lambda animal: getattr(animal, "retiring_milk_animals_fraction", 0), 0
+            ),
+            0,
+        )
+
+        # for indexing one species (or list of species) of each country
+        self.countries = np.arange(n_countries)[:, np.newaxis]
+        self.species = np.arange(n_species)
+
+        # each species receives the transfer population of the milk animal of the
+        # same species (milk animals give theirs away), if there is one
+        self.transfer_source = np.full((n_countries, n_species), -1, dtype=int)
+        for c, all_animals in enumerate(all_animals_by_country):
+            milk_animal_of_species = {}
+            for i, animal in enumerate(all_animals):
+                if animal.animal_function == "milk":
+                    milk_animal_of_species[animal.animal_species] = i
+            for i, animal in enumerate(all_animals):
+                self.transfer_source[c, i] = milk_animal_of_species.get(
+                    animal.animal_species, -1
+                )
+
+        # the species of each size of each country, in order, and the hours to
+        # slaughter them each month (these don't change from month to month). Countries
+        # with fewer species of a size are padded with the last species, which is
+        # always empty.
+        self.species_of_size = {}
+        self.slaughter_hours_by_size = {}
+        self.animal_slaughter_hours_of_size = {}
+        self.target_population_head_of_size = {}
+        for size in ANIMAL_SIZES:
+            species_by_country = [
+                [
+                    i
+                    for i, animal in enumerate(all_animals)
+                    if animal.animal_size == size
+                ]
+                for all_animals in all_animals_by_country
+            ]
+            n_of_size = max(len(species) for species in species_by_country)
+            self.species_of_size[size] = np.full(
+                (n_countries, n_of_size), n_species - 1, dtype=int
+            )
+            for c, species in enumerate(species_by_country):
+                self.species_of_size[size][c, : len(species)] = species
+            species = self.species_of_size[size]
+            self.animal_slaughter_hours_of_size[size] = self.animal_slaughter_hours[
+                self.countries, species
+            ]
+            self.target_population_head_of_size[size] = self.target_population_head[
+                self.countries, species
+            ]
+            self.slaughter_hours_by_size[size] = np.array(
+                [
+                    sum(
+                        animal.animal_slaughter_hours * animal.baseline_slaughter
+                        for animal in all_animals
+                        if animal.animal_size == size
+                    )
+                    for all_animals in all_animals_by_country
+                ],
+                dtype=float,
+            )
+
+        self.series = {}
+        for name in MONTHLY_SERIES:
+            self.series[name] = np.zeros((n_countries, n_species, months_to_run + 1))
+            self.series[name][:, :, 0] = values(
+                lambda animal: getattr(animal, name)[0], 0
+            )
+        self.births_animals_month = np.zeros((n_countries, n_species, months_to_run))
+        self.transfer_population = np.zeros((n_countries, n_species, months_to_run))
+        self.transfer_births = np.zeros((n_countries, n_species, months_to_run))
+        self.retiring_milk_animals = np.zeros((n_countries, n_species, months_to_run))
+        self.homekill_hours_budget = np.zeros((n_countries, months_to_run))
+        self.homekill_hours_budget_before_run = [
+            list(country_object.homekill_hours_budget)
+            for country_object in country_objects
+        ]
+        self.net_energy_balance = np.zeros((n_countries, n_species))
+
+        # the inputs and results of the last run, and the state at the start of each
+        # of its months, so that a run with new inputs can start from the first month
+        # that changed
+        self.available_feed = None
+        self.available_grass = None
+        self.feed_used = np.zeros((n_countries, months_to_run))
+        self.grass_used = np.zeros((n_countries, months_to_run))
+        self.save_states = save_states
+        self.states = [None] * months_to_run
+
+    def run(self, available_feed, available_grass):
+        """
+        Runs every month of the model.
+
+        Args:
+            available_feed (np.ndarray): the feed available to each country each month
+                (billion kcals), of shape (number of countries, months_to_run)
+            available_grass (np.ndarray): the grass available to each country each
+                month
+
+        Returns:
+            tuple: the feed and the grass used by each country each month
+        """
+        return self.resume(0, available_feed, available_grass)
+
+    def resume(self, start_month, available_feed, available_grass):
+        """
+        Runs the model again with new inputs, from the start of start_month. The
+        months before start_month are kept from the last run, so the new inputs must
+        be the same as the last run's before start_month (see first_changed_month).
+
+        Args:
+            start_month (int): the first month to run again
+            available_feed (np.ndarray): the feed available to each country each month
+                (billion kcals), of shape (number of countries, months_to_run)
+            available_grass (np.ndarray): the grass available to each country each
+                month
+
+        Returns:
+            tuple: the feed and the grass used by each country each month
+        """
+        assert 0 <= start_month <= self.months_to_run, "ERROR: no such month to resume"
+        assert (
+            start_month == 0 or self.available_feed is not None
+        ), "ERROR: a run can only be resumed after it has been run"
+        assert start_month in [0, self.months_to_run] or self.save_states, (
+            "ERROR: a run can only be resumed part way through if its states were"
+            " saved"
+        )
+        if start_month < self.months_to_run and self.states[start_month] is not None:
+            self.restore_state(start_month)
+
+        self.available_feed = np.array(available_feed, dtype=float)
+        self.available_grass = np.array(available_grass, dtype=float)
+        assert self.available_feed.shape == self.feed_used.shape and (
+            self.available_grass.shape == self.grass_used.shape
+        ), "ERROR: there must be feed and grass for each country and month"
+        profile = AnimalModelProfiler.enabled
+        for month in range(start_month, self.months_to_run):
+            if self.save_states:
+                if profile:
+                    start = AnimalModelProfiler.start()
+                self.states[month] = self.get_state(month)
+                if profile:
+                    AnimalModelProfiler.add(self.profiled_countries, "get_state", start)
+            feed_left, grass_left = self.run_month(
+                month,
+                self.available_feed[:, month],
+                self.available_grass[:, month],
+            )
+            self.feed_used[:, month] = self.available_feed[:, month] - feed_left
+            self.grass_used[:, month] = self.available_grass[:, month] - grass_left
+        return self.feed_used.copy(), self.grass_used.copy()
+
+    def first_changed_month(self, available_feed, available_grass):
+        """
+        Returns the first month in which the feed or grass of any country differ from
+        the last run, which is the month a run with them can be resumed from
+        (months_to_run if they are all the same, and 0 if nothing has been run yet).
+        """
+        if self.available_feed is None:
+            return 0
+        assert np.shape(available_feed) == self.available_feed.shape and (
+            np.shape(available_grass) == self.available_grass.shape
+        ), "ERROR: a run can only be resumed with the same countries and months"
+        changed = (np.asarray(available_feed) != self.available_feed) | (
+            np.asarray(available_grass) != self.available_grass
+        )
+        changed_months = changed.any(axis=0)
+        if not changed_months.any():
+            return self.months_to_run
+        return int(np.argmax(changed_months))
+
+    def get_state(self, month):
+        """
+        Returns the state carried from one month to the next, at the start of the
+        month. Everything else the month reads was written by earlier months, and
+        is not changed by later ones.
+        """
+        return {
+            "current_population": self.current_population.copy(),
+            "population_fed": self.population_fed.copy(),
+            "net_energy_balance": self.net_energy_balance.copy(),
+            "pregnant_animal_slaughter_fraction": (
+                self.pregnant_animal_slaughter_fraction.copy()
+            ),
+            # changed in the month the reduction in breeding starts
+            "pregnant_animals_birthing_this_month": self.series[
+                "pregnant_animals_birthing_this_month"
+            ][:, :, month].copy(),
+            "pregnant_animals_total": self.series["pregnant_animals_total"][
+                :, :, month
+            ].copy(),
+        }
+
+    def restore_state(self, month):
+        state = self.states[month]
+        self.current_population = state["current_population"].copy()
+        self.population_fed = state["population_fed"].copy()
+        self.net_energy_balance = state["net_energy_balance"].copy()
+        self.pregnant_animal_slaughter_fraction = state[
+            "pregnant_animal_slaughter_fraction"
+        ].copy()
+        for name in ["pregnant_animals_birthing_this_month", "pregnant_animals_total"]:
+            self.series[name][:, :, month] = state[name]
+
+    def run_month(self, month, feed, grass):
+        """
+        Runs one month for all the species, and returns the feed and grass left over
+        in each country.
+        """
+        series = self.series
+        profile = AnimalModelProfiler.enabled
+        if month != 0:
+            self.current_population = series["population"][:, :, month].copy()
+
+        if profile:
+            start = AnimalModelProfiler.start()
+        feed, grass = self.feed_animals(feed, grass)
+        series["population_starving_pre_slaughter"][:, :, month + 1] = (
+            self.current_population - self.population_fed
+        )
+        if profile:
+            AnimalModelProfiler.add(self.profiled_countries, "feed_animals", start)
+            start = AnimalModelProfiler.start()
+
+        additive_animals, retiring_animals = self.calculate_births_and_transfers(month)
+        if profile:
+            AnimalModelProfiler.add(
+                self.profiled_countries, "calculate_births_and_transfers", start
+            )
+            start = AnimalModelProfiler.start()
+
+        self.calculate_slaughter(month, additive_animals, retiring_animals)
+        if profile:
+            AnimalModelProfiler.add(
+                self.profiled_countries, "calculate_slaughter", start
+            )
+            start = AnimalModelProfiler.start()
+
+        self.calculate_homekill_and_starvation(month)
+        if profile:
+            AnimalModelProfiler.add(
+                self.profiled_countries, "calculate_homekill_and_starvation", start
+            )
+
+        series["population"][:, :, month + 1] = self.current_population
+        return feed, grass
+
+    def feed_animals(self, feed, grass):
+        """
+        Feeds the species in order, grass first (to ruminants) then feed, the same as
+        AnimalPopulation.feed_animals. Returns the feed and grass left over.
+        """
+        net_energy_required = self.net_energy_per_head * self.current_population
+        # species that need no energy are skipped, and keep their population fed
+        needs_energy = net_energy_required != 0
+
+        # grass, to the ruminants in order until it runs out
+        eats_grass = needs_energy & self.is_ruminant
+        grass_seen, grass_left, fed_by_grass = self.share_in_order(
+            grass,
+            np.where(
+                eats_grass, net_energy_required / self.digestion_efficiency_grass, 0
+            ),
+            self.digestion_efficiency_grass,
+            eats_grass,
+            net_energy_required,
+            zero_when_short=False,
+        )
+        energy_from_grass = np.where(
+            self.is_ruminant, grass_seen * self.digestion_efficiency_grass, 0
+        )
+        energy_still_required = np.where(
+            energy_from_grass > 0,
+            net_energy_required - energy_from_grass,
+            net_energy_required,
+        )
+
+        # then feed, to everything not fed by grass
+        eats_feed = needs_energy & ~fed_by_grass
+        feed_seen, feed_left, fed_by_feed = self.share_in_order(
+            feed,
+            np.where(
+                eats_feed, energy_still_required / self.digestion_efficiency_feed, 0
+            ),
+            self.digestion_efficiency_feed,
+            eats_feed,
+            energy_still_required,
+            zero_when_short=True,
+        )
+        energy_from_feed = feed_seen * self.digestion_efficiency_feed
+
+        underfed = eats_feed & ~fed_by_feed
+        energy_provided = energy_from_grass + energy_from_feed
+        self.net_energy_balance = np.where(
+            underfed, net_energy_required - energy_provided, 0
+        )
+        # (as in AnimalSpecies.feed_the_species, the fraction fed is relative to the
+        # energy still missing)
+        fraction_fed = np.divide(
+            energy_provided,
+            self.net_energy_balance,
+            out=np.zeros_like(energy_provided),
+            where=underfed,
+        )
+        self.population_fed = np.where(
+            fed_by_grass | fed_by_feed, self.current_population, self.population_fed
+        )
+        self.population_fed[underfed] = np.round(
+            fraction_fed[underfed] * self.current_population[underfed]
+        )
+        return feed_left, grass_left
+
+    def share_in_order(
+        self, available, amounts, efficiency, eats, energy_required, zero_when_short
+    ):
+        """
+        Gives each species that eats from a food source what it needs, in order, until
+        one of them needs more than is left.
+
+        The species that is short gets everything that is left (if there is any left,
+        or whether or not there is any left if zero_when_short). The ones after it see
+        what is left after that, which is never enough.
+
+        Returns:
+            tuple: the amount each species sees when it is its turn, the amount left
+                at the end in each country, and whether each species got all the
+                energy it needed
+        """
+        # what is left before each species takes its amount, in the same order of
+        # subtraction as taking them one at a time
+        left_before = np.subtract.accumulate(
+            np.concatenate([available[:, np.newaxis], amounts], axis=1), axis=1
+        )
+        seen = left_before[:, :-1]
+        enough = seen * efficiency >= energy_required
+        short = eats & ~enough
+        is_short = short.any(axis=1)
+        if not is_short.any():
+            return seen, left_before[:, -1], eats & enough
+
+        first_short = np.where(is_short, np.argmax(short, axis=1), seen.shape[1])
+        seen_by_first_short = seen[
+            self.countries[:, 0], np.minimum(first_short, seen.shape[1] - 1)
+        ]
+        if zero_when_short:
+            left_when_short = np.zeros(len(available))
+        else:
+            left_when_short = np.where(seen_by_first_short > 0, 0, seen_by_first_short)
+        left = np.where(is_short, left_when_short, left_before[:, -1])
+        seen = np.where(
+            self.species > first_short[:, np.newaxis], left[:, np.newaxis], seen
+        )
+        enough = enough & (self.species < first_short[:, np.newaxis])
+        return seen, left, eats & enough
+
+    def calculate_births_and_transfers(self, month):
+        """
+        Calculates the births and the transfers between milk and meat animals of the
+        month. Returns the animals added to each species, and the milk animals
+        retiring.
+        """
+        series = self.series
+
+        # once the gestation period has passed, the reduction in breeding shows in
+        # the births, and pregnant animals are no longer slaughtered
+        breeding_changed = np.abs(month - self.gestation) <= 0.5
+        if breeding_changed.any():
+            kept = 1 - self.reduction_in_animal_breeding[breeding_changed]
+            series["pregnant_animals_birthing_this_month"][:, :, month][
+                breeding_changed
+            ] *= kept
+            series["pregnant_animals_total"][:, :, month][breeding_changed] *= kept
+            self.pregnant_animal_slaughter_fraction[breeding_changed] = 0
+
+        new_births = (
+            series["pregnant_animals_birthing_this_month"][:, :, month]
+            * self.animals_per_pregnancy
+        ) / self.birth_ratio
+        new_transfer_births = (
+            new_births * (self.birth_ratio - 1) * (1 - self.transfer_culling_fraction)
+        )
+        retiring_animals = self.current_population * self.retiring_milk_animals_fraction
+        self.births_animals_month[:, :, month] = new_births
+        self.transfer_births[:, :, month] = new_transfer_births
+        self.retiring_milk_animals[:, :, month] = retiring_animals
+
+        transfer = np.where(self.is_milk, retiring_animals + new_transfer_births, 0)
+        received = np.where(
+            self.transfer_source >= 0,
+            transfer[self.countries, np.maximum(self.transfer_source, 0)],
+            0,
+        )
+        self.transfer_population[:, :, month] = np.where(
+            self.is_milk, -received, received
+        )
+        additive_animals = np.where(self.is_milk, new_births, new_births + received)
+        return additive_animals, np.where(self.is_milk, retiring_animals, 0)
+
+    def calculate_slaughter(self, month, additive_animals, retiring_animals):
+        """
+        Slaughters each species towards its target population, using the slaughter
+        hours of its size in order, and updates the pregnant animals.
+        """
+        series = self.series
+        other_deaths = self.current_population * self.other_animal_death_rate_monthly
+        population_pre_slaughter = (
+            self.current_population
+            - (other_deaths + retiring_animals)
+            + additive_animals
+        )
+        if month == 0:
+            planned_slaughter = self.baseline_slaughter
+        else:
+            planned_slaughter = series["slaughter"][:, :, month]
+        if np.isnan(planned_slaughter).any():
+            for i in range(np.isnan(planned_slaughter).sum()):
+                print("slaughter hours is nan")
+            planned_slaughter = np.nan_to_num(planned_slaughter)
+
+        slaughter = np.zeros_like(self.current_population)
+        for size in ANIMAL_SIZES:
+            species = self.species_of_size[size]
+            slaughter[self.countries, species] = self.slaughter_with_hours(
+                self.slaughter_hours_by_size[size],
+                planned_slaughter[self.countries, species],
+                self.animal_slaughter_hours_of_size[size],
+                population_pre_slaughter[self.countries, species],
+                self.target_population_head_of_size[size],
+            )
+        # (the empty species at the end is slaughtered in place of missing ones)
+        slaughter[:, -1] = 0
+
+        self.current_population = population_pre_slaughter - slaughter
+        below_zero = self.current_population < 0
+        if below_zero.any():
+            for i in range(below_zero.sum()):
+                print("POP BELOW ZERO????")
+            self.current_population[below_zero] = 0
+            slaughter[below_zero] = 0
+
+        # pregnant animals are slaughtered first, up to the fraction allowed
+        pregnant_before = series["pregnant_animals_total"][:, :, month]
+        fraction = self.pregnant_animal_slaughter_fraction
+        some_pregnant_slaughtered = (fraction != 0) & (
+            fraction * pregnant_before < slaughter
+        )
+        slaughtered_pregnant = np.where(
+            fraction == 0,
+            0,
+            np.where(some_pregnant_slaughtered, fraction * pregnant_before, slaughter),
+        )
+        pregnant_total = np.where(
+            fraction == 0,
+            pregnant_before,
+            np.where(
+                some_pregnant_slaughtered,
+                pregnant_before
+                - (
+                    slaughtered_pregnant
+                    + self.other_animal_death_rate_monthly * pregnant_before
+                ),
+                pregnant_before - slaughtered_pregnant,
+            ),
+        )
+        pregnant_total = np.where(pregnant_total >= 0, pregnant_total, 0)
+        slaughtered_pregnant = np.where(
+            slaughtered_pregnant >= 0, slaughtered_pregnant, 0
+        )
+
+        series["slaughter"][:, :, month + 1] = slaughter
+        series["pregnant_animals_total"][:, :, month + 1] = pregnant_total
+        series["pregnant_animals_birthing_this_month"][:, :, month + 1] = (
+            pregnant_total / self.gestation
+        )
+        series["other_death_causes_other_than_starving"][:, :, month + 1] = other_deaths
+        series["slaughtered_pregnant_animals"][:, :, month + 1] = slaughtered_pregnant
+
+    def slaughter_with_hours(
+        self, hours, planned_slaughter, hours_per_head, population, target
+    ):
+        """
+        Slaughters the species of one size of each country in order: each as planned,
+        but not below its target population, and only while there are hours left.
+
+        Returns:
+            np.ndarray: the animals slaughtered of each species
+        """
+        planned_hours = planned_slaughter * hours_per_head
+        slaughter = self.limit_to_target(
+            planned_hours / hours_per_head, population, target
+        )
+        hours = hours.copy()
+        species = self.species[: slaughter.shape[1]]
+        # the first species of each country that hasn't been checked for hours yet
+        start = np.zeros(len(hours), dtype=int)
+        checking = np.ones(len(hours), dtype=bool)
+        while checking.any():
+            # the hours left before each species, while every species from start can
+            # slaughter as planned (the ones before start have already been counted)
+            unchecked = species >= start[:, np.newaxis]
+            hours_left = np.subtract.accumulate(
+                np.concatenate(
+                    [
+                        hours[:, np.newaxis],
+                        np.where(unchecked, slaughter * hours_per_head, 0),
+                    ],
+                    axis=1,
+                ),
+                axis=1,
+            )[:, :-1]
+            short = unchecked & (~(planned_hours <= hours_left) | ~(hours_left > 0))
+            checking &= short.any(axis=1)
+            countries = np.flatnonzero(checking)
+            if len(countries) == 0:
+                break
+
+            # the first species without enough hours uses the rest of them
+            i = np.argmax(short[countries], axis=1)
+            hours_for_i = hours_left[countries, i]
+            no_hours = ~(hours_for_i > 0)
+            for c, first_unslaughtered in zip(countries[no_hours], i[no_hours]):
+                slaughter[c, first_unslaughtered:] = 0
+            checking[countries[no_hours]] = False
+
+            countries = countries[~no_hours]
+            i = i[~no_hours]
+            hours_for_i = hours_for_i[~no_hours]
+            slaughter[countries, i] = self.limit_to_target(
+                np.minimum(planned_hours[countries, i], hours_for_i)
+                / hours_per_head[countries, i],
+                population[countries, i],
+                target[countries, i],
+            )
+            hours[countries] = (
+                hours_for_i - slaughter[countries, i] * hours_per_head[countries, i]
+            )
+            start[countries] = i + 1
+        return slaughter
+
+    def limit_to_target(self, slaughter_rate, population, target):
+        """
+        Limits the slaughter so the population doesn't go below its target (as in
+        AnimalPopulation.calculate_animal_population).
+        """
+        return np.where(
+            population < target,
+            0,
+            np.where(
+                population - slaughter_rate < target,
+                population - target,
+                slaughter_rate,
+            ),
+        )
+
+    def calculate_homekill_and_starvation(self, month):
+        """
+        Calculates the homekill and the deaths of the starving animals, and the final
+        population of the month.
+        """
+        series = self.series
+        slaughter = series["slaughter"][:, :, month + 1]
+        starving = series["population_starving_pre_slaughter"][:, :, month + 1]
+        other_deaths = series["other_death_causes_other_than_starving"][:, :, month + 1]
+
+        homekill_other_death = np.zeros_like(slaughter)
+        homekill_healthy = np.zeros_like(slaughter)
+        homekill_starving = np.zeros_like(slaughter)
+        # where there is no homekill (as set in CountryData.calculate_homekill_hours)
+        starving_after_homekill = np.maximum(starving - slaughter, 0)
+        for c, country_object in enumerate(self.country_objects):
+            homekill_hours = country_object.homekill_hours_total_month[-1]
+            if homekill_hours != 0:
+                # the hours are shared out one species at a time
+                for i in range(len(self.all_animals_by_country[c])):
+                    hours_per_head = self.animal_slaughter_hours[c, i]
+                    homekill_other_death[c, i] = min(
+                        other_deaths[c, i] * country_object.other_death_homekill_rate,
+                        homekill_hours / hours_per_head,
+                    )
+                    homekill_hours -= homekill_other_death[c, i] * hours_per_head
+                    homekill_healthy[c, i] = min(
+                        country_object.homekill_fraction
+                        * self.current_population[c, i],
+                        homekill_hours / hours_per_head,
+                    )
+                    homekill_hours -= homekill_healthy[c, i] * hours_per_head
+                    starving_post_healthy_homekill = max(
+                        starving[c, i] - slaughter[c, i] - homekill_healthy[c, i], 0
+                    )
+                    homekill_starving[c, i] = min(
+                        starving_post_healthy_homekill,
+                        max(homekill_hours / hours_per_head, 0),
+                    )
+                    homekill_hours -= homekill_starving[c, i] * hours_per_head
+                    starving_after_homekill[c, i] = max(
+                        starving_post_healthy_homekill - homekill_starving[c, i], 0
+                    )
+            # the hours left after the homekill of the month
+            self.homekill_hours_budget[c, month] = homekill_hours
+
+        other_death_starving = starving_after_homekill * self.starvation_death_fraction
+        other_death_total = other_death_starving + other_deaths
+
+        # the pregnant animals die in proportion to the population, unless this is
+        # like the baseline (no breeding reduction or population target, and no
+        # starvation)
+        like_baseline = (
+            (self.reduction_in_animal_breeding == 0)
+            & (self.target_population_fraction == 1)
+            & (other_death_starving < 10)
+        )
+        population_before = series["population"][:, :, month]
+        other_death_fraction = np.divide(
+            other_death_total,
+            population_before,
+            out=np.ones_like(other_death_total),
+            where=population_before != 0,
+        )
+        for name in ["pregnant_animals_total", "pregnant_animals_birthing_this_month"]:
+            pregnant = series[name][:, :, month + 1]
+            adjusted = pregnant - pregnant * other_death_fraction
+            series[name][:, :, month + 1] = np.where(
+                like_baseline, pregnant, np.where(adjusted < 0, 0, adjusted)
+            )
+
+        total_homekill = homekill_other_death + homekill_healthy + homekill_starving
+        assert (total_homekill == 0).all(), (
+            'ERROR: It seems you specified a nonzero "homekill", are you sure you wanted to do that?'
+            "If so, then remove this assert in food_system/animal_populations.py"
+        )
+
+        series["homekill_other_death_this_month"][
+            :, :, month + 1
+        ] = homekill_other_death
+        series["homekill_healthy_this_month"][:, :, month + 1] = homekill_healthy
+        series["homekill_starving_this_month"][:, :, month + 1] = homekill_starving
+        series["total_homekill_this_month"][:, :, month + 1] = total_homekill
+        series["other_death_starving"][:, :, month + 1] = other_death_starving
+        series["other_death_total"][:, :, month + 1] = other_death_total
+
+        self.current_population = self.current_population - (
+            other_death_starving + homekill_healthy + homekill_starving
+        )
+        self.current_population[self.current_population < 0] = 0
+
+    def write_to_animals(self):
+        """
+        Writes the results back to the AnimalSpecies and the CountryData of each
+        country. The monthly histories of each species are views of the rows of the
+        arrays, so they are not copied (and a resumed run updates them).
+        """
+        for c, all_animals in enumerate(self.all_animals_by_country):
+            for i, animal in enumerate(all_animals):
+                for name in MONTHLY_SERIES:
+                    setattr(animal, name, self.series[name][c, i])
+                animal.births_animals_month = self.births_animals_month[c, i]
+                animal.transfer_population = self.transfer_population[c, i]
+                if self.is_milk[c, i]:
+                    animal.transfer_births = self.transfer_births[c, i]
+                    animal.retiring_milk_animals = self.retiring_milk_animals[c, i]
+                animal.current_population = self.current_population[c, i]
+                animal.population_fed = self.population_fed[c, i]
+                animal.pregnant_animal_slaughter_fraction = (
+                    self.pregnant_animal_slaughter_fraction[c, i]
+                )
+                animal.NE_balance = Food(self.net_energy_balance[c, i], 0, 0)
+
+            country_object = self.country_objects[c]
+            country_object.homekill_hours_budget = np.concatenate(
+                [
+                    self.homekill_hours_budget_before_run[c],
+                    self.homekill_hours_budget[c],
+                ]
+            )
+            if self.months_to_run > 0:
+                country_object.month = self.months_to_run - 1
@@ -27,13 +27,18 @@ Functionality required
 
 """
 
+import hashlib
+import pickle
 from pathlib import Path
 import pandas as pd
 import git
 from src.food_system.food import Food
+from src.food_system.animal_population_engine import AnimalPopulationArrays
+from src.food_system.animal_model_profiler import AnimalModelProfiler
 import matplotlib.pyplot as plt
 import numpy as np
 
+repo_root = git.Repo(".", search_parent_directories=True).working_dir
 
 """
 Start main function
@@ -41,6 +46,14 @@ Start main function
 
 
 class CalculateFeedAndMeat:
+    # The results of main, by the inputs they were run with. The rounds of a country
+    # (and scenarios of a run) often run the animals with the same feed and grass, so
+    # those runs are returned from here instead of being simulated again.
+    # They are stored pickled, so that changes made to one result by the caller can't
+    # change the result returned next time.
+    cache = {}
+    MAX_CACHED_RUNS = 64
+
     def __init__(
         self,
         country_code,
@@ -56,16 +69,159 @@ class CalculateFeedAndMeat:
         all animals is a list of animal objects feed used is a food object (of length (NMONTHS)) grass used is a food
         object (of length (NMONTHS))
         """
-
-        self.all_animals, self.feed_used, self.grass_used = main(
+        key = CalculateFeedAndMeat.get_cache_key(
             country_code,
             available_feed,
             available_grass,
             scenario,
+            kcals_per_head_meat_dict,
             constants_inputs,
-            remove_first_month=1,
-            kcals_per_head_meat_dict=kcals_per_head_meat_dict,
         )
+        if key not in CalculateFeedAndMeat.cache:
+            results = main(
+                country_code,
+                available_feed,
+                available_grass,
+                scenario,
+                constants_inputs,
+                remove_first_month=1,
+                kcals_per_head_meat_dict=kcals_per_head_meat_dict,
+            )
+            CalculateFeedAndMeat.save_to_cache(key, results)
+
+        self.all_animals, self.feed_used, self.grass_used = pickle.loads(
+            CalculateFeedAndMeat.cache[key]
+        )
+
+    @staticmethod
+    def get_cache_key(
+        country_code,
+        available_feed,
+        available_grass,
+        scenario,
+        kcals_per_head_meat_dict,
+        constants_inputs,
+    ):
+        """
+        Returns everything the results of main depend on: the country, the breeding
+        scenario, the meat per head, any custom starting populations and a hash of the
+        feed and grass available each month (only their kcals are used, and the hash is
+        last).
+        """
+        feed_and_grass = hashlib.sha256()
+        for available in [available_feed, available_grass]:
+            kcals = np.ascontiguousarray(available.kcals, dtype=float)
+            feed_and_grass.update(str(kcals.shape).encode())
+            feed_and_grass.update(kcals.tobytes())
+
+        if kcals_per_head_meat_dict is not None:
+            kcals_per_head_meat_dict = tuple(sorted(kcals_per_head_meat_dict.items()))
+
+        custom_stock_info = ()
+        if constants_inputs:
+            custom_stock_info = tuple(
+                sorted(
+                    (key, value)
+                    for key, value in constants_inputs.items()
+                    if "_head_start" in key
+                )
+            )
+
+        return (
+            country_code,
+            scenario,
+            kcals_per_head_meat_dict,
+            custom_stock_info,
+            feed_and_grass.hexdigest(),
+        )
+
+    @staticmethod
+    def for_countries(
+        country_codes,
+        available_feeds,
+        available_grasses,
+        scenario,
+        kcals_per_head_meat_dicts,
+        constants_inputs_by_country=None,
+    ):
+        """
+        Calculates the feed and meat of many countries, running the ones that haven't
+        been run already together (see main_for_countries). A world run uses this to
+        run the first round of its countries before any of them are optimized (see
+        ScenarioRunnerNoTrade.calculate_feed_and_meat_round1).
+
+        Returns:
+            list: a CalculateFeedAndMeat for each country
+        """
+        if constants_inputs_by_country is None:
+            constants_inputs_by_country = [None] * len(country_codes)
+        inputs_by_country = [
+            dict(
+                country_code=country_code,
+                available_feed=available_feed,
+                available_grass=available_grass,
+                scenario=scenario,
+                kcals_per_head_meat_dict=kcals_per_head_meat_dict,
+                constants_inputs=constants_inputs,
+            )
+            for (
+                country_code,
+                available_feed,
+                available_grass,
+                kcals_per_head_meat_dict,
+                constants_inputs,
+            ) in zip(
+                country_codes,
+                available_feeds,
+                available_grasses,
+                kcals_per_head_meat_dicts,
+                constants_inputs_by_country,
+            )
+        ]
+        keys = [
+            CalculateFeedAndMeat.get_cache_key(**inputs) for inputs in inputs_by_country
+        ]
+        to_run = [
+            inputs
+            for inputs, key in zip(inputs_by_country, keys)
+            if key not in CalculateFeedAndMeat.cache
+        ]
+        results = {}
+        if len(to_run) > 0:
+            for inputs, result in zip(
+                to_run,
+                main_for_countries(
+                    [inputs["country_code"] for inputs in to_run],
+                    [inputs["available_feed"] for inputs in to_run],
+                    [inputs["available_grass"] for inputs in to_run],
+                    scenario,
+                    [inputs["constants_inputs"] for inputs in to_run],
+                    remove_first_month=1,
+                    kcals_per_head_meat_dicts=[
+                        inputs["kcals_per_head_meat_dict"] for inputs in to_run
+                    ],
+                ),
+            ):
+                results[CalculateFeedAndMeat.get_cache_key(**inputs)] = result
+
+        feed_and_meat_by_country = []
+        for inputs, key in zip(inputs_by_country, keys):
+            if key in results:
+                # saved just before it is used, so it can't have been forgotten yet
+                CalculateFeedAndMeat.save_to_cache(key, results[key])
+            feed_and_meat_by_country.append(CalculateFeedAndMeat(**inputs))
+        return feed_and_meat_by_country
+
+    @staticmethod
+    def save_to_cache(key, results):
+        if len(CalculateFeedAndMeat.cache) >= CalculateFeedAndMeat.MAX_CACHED_RUNS:
+            # forget the oldest run
+            del CalculateFeedAndMeat.cache[next(iter(CalculateFeedAndMeat.cache))]
+        CalculateFeedAndMeat.cache[key] = pickle.dumps(results)
+
+    @staticmethod
+    def clear_cache():
+        CalculateFeedAndMeat.cache.clear()
 
     def get_meat_produced(self):
         # set monthly values to zero with one example object from  all_animals
@@ -188,7 +344,8 @@ class CountryData:
     - country_name: the name of the country.
     - slaughter_hours: a list of total slaughter hours for each month.
     - homekill_hours_total_month: a list of total homekill hours for each month.
-    - homekill_hours_budget: a list of budgeted homekill hours for each month.
+    - homekill_hours_budget: a list of budgeted homekill hours for each month (a numpy
+        array once the model has run).
     - meat_output: a list of meat output for each month.
     - small_slaughter_hours: the number of small animal slaughter hours for the country.
     - medium_slaughter_hours: the number of medium animal hours for the country.
@@ -196,8 +353,24 @@ class CountryData:
     - EK_region: the FAO region for the country.
     - LSU_conversion_factors: a dictionary of livestock unit conversion factors for the country.
 
+    Only the attributes in __slots__ can be set, so a misspelt attribute raises an AttributeError.
+
     """
 
+    __slots__ = (
+        "country_name",
+        "slaughter_hours",
+        "homekill_hours_total_month",
+        "homekill_hours_budget",
+        "meat_output",
+        "EK_region",
+        "LSU_conversion_factors",
+        "other_death_homekill_rate",
+        "homekill_fraction",
+        "spare_slaughter_hours",
+        "month",
+    )
+
     def __init__(self, country_name):
         if not isinstance(country_name, str):
             raise TypeError("Country name must be a string")
@@ -293,6 +466,15 @@ class CountryData:
         # append the total slaughter hours to the country data
         return total_slaughter_hours
 
+    def get_attributes(self):
+        """
+        Returns a dict of the attributes that have been set, by name (objects with
+        __slots__ have no __dict__ for vars to return).
+        """
+        return {
+            name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)
+        }
+
 
 # create class to store animal population data in. Needs to store the following: animal type, population, and slaughter.
 class AnimalSpecies:
@@ -317,8 +499,87 @@ class AnimalSpecies:
         nutrition_ratio : object
         Object containing the nutrition ratio for the animal type
 
+    Only the attributes in __slots__ can be set, so a misspelt attribute raises an
+    AttributeError rather than adding a new attribute, and every object takes the same
+    amount of memory. The monthly histories (population, slaughter, ...) are lists
+    while the months are run, and numpy arrays once the model has run: views of the
+    arrays of AnimalPopulationArrays, so they are not copied for each species.
+
     """
 
+    __slots__ = (
+        # basic attributes
+        "animal_type",
+        "animal_species",
+        "transfer_culling_fraction",
+        # set_animal_attributes
+        "population",
+        "population_starving_pre_slaughter",
+        "population_starving_month",
+        "animal_size",
+        "current_population",
+        "initital_population",
+        "initial_slaughter",
+        "animal_function",
+        "livestock_unit",
+        "LSU_factor",
+        "digestion_type",
+        "approximate_feed_conversion",
+        "digestion_efficiency",
+        "population_fed",
+        "statistical_lifetime",
+        "carcass_weight",
+        "offal_percentage",
+        "fat_percentage",
+        "nutrition_ratio",
+        # set_LSU_attributes
+        "NE_balance",
+        # set_species_milk_attributes
+        "retiring_milk_animals",
+        "productive_milk_age_start",
+        "productive_milk_age_end",
+        "insemination_cycle_time_for_milk",
+        "population_proportion_productive_milk",
+        "population_producing_milk",
+        "milk_production_per_month_per_head",
+        "retiring_milk_animals_fraction",
+        # set_species_slaughter_attributes
+        "other_death_causes_other_than_starving",
+        "other_death_starving",
+        "other_death_total",
+        "slaughter",
+        "births_animals_month",
+        "pregnant_animals_birthing_this_month",
+        "pregnant_animals_total",
+        "slaughtered_pregnant_animals",
+        "transfer_population",
+        "transfer_births",
+        "gestation",
+        "other_animal_death_rate_annual",
+        "animals_per_pregnancy",
+        "animal_slaughter_hours",
+        "change_in_slaughter_rate",
+        "baseline_slaughter",
+        "pregnant_animal_slaughter_fraction",
+        "reduction_in_animal_breeding",
+        "target_population_fraction",
+        "target_population_head",
+        "other_animal_death_rate_monthly",
+        "other_animal_death_basline_head_monthly",
+        "birth_ratio",
+        "births_animals_month_baseline",
+        "pregnant_animals_total_baseline",
+        "pregnant_animals_birthing_this_month_baseline",
+        "slaughtered_pregnant_animals_baseline",
+        "homekill_other_death_this_month",
+        "homekill_healthy_this_month",
+        "homekill_starving_this_month",
+        "total_homekill_this_month",
+        "starvation_death_fraction",
+        # AnimalModelBuilder.get_optimal_next_animal_to_feed
+        "net_kcals_gained_per_hour_slaughter_this_month",
+    )
+
     def __init__(self, animal_type, animal_species):
         # basic attributes
         self.animal_type = animal_type
@@ -330,6 +591,15 @@ class AnimalSpecies:
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def get_attributes(self):
+        """
+        Returns a dict of the attributes that have been set, by name (objects with
+        __slots__ have no __dict__ for vars to return).
+        """
+        return {
+            name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)
+        }
+
     def set_animal_attributes(
         self,
         population,
@@ -1663,6 +1933,35 @@ class AnimalPopulation:
 
 
 class AnimalDataReader:
+    """
+    Reads the animal data files. Each file is only read once, the first time it is
+    needed, and the same data frame is then shared by every run of the animal model,
+    so the data frames returned must not be modified. Call clear_cache if the files
+    change.
+    """
+
+    cache = {}
+
+    def read_data_file(filename, index_col):
+        """
+        Read a CSV file from the animal feed data directory, or return it from the
+        cache if it has been read before
+        """
+        if (filename, index_col) not in AnimalDataReader.cache:
+            animal_feed_data_dir = (
+                Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
+            )
+            AnimalDataReader.cache[(filename, index_col)] = pd.read_csv(
+                animal_feed_data_dir / filename, index_col=index_col
+            )
+        return AnimalDataReader.cache[(filename, index_col)]
+
+    def clear_cache():
+        """
+        Forget the data read so far, so the files are read again next time
+        """
+        AnimalDataReader.cache.clear()
+
     def read_animal_population_data(filename):
         """
         Read animal population data from CSV file
@@ -1673,21 +1972,7 @@ class AnimalDataReader:
             Dataframe containing animal population data
 
         """
-
-        repo_root = git.Repo(".", search_parent_directories=True).working_dir
-        # Load data
-        animal_feed_data_dir = (
-            Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
-        )
-
-        FAO_data = Path.joinpath(Path(animal_feed_data_dir), filename)
-
-        # Load data
-        df_animal_stock_info = pd.read_csv(FAO_data, index_col="iso3")
-
-        # merge the two dataframes on index
-
-        return df_animal_stock_info
+        return AnimalDataReader.read_data_file(filename, "iso3")
 
     def read_animal_nutrition_data(filename):
         """ "
@@ -1698,21 +1983,7 @@ class AnimalDataReader:
         df_animal_nutrition : pandas dataframe
             Dataframe containing animal nutrition data
         """
-        repo_root = git.Repo(".", search_parent_directories=True).working_dir
-        # Load data
-        animal_feed_data_dir = (
-            Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
-        )
-
-        animal_nutrition_data_location = Path.joinpath(
-            Path(animal_feed_data_dir), filename
-        )
-
-        df_animal_attributes = pd.read_csv(
-            animal_nutrition_data_location, index_col="animal"
-        )
-
-        return df_animal_attributes
+        return AnimalDataReader.read_data_file(filename, "animal")
 
     def read_animal_options(filename):
         """ "
@@ -1723,17 +1994,7 @@ class AnimalDataReader:
         df_animal_nutrition : pandas dataframe
             Dataframe containing animal nutrition data
         """
-        repo_root = git.Repo(".", search_parent_directories=True).working_dir
-        # Load data
-        animal_feed_data_dir = (
-            Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
-        )
-
-        animal_options_location = Path.joinpath(Path(animal_feed_data_dir), filename)
-
-        df_animal_options = pd.read_csv(animal_options_location, index_col="animal")
-
-        return df_animal_options
+        return AnimalDataReader.read_data_file(filename, "animal")
 
     def read_animal_regional_factors(filename):
         """ "
@@ -1744,17 +2005,7 @@ class AnimalDataReader:
         df_animal_nutrition : pandas dataframe
             Dataframe containing animal nutrition data
         """
-        repo_root = git.Repo(".", search_parent_directories=True).working_dir
-        # Load data
-        animal_feed_data_dir = (
-            Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
-        )
-
-        regional_coeffs_location = Path.joinpath(Path(animal_feed_data_dir), filename)
-
-        df_regional_coeffs = pd.read_csv(regional_coeffs_location, index_col="animal")
-
-        return df_regional_coeffs
+        return AnimalDataReader.read_data_file(filename, "animal")
 
     def read_country_data(filename):
         """ "
@@ -1765,20 +2016,17 @@ class AnimalDataReader:
         df_animal_nutrition : pandas dataframe
             Dataframe containing animal nutrition data
         """
-        repo_root = git.Repo(".", search_parent_directories=True).working_dir
-        # Load data
-        animal_feed_data_dir = (
-            Path(repo_root) / "data" / "no_food_trade" / "animal_feed_data"
-        )
-
-        country_info_location = Path.joinpath(Path(animal_feed_data_dir), filename)
-
-        df_country_info = pd.read_csv(country_info_location, index_col="alpha3")
-
-        return df_country_info
+        return AnimalDataReader.read_data_file(filename, "alpha3")
 
 
 class AnimalModelBuilder:
+    # The order to slaughter the animal types in, for each kcals_per_head_meat_dict,
+    # and the slaughter attributes of each animal type in each scenario. These are the
+    # same for every country, so they are worked out once and each country looks its
+    # animals up in them.
+    slaughter_priority_tables = {}
+    slaughter_attributes_tables = {}
+
     def create_animal_objects(df_animal_stock_info, df_animal_attributes):
         """
         Create animal objects from dataframes
@@ -2012,48 +2260,18 @@ class AnimalModelBuilder:
         # )
         #
 
+        slaughter_priority_table = AnimalModelBuilder.get_slaughter_priority_table(
+            kcals_per_head_meat_dict, df_animal_attributes
+        )
         for animal_name, animal in animal_dict.items():
-            animal_slaughter_hours = df_animal_attributes.loc[animal.animal_type][
-                "animal_slaughter_hours"
-            ]
-            # calculate actual meat kcals per animal per slaughter hour
-            slaughter_hours_per_head = animal_slaughter_hours
-            if animal.animal_type == "chicken":
-                kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_CHICKEN"]
-            elif animal.animal_type == "pig":
-                kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_PIG"]
-            elif animal.animal_size == "small" and animal.animal_type != "chicken":
-                kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_SMALL_ANIMAL"]
-            elif animal.animal_size == "medium" and animal.animal_type != "pig":
-                kcals_per_head_meat = kcals_per_head_meat_dict[
-                    "KCALS_PER_MEDIUM_ANIMAL"
-                ]
-            elif animal.animal_size == "large":
-                kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_LARGE_ANIMAL"]
-            meat_kcals_per_slaughter_hour = (
-                kcals_per_head_meat / slaughter_hours_per_head
-            )
-
-            # this says that for every kcal of feed, we get digestion_efficiency kcals of meat.
-            digestion_efficiency = animal.digestion_efficiency["feed"]
-            assert digestion_efficiency > 0, "ERROR: impossibly low meat efficiency"
-            assert digestion_efficiency <= 1, "ERROR: impossibly high meat efficiency"
-
-            # this is how much feed we save by spending an hour slaughtering the animal
-            # near zero efficiency would require a huge amount of feed.
-            # near 100% efficiency would require very little feed.
-            energy_used_by_animal = animal.net_energy_required_per_month()
-            each_animal_feed_consumed_month_kcals = (
-                energy_used_by_animal / digestion_efficiency
-            )
-            feed_kcals_saved_per_hour_slaughtered = (
-                each_animal_feed_consumed_month_kcals / slaughter_hours_per_head
-            )
-            net_kcals_gained_per_hour_slaughter_this_month = (
-                meat_kcals_per_slaughter_hour + feed_kcals_saved_per_hour_slaughtered
-            )
+            if animal.animal_type not in slaughter_priority_table:
+                slaughter_priority_table[animal.animal_type] = (
+                    AnimalModelBuilder.get_net_kcals_gained_per_hour_slaughter(
+                        animal, kcals_per_head_meat_dict, df_animal_attributes
+                    )
+                )
             animal.net_kcals_gained_per_hour_slaughter_this_month = (
-                net_kcals_gained_per_hour_slaughter_this_month
+                slaughter_priority_table[animal.animal_type]
             )
 
         # reorder the animal dict in accordance with the maximal caloric gains
@@ -2067,6 +2285,71 @@ class AnimalModelBuilder:
 
         return animal_dict
 
+    def get_slaughter_priority_table(kcals_per_head_meat_dict, df_animal_attributes):
+        """
+        Returns the net kcals gained per hour of slaughter of each animal type (see
+        get_optimal_next_animal_to_feed), which is shared by every country with the
+        same kcals_per_head_meat_dict. Animal types are added to it as they are first
+        ranked.
+
+        The ranking is done before the LSU factors of the country are set, so the net
+        kcals of an animal type are the same in every country.
+        """
+        key = tuple(sorted(kcals_per_head_meat_dict.items()))
+        if key not in AnimalModelBuilder.slaughter_priority_tables or (
+            AnimalModelBuilder.slaughter_priority_tables[key][0]
+            is not df_animal_attributes
+        ):
+            AnimalModelBuilder.slaughter_priority_tables[key] = (
+                df_animal_attributes,
+                {},
+            )
+        return AnimalModelBuilder.slaughter_priority_tables[key][1]
+
+    def get_net_kcals_gained_per_hour_slaughter(
+        animal, kcals_per_head_meat_dict, df_animal_attributes
+    ):
+        """
+        Returns the meat kcals produced and the feed kcals saved per hour spent
+        slaughtering the animal (see get_optimal_next_animal_to_feed).
+        """
+        animal_slaughter_hours = df_animal_attributes.loc[animal.animal_type][
+            "animal_slaughter_hours"
+        ]
+        # calculate actual meat kcals per animal per slaughter hour
+        slaughter_hours_per_head = animal_slaughter_hours
+        if animal.animal_type == "chicken":
+            kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_CHICKEN"]
+        elif animal.animal_type == "pig":
+            kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_PIG"]
+        elif animal.animal_size == "small" and animal.animal_type != "chicken":
+            kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_SMALL_ANIMAL"]
+        elif animal.animal_size == "medium" and animal.animal_type != "pig":
+            kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_MEDIUM_ANIMAL"]
+        elif animal.animal_size == "large":
+            kcals_per_head_meat = kcals_per_head_meat_dict["KCALS_PER_LARGE_ANIMAL"]
+        meat_kcals_per_slaughter_hour = kcals_per_head_meat / slaughter_hours_per_head
+
+        # this says that for every kcal of feed, we get digestion_efficiency kcals of meat.
+        digestion_efficiency = animal.digestion_efficiency["feed"]
+        assert digestion_efficiency > 0, "ERROR: impossibly low meat efficiency"
+        assert digestion_efficiency <= 1, "ERROR: impossibly high meat efficiency"
+
+        # this is how much feed we save by spending an hour slaughtering the animal
+        # near zero efficiency would require a huge amount of feed.
+        # near 100% efficiency would require very little feed.
+        energy_used_by_animal = animal.net_energy_required_per_month()
+        each_animal_feed_consumed_month_kcals = (
+            energy_used_by_animal / digestion_efficiency
+        )
+        feed_kcals_saved_per_hour_slaughtered = (
+            each_animal_feed_consumed_month_kcals / slaughter_hours_per_head
+        )
+        net_kcals_gained_per_hour_slaughter_this_month = (
+            meat_kcals_per_slaughter_hour + feed_kcals_saved_per_hour_slaughtered
+        )
+        return net_kcals_gained_per_hour_slaughter_this_month
+
     def update_animal_objects_with_slaughter(
         animal_list,
         df_animal_attributes,
@@ -2106,37 +2389,30 @@ class AnimalModelBuilder:
 
         animal_list = sorted(animal_list, key=lambda x: x.animal_function, reverse=True)
 
-        selected_scenario = df_animal_options.loc[
-            df_animal_options["scenario"] == scenario
-        ]
+        slaughter_attributes_table = AnimalModelBuilder.get_slaughter_attributes_table(
+            df_animal_attributes, df_animal_options, scenario
+        )
 
         # loop through the dict of animal objects
         for animal in animal_list:
-            # this list of variables will be a csv file in the future
-            gestation = df_animal_attributes.loc[animal.animal_type]["gestation"]
-            animal_slaughter_hours = df_animal_attributes.loc[animal.animal_type][
-                "animal_slaughter_hours"
-            ]
-            other_animal_death_rate_annual = df_animal_attributes.loc[
-                animal.animal_type
-            ]["other_animal_death_rate_annual"]
-            animals_per_pregnancy = df_animal_attributes.loc[animal.animal_type][
-                "animals_per_pregnancy"
+            slaughter_attributes = slaughter_attributes_table[animal.animal_type]
+            gestation = slaughter_attributes["gestation"]
+            animal_slaughter_hours = slaughter_attributes["animal_slaughter_hours"]
+            other_animal_death_rate_annual = slaughter_attributes[
+                "other_animal_death_rate_annual"
             ]
-            reduction_in_animal_breeding = selected_scenario.loc[animal.animal_type][
+            animals_per_pregnancy = slaughter_attributes["animals_per_pregnancy"]
+            reduction_in_animal_breeding = slaughter_attributes[
                 "reduction_in_animal_breeding"
             ]
-            change_in_slaughter_rate = selected_scenario.loc[animal.animal_type][
-                "change_in_slaughter_rate"
+            change_in_slaughter_rate = slaughter_attributes["change_in_slaughter_rate"]
+            pregnant_animal_slaughter_fraction = slaughter_attributes[
+                "pregnant_animal_slaughter_fraction"
             ]
-            pregnant_animal_slaughter_fraction = selected_scenario.loc[
-                animal.animal_type
-            ]["pregnant_animal_slaughter_fraction"]
-            target_population_fraction = selected_scenario.loc[animal.animal_type][
+            target_population_fraction = slaughter_attributes[
                 "target_population_fraction"
             ]
-
-            starvation_death_fraction = selected_scenario.loc[animal.animal_type][
+            starvation_death_fraction = slaughter_attributes[
                 "starvation_death_fraction"
             ]
             # if milk animal, set the transfer population
@@ -2172,6 +2448,56 @@ class AnimalModelBuilder:
             )
         return
 
+    def get_slaughter_attributes_table(
+        df_animal_attributes, df_animal_options, scenario
+    ):
+        """
+        Returns the slaughter attributes of each animal type in the scenario, as a dict
+        of animal type to a dict of attribute name to value. The table is made once for
+        each scenario and shared by every country.
+        """
+        table = AnimalModelBuilder.slaughter_attributes_tables.get(scenario)
+        if (
+            table is None
+            or table[0] is not df_animal_attributes
+            or table[1] is not df_animal_options
+        ):
+            selected_scenario = df_animal_options.loc[
+                df_animal_options["scenario"] == scenario
+            ]
+            attributes = {}
+            for animal_type in selected_scenario.index:
+                animal_attributes = df_animal_attributes.loc[animal_type]
+                scenario_options = selected_scenario.loc[animal_type]
+                attributes[animal_type] = {
+                    "gestation": animal_attributes["gestation"],
+                    "animal_slaughter_hours": animal_attributes[
+                        "animal_slaughter_hours"
+                    ],
+                    "other_animal_death_rate_annual": animal_attributes[
+                        "other_animal_death_rate_annual"
+                    ],
+                    "animals_per_pregnancy": animal_attributes["animals_per_pregnancy"],
+                    "reduction_in_animal_breeding": scenario_options[
+                        "reduction_in_animal_breeding"
+                    ],
+                    "change_in_slaughter_rate": scenario_options[
+                        "change_in_slaughter_rate"
+                    ],
+                    "pregnant_animal_slaughter_fraction": scenario_options[
+                        "pregnant_animal_slaughter_fraction"
+                    ],
+                    "target_population_fraction": scenario_options[
+                        "target_population_fraction"
+                    ],
+                    "starvation_death_fraction": scenario_options[
+                        "starvation_death_fraction"
+                    ],
+                }
+            table = (df_animal_attributes, df_animal_options, attributes)
+            AnimalModelBuilder.slaughter_attributes_tables[scenario] = table
+        return table[2]
+
     def update_animal_objects_with_milk(animal_list, df_animal_attributes):
         """This function updates the animal objects with the slaughter data.
 
@@ -2239,18 +2565,28 @@ class AnimalModelBuilder:
         return
 
     def remove_first_month(animal):
-        attributes = vars(animal)
+        attributes = animal.get_attributes()
+        for attr_name, attr_value in attributes.items():
+            if isinstance(attr_value, (list, np.ndarray)) and len(attr_value) > 0:
+                setattr(animal, attr_name, attr_value[1:])
+
+    def histories_to_arrays(animal):
+        """
+        Replaces the monthly histories the animal has appended to (its non-empty
+        lists) with numpy arrays, which are the histories returned by the array engine.
+        """
+        attributes = animal.get_attributes()
         for attr_name, attr_value in attributes.items():
             if isinstance(attr_value, list) and attr_value:
-                attr_value.pop(0)
+                setattr(animal, attr_name, np.array(attr_value, dtype=float))
 
 
 # Debug and Meta tools
 class Debugging:
     def print_list_lengths(obj):
-        attributes = vars(obj)
+        attributes = obj.get_attributes()
         for attr_name, attr_value in attributes.items():
-            if isinstance(attr_value, list):
+            if isinstance(attr_value, (list, np.ndarray)):
                 print(f"{attr_name}: {len(attr_value)}")
 
     # Import csv module for writing CSV files
@@ -2268,9 +2604,9 @@ class Debugging:
         row_data = {"animal_type": animal.animal_type}
 
         # Iterate through each attribute of the object
-        for attr, value in vars(animal).items():
+        for attr, value in animal.get_attributes().items():
             # Check if the attribute's value is a list of numbers
-            if isinstance(value, list) and all(
+            if isinstance(value, (list, np.ndarray)) and all(
                 isinstance(x, (int, float)) for x in value
             ):
                 # Add attribute name to headers if not already present
@@ -2339,7 +2675,8 @@ class Debugging:
 
             # Determine the maximum list length among all attributes for this animal
             max_len = max(
-                len(val) if isinstance(val, list) else 1 for val in row_data.values()
+                len(val) if isinstance(val, (list, np.ndarray)) else 1
+                for val in row_data.values()
             )
 
             # Create rows by expanding lists into individual rows, and add them to the list of all rows
@@ -2349,7 +2686,9 @@ class Debugging:
                     header = f"{animal_type}_{attr}"
                     val = row_data[attr]
                     row[header] = (
-                        val[i] if isinstance(val, list) and i < len(val) else val
+                        val[i]
+                        if isinstance(val, (list, np.ndarray)) and i < len(val)
+                        else val
                     )
                 rows.append(row)
 
@@ -2453,18 +2792,15 @@ def calculate_net_slaughter_hours_by_size(animals):
     return hours_by_size_dict
 
 
-def main(
-    country_code,
-    available_feed,
-    available_grass,
-    scenario,
-    constants_inputs=None,
-    remove_first_month=0,
-    kcals_per_head_meat_dict=None,
+def create_country_animals(
+    country_code, scenario, constants_inputs=None, kcals_per_head_meat_dict=None
 ):
-    """Main function to be called by the user.
+    """
+    Creates the animals of a country, in the order they are fed and slaughtered,
+    and the country they are in, ready to run from month zero.
 
-    This function will call the other functions in this file.
+    Returns:
+        tuple: the list of AnimalSpecies, and the CountryData
     """
     # IMPORT DATA
     # Data file defaults TODO: imnclude as args, just not yet to not break things
@@ -2474,14 +2810,19 @@ def main(
     regional_csv = "regional_conversion_factors.csv"
     country_csv = "FAO_country_region_mappings.csv"
 
+    profile = AnimalModelProfiler.enabled
+    if profile:
+        start = AnimalModelProfiler.start()
+
     # read animal population data
     df_animal_stock_info = AnimalDataReader.read_animal_population_data(population_csv)
 
     # custom animal stock info
+    custom_stock_info = {}
     if constants_inputs:
         for key, value in constants_inputs.items():
             if "_head_start" in key:
-                df_animal_stock_info.loc[country_code, key.strip("_start")] = value
+                custom_stock_info[key.strip("_start")] = value
 
     # read animal nutrition data
     df_animal_attributes = AnimalDataReader.read_animal_nutrition_data(attributes_csv)
@@ -2491,22 +2832,18 @@ def main(
     )
     df_country_info = AnimalDataReader.read_country_data(country_csv)
 
-    # months to run the model for
-    months_to_run = len(
-        available_feed.kcals
-    )  # will be inherited from the calling function
-
-    # WHEN INTEGRATING, THESE CREATION OF OBJECTS SHOULD BE DONE OUTSIDE OF THE MAIN FUNCTION
-    # AND ONLY ON THE FIRST RUN OF THE MODEL
-
     if country_code == "SWT":
         # this indicates swaziland, which is "SWZ" in non-cleaned-up FAOSTAT data
         country_code = "SWZ"
 
     # # Populate animal objects ##
     # create animal objects
+    # a copy, as the data read is shared by every run
+    country_stock_info = df_animal_stock_info.loc[country_code].copy()
+    for key, value in custom_stock_info.items():
+        country_stock_info[key] = value
     animal_list = AnimalModelBuilder.create_animal_objects(
-        df_animal_stock_info.loc[country_code], df_animal_attributes
+        country_stock_info, df_animal_attributes
     )
     SLAUGHTER_OPTIMALLY = True
     if SLAUGHTER_OPTIMALLY and kcals_per_head_meat_dict is not None:
@@ -2529,12 +2866,11 @@ def main(
     milk_animals = [
         animal for animal in animal_dict.values() if "milk" in animal.animal_type
     ]
-    # get list of all ruminants
-    ruminants = [
-        animal for animal in animal_dict.values() if animal.digestion_type == "ruminant"
-    ]
     # all animals
     all_animals = [animal for animal in animal_dict.values()]
+    if profile:
+        AnimalModelProfiler.add(country_code, "create_animal_objects", start)
+        start = AnimalModelProfiler.start()
 
     AnimalModelBuilder.update_animal_objects_with_milk(
         milk_animals, df_animal_attributes
@@ -2557,259 +2893,458 @@ def main(
 
     # with the country object, update the animal objects with the LSU factors
     AnimalModelBuilder.update_animal_objects_LSU_factor(all_animals, country_object)
-
-    # create output feed and grass objects
-    feed_used = Food(np.zeros(len(available_feed.kcals)))
-    grass_used = Food(np.zeros(len(available_feed.kcals)))
+    if profile:
+        AnimalModelProfiler.add(country_code, "update_animal_objects", start)
+        start = AnimalModelProfiler.start()
 
     # ### END CREATION OF OBJECTS ####
     # do month zero baseline appends
     for animal in all_animals:
         animal.append_month_zero()
+    if profile:
+        AnimalModelProfiler.add(country_code, "append_month_zero", start)
 
-    # THIS month for loop won't reallt exist here, i will be called in a loop somewhere else
-    # this is required as the I/O needs to interact with the rest of the model each month
-    for month in range(0, months_to_run):
-        country_object.month = month
-        if month != 0:
-            AnimalPopulation.set_current_populations(all_animals)
-        # # THESE FEED OBJECTS WILL BE PASSED IN ####
-        # create available feed object
-        feed_available_this_month = available_feed[month]
-        grass_available_this_month = available_grass[month]
-
-        # Do the feeding
-        # feed the animals
-        (
-            feed_available_this_month,
-            grass_available_this_month,
-        ) = AnimalPopulation.feed_animals(
-            all_animals,
-            ruminants,
-            feed_available_this_month,
-            grass_available_this_month,
-        )
-        AnimalPopulation.calculate_starving_animals_after_feed(all_animals)
+    return all_animals, country_object
 
-        # update the feed and grass objects with the amount used
-        # @MORGAN TODO:, I couldn't work out how to assign the values to the feed_used object without doing this
-        # (breaking it out in to kcals)
-        feed_used.kcals[month] = (
-            available_feed.kcals[month] - feed_available_this_month.kcals
-        )
-        grass_used.kcals[month] = (
-            available_grass.kcals[month] - grass_available_this_month.kcals
-        )
 
-        # OKAY SO NOW WE HAVE THE ANIMALS FED, WE NEED TO LOOK AT SLAUGHTERING
+def main(
+    country_code,
+    available_feed,
+    available_grass,
+    scenario,
+    constants_inputs=None,
+    remove_first_month=0,
+    kcals_per_head_meat_dict=None,
+    use_array_engine=True,
+    previous_run=None,
+    return_animal_arrays=False,
+):
+    """Main function to be called by the user.
 
-        # create a list of transfer populations, based on all the different animal species, use for loop to create a
-        #  dict that can be used to store the transfer populations
-        # important that these are zero as default
-        # resets to zero each month (i.e not cumulative, )
-        transfer_populations = {}
-        births = {}
-        for animal in all_animals:
-            transfer_populations[animal.animal_species] = 0
+    This function will call the other functions in this file.
 
-        #  #### ##### ##### ##### ##### ##### ##### ##### ##### ##### #####
-        # this next loop is run first to populate the birth/retiurement tasnfers.
-        # working out the transfer populations requires the milk animals birt rate / retuirmenet rates
-        # this needs to be done first as the transfer population is used in the next loop
-        # and the next loop will be run in order of slaughter preference, so we can't put the birth rates in there
-        # so the first loop can be run in any order, but the second loop needs to be run in order of slaughter
-        # preference
-        #  #### ##### ##### ##### ##### ##### ##### ##### ##### ##### #####
-        for animal in all_animals:
-            # additive population
+    The months are run by AnimalPopulationArrays (all species at once), or one
+    species at a time if use_array_engine is False. The results are the same.
 
-            (
-                new_births,
-                new_transfer_births,
-            ) = AnimalPopulation.calculate_additive_births(animal, month)
-            # add new population to the animal object
-            births[animal.animal_type] = new_births
-            animal.births_animals_month.append(new_births)
-
-            ADD_TRANSFER_POPULATIONS = True
-            if animal.animal_function == "milk":
-                if ADD_TRANSFER_POPULATIONS:
-                    transfer_populations[animal.animal_species] = (
-                        animal.retiring_milk_head_monthly() + new_transfer_births
-                    )
-                    animal.transfer_births.append(new_transfer_births)
+    previous_run is the AnimalPopulationArrays of an earlier run of the same country,
+    scenario and animals (returned with return_animal_arrays=True, which saves the
+    state of each month so the run can be resumed). If it is given, only the months
+    from the first one where the feed or grass changed are run again.
 
-                else:
-                    transfer_populations[animal.animal_species] = 0
-                    animal.transfer_births.append(0)
+    To run many countries at once, use main_for_countries.
+
+    The time of each stage is added up by AnimalModelProfiler, if it is enabled.
+    """
+    profile = AnimalModelProfiler.enabled
+    if previous_run is None:
+        all_animals, country_object = create_country_animals(
+            country_code, scenario, constants_inputs, kcals_per_head_meat_dict
+        )
+    else:
+        # the animals of the earlier run are run again
+        assert use_array_engine, "ERROR: only runs of the array engine can be resumed"
+        all_animals = previous_run.all_animals_by_country[0]
+        country_object = previous_run.country_objects[0]
+
+    # months to run the model for
+    months_to_run = len(
+        available_feed.kcals
+    )  # will be inherited from the calling function
 
-                animal.retiring_milk_animals.append(animal.retiring_milk_head_monthly())
+    # create output feed and grass objects
+    feed_used = Food(np.zeros(len(available_feed.kcals)))
+    grass_used = Food(np.zeros(len(available_feed.kcals)))
 
-                # add to tranfser population
-                # THIS ISN'T WORKING CHANGED TO FUCNTION, MAYBE GOOD NOW
+    animal_arrays = previous_run
+    if use_array_engine:
+        if animal_arrays is None:
+            animal_arrays = AnimalPopulationArrays(
+                [all_animals],
+                [country_object],
+                months_to_run,
+                save_states=return_animal_arrays,
+            )
+        start_month = animal_arrays.first_changed_month(
+            [available_feed.kcals], [available_grass.kcals]
+        )
+        feed_used_by_country, grass_used_by_country = animal_arrays.resume(
+            start_month, [available_feed.kcals], [available_grass.kcals]
+        )
+        feed_used.kcals = feed_used_by_country[0]
+        grass_used.kcals = grass_used_by_country[0]
+        if profile:
+            start = AnimalModelProfiler.start()
+        animal_arrays.write_to_animals()
+        if profile:
+            AnimalModelProfiler.add(country_code, "write_to_animals", start)
+    else:
+        # get list of all ruminants
+        ruminants = [
+            animal for animal in all_animals if animal.digestion_type == "ruminant"
+        ]
 
-        # #### ##### ##### ##### ##### ##### ##### ##### ##### #####
-        # this loop below needs to run in order of species slaughhter prefernce
-        # TODO: what is the order required? provide an option to the user
-        # consider, total feed usage, feed per head, or feed conversion
-        # if we are looking for efficiency feed voncersion  head species
-        # if we are looking for total feed usage, feed usage per head
-        # or maybe feed usage per slaughter hour is the best use?
-        #  #### ##### ##### ##### ##### ##### ##### ##### ##### #####
+        # THIS month for loop won't reallt exist here, i will be called in a loop somewhere else
+        # this is required as the I/O needs to interact with the rest of the model each month
+        for month in range(0, months_to_run):
+            country_object.month = month
+            if profile:
+                start = AnimalModelProfiler.start()
+            if month != 0:
+                AnimalPopulation.set_current_populations(all_animals)
+            # # THESE FEED OBJECTS WILL BE PASSED IN ####
+            # create available feed object
+            feed_available_this_month = available_feed[month]
+            grass_available_this_month = available_grass[month]
+
+            # Do the feeding
+            # feed the animals
+            (
+                feed_available_this_month,
+                grass_available_this_month,
+            ) = AnimalPopulation.feed_animals(
+                all_animals,
+                ruminants,
+                feed_available_this_month,
+                grass_available_this_month,
+            )
+            AnimalPopulation.calculate_starving_animals_after_feed(all_animals)
+            if profile:
+                AnimalModelProfiler.add(country_code, "feed_animals", start)
+                start = AnimalModelProfiler.start()
+
+            # update the feed and grass objects with the amount used
+            # @MORGAN TODO:, I couldn't work out how to assign the values to the feed_used object without doing this
+            # (breaking it out in to kcals)
+            feed_used.kcals[month] = (
+                available_feed.kcals[month] - feed_available_this_month.kcals
+            )
+            grass_used.kcals[month] = (
+                available_grass.kcals[month] - grass_available_this_month.kcals
+            )
 
-        # This resets hours each size animal category has available for slaughter each month
-        # to the total hours available in baseline and scaled by change_in_slaughter_rate.
-        hours_by_size_dict = calculate_net_slaughter_hours_by_size(all_animals)
+            # OKAY SO NOW WE HAVE THE ANIMALS FED, WE NEED TO LOOK AT SLAUGHTERING
+
+            # create a list of transfer populations, based on all the different animal species, use for loop to create a
+            #  dict that can be used to store the transfer populations
+            # important that these are zero as default
+            # resets to zero each month (i.e not cumulative, )
+            transfer_populations = {}
+            births = {}
+            for animal in all_animals:
+                transfer_populations[animal.animal_species] = 0
+
+            #  #### ##### ##### ##### ##### ##### ##### ##### ##### ##### #####
+            # this next loop is run first to populate the birth/retiurement tasnfers.
+            # working out the transfer populations requires the milk animals birt rate / retuirmenet rates
+            # this needs to be done first as the transfer population is used in the next loop
+            # and the next loop will be run in order of slaughter preference, so we can't put the birth rates in there
+            # so the first loop can be run in any order, but the second loop needs to be run in order of slaughter
+            # preference
+            #  #### ##### ##### ##### ##### ##### ##### ##### ##### ##### #####
+            for animal in all_animals:
+                # additive population
+
+                (
+                    new_births,
+                    new_transfer_births,
+                ) = AnimalPopulation.calculate_additive_births(animal, month)
+                # add new population to the animal object
+                births[animal.animal_type] = new_births
+                animal.births_animals_month.append(new_births)
+
+                ADD_TRANSFER_POPULATIONS = True
+                if animal.animal_function == "milk":
+                    if ADD_TRANSFER_POPULATIONS:
+                        transfer_populations[animal.animal_species] = (
+                            animal.retiring_milk_head_monthly() + new_transfer_births
+                        )
+                        animal.transfer_births.append(new_transfer_births)
+
+                    else:
+                        transfer_populations[animal.animal_species] = 0
+                        animal.transfer_births.append(0)
+
+                    animal.retiring_milk_animals.append(
+                        animal.retiring_milk_head_monthly()
+                    )
 
-        for animal in all_animals:
-            assert animal.animal_size in [
-                "small",
-                "medium",
-                "large",
-            ], "ERROR: animals must be small, medium, or large"
-
-            if "milk" not in animal.animal_type:
-                # if not a milk animal add
-                # divide by two as the transfer population is split between meat and milk
-                new_additive_animals_month = (
-                    births[animal.animal_type]
-                    + transfer_populations[animal.animal_species]
-                )
-                animal.transfer_population.append(
-                    transfer_populations[animal.animal_species]
+                    # add to tranfser population
+                    # THIS ISN'T WORKING CHANGED TO FUCNTION, MAYBE GOOD NOW
+            if profile:
+                AnimalModelProfiler.add(
+                    country_code, "calculate_additive_births", start
                 )
+                start = AnimalModelProfiler.start()
+
+            # #### ##### ##### ##### ##### ##### ##### ##### ##### #####
+            # this loop below needs to run in order of species slaughhter prefernce
+            # TODO: what is the order required? provide an option to the user
+            # consider, total feed usage, feed per head, or feed conversion
+            # if we are looking for efficiency feed voncersion  head species
+            # if we are looking for total feed usage, feed usage per head
+            # or maybe feed usage per slaughter hour is the best use?
+            #  #### ##### ##### ##### ##### ##### ##### ##### ##### #####
+
+            # This resets hours each size animal category has available for slaughter each month
+            # to the total hours available in baseline and scaled by change_in_slaughter_rate.
+            hours_by_size_dict = calculate_net_slaughter_hours_by_size(all_animals)
+
+            for animal in all_animals:
+                assert animal.animal_size in [
+                    "small",
+                    "medium",
+                    "large",
+                ], "ERROR: animals must be small, medium, or large"
+
+                if "milk" not in animal.animal_type:
+                    # if not a milk animal add
+                    # divide by two as the transfer population is split between meat and milk
+                    new_additive_animals_month = (
+                        births[animal.animal_type]
+                        + transfer_populations[animal.animal_species]
+                    )
+                    animal.transfer_population.append(
+                        transfer_populations[animal.animal_species]
+                    )
 
-            else:
-                new_additive_animals_month = births[animal.animal_type]
-                animal.transfer_population.append(
-                    -transfer_populations[animal.animal_species]
+                else:
+                    new_additive_animals_month = births[animal.animal_type]
+                    animal.transfer_population.append(
+                        -transfer_populations[animal.animal_species]
+                    )
+
+                # Because we are looping through animal types in descending order of efficiency,
+                # the most efficient will use up as many hours as they can, and if there are any left, those will
+                # be allocated to less efficient animals within the size class
+
+                hours_by_size_dict[animal.animal_size] = (
+                    AnimalPopulation.calculate_change_in_population(
+                        animal,
+                        country_object,
+                        new_additive_animals_month,
+                        hours_by_size_dict[animal.animal_size],
+                    )
+                )
+            if profile:
+                AnimalModelProfiler.add(
+                    country_code, "calculate_change_in_population", start
                 )
 
-            # Because we are looping through animal types in descending order of efficiency,
-            # the most efficient will use up as many hours as they can, and if there are any left, those will
-            # be allocated to less efficient animals within the size class
+            # then new loop... for homekill
+            # reset the homekill hours for the coming month
+            country_object.homekill_hours_budget.append(
+                country_object.homekill_hours_total_month[-1]
+            )
 
-            hours_by_size_dict[animal.animal_size] = (
-                AnimalPopulation.calculate_change_in_population(
+            for animal in all_animals:
+                # NEXT DO POPULATIUON STARVING AFTER SLAUGHTER
+                # AND HOMEKILL
+                # do starving pop minus sluaghtr pop (assume starving animals are preferntially slaughtered i.e food is
+                #  directed to thos not being slaughtered)
+                # HOMEKILL HEALTHY POP = HOMEKILL RATE * NEW POP
+                # OR HOMEKILL HEALTHY POP just equls a demand number not from percentage rate
+
+                # NEW STARVIONG POP = STARVIN POP - #SLAUGHTER POP - HOMEKILL HEALTHY POP
+                # HOMEKILL_STARVING = NEW STARVING POP * HOMEKILL STRVING RATE
+                # OTHER_DEATH_STARVING = (NEW STARVING POP - HOMEKILL_STARVING)* STARVING DEATH RATE (this should be very
+                #  high? 100%? at least leave the option there though)
+                # NEW STARVING POP = NEW STARVING POP - HOMEKILL_STARVING - OTHER_DEATH_STARVING
+                # NEW POP = NEW POP - HOMEKILL_STARVING - OTHER_DEATH_STARVING - HOMEKILL HEALTHY POP
+
+                # note pregant animals have already been calculated in the slaughter loop
+                # this seems realistic tha policy would not flow down to homekill etc.
+                # I'll leave it in there for now, if we want to change it, down the track.
+                # It probably makes zero difference but I haven't tested sensitivity yet
+
+                if profile:
+                    start = AnimalModelProfiler.start()
+                AnimalPopulation.calculate_other_death_homekill_head(
+                    animal, country_object
+                )  # how many of the animals that died due to natural causes (injuries etc.) were butchered and turned in
+                #  to meat?
+                AnimalPopulation.calculate_healthy_homekill_head(
+                    animal, country_object
+                )  # no return, as updates animal object
+                population_starving_post_slaughter_and_healthy_homekill = (
+                    AnimalPopulation.calculate_starving_pop_post_slaughter_healthy_homekill(
+                        animal
+                    )
+                )
+                AnimalPopulation.calculate_starving_homekill_head(
                     animal,
                     country_object,
-                    new_additive_animals_month,
-                    hours_by_size_dict[animal.animal_size],
+                    population_starving_post_slaughter_and_healthy_homekill,
+                )  # this could be a hard limit based on capacity of the homekill system. Could take in to account healthy
+                #  homekill (to see if there is capacity for more)
+                population_starving_post_all_slaughter_homekill = (
+                    AnimalPopulation.calculate_starving_pop_post_all_slaughter_homekill(
+                        animal, population_starving_post_slaughter_and_healthy_homekill
+                    )
                 )
-            )
-
-        # then new loop... for homekill
-        # reset the homekill hours for the coming month
-        country_object.homekill_hours_budget.append(
-            country_object.homekill_hours_total_month[-1]
-        )
-
-        for animal in all_animals:
-            # NEXT DO POPULATIUON STARVING AFTER SLAUGHTER
-            # AND HOMEKILL
-            # do starving pop minus sluaghtr pop (assume starving animals are preferntially slaughtered i.e food is
-            #  directed to thos not being slaughtered)
-            # HOMEKILL HEALTHY POP = HOMEKILL RATE * NEW POP
-            # OR HOMEKILL HEALTHY POP just equls a demand number not from percentage rate
-
-            # NEW STARVIONG POP = STARVIN POP - #SLAUGHTER POP - HOMEKILL HEALTHY POP
-            # HOMEKILL_STARVING = NEW STARVING POP * HOMEKILL STRVING RATE
-            # OTHER_DEATH_STARVING = (NEW STARVING POP - HOMEKILL_STARVING)* STARVING DEATH RATE (this should be very
-            #  high? 100%? at least leave the option there though)
-            # NEW STARVING POP = NEW STARVING POP - HOMEKILL_STARVING - OTHER_DEATH_STARVING
-            # NEW POP = NEW POP - HOMEKILL_STARVING - OTHER_DEATH_STARVING - HOMEKILL HEALTHY POP
-
-            # note pregant animals have already been calculated in the slaughter loop
-            # this seems realistic tha policy would not flow down to homekill etc.
-            # I'll leave it in there for now, if we want to change it, down the track.
-            # It probably makes zero difference but I haven't tested sensitivity yet
-
-            AnimalPopulation.calculate_other_death_homekill_head(
-                animal, country_object
-            )  # how many of the animals that died due to natural causes (injuries etc.) were butchered and turned in
-            #  to meat?
-            AnimalPopulation.calculate_healthy_homekill_head(
-                animal, country_object
-            )  # no return, as updates animal object
-            population_starving_post_slaughter_and_healthy_homekill = (
-                AnimalPopulation.calculate_starving_pop_post_slaughter_healthy_homekill(
-                    animal
+                # the end of this section returns the population of animals that are
+                # starving after all the homekill and slaughtering. This will be used o
+                # calculate the other death from starving
+                if profile:
+                    AnimalModelProfiler.add(country_code, "homekill", start)
+                    start = AnimalModelProfiler.start()
+
+                # OTHER DEATH resulting from starvation of the 'starving' population
+                animal.other_death_starving.append(
+                    AnimalPopulation.calculate_starving_other_death_head(
+                        animal, population_starving_post_all_slaughter_homekill
+                    )
                 )
-            )
-            AnimalPopulation.calculate_starving_homekill_head(
-                animal,
-                country_object,
-                population_starving_post_slaughter_and_healthy_homekill,
-            )  # this could be a hard limit based on capacity of the homekill system. Could take in to account healthy
-            #  homekill (to see if there is capacity for more)
-            population_starving_post_all_slaughter_homekill = (
-                AnimalPopulation.calculate_starving_pop_post_all_slaughter_homekill(
-                    animal, population_starving_post_slaughter_and_healthy_homekill
+
+                animal.other_death_total.append(
+                    animal.other_death_starving[-1]
+                    + animal.other_death_causes_other_than_starving[-1]
                 )
-            )
-            # the end of this section returns the population of animals that are
-            # starving after all the homekill and slaughtering. This will be used o
-            # calculate the other death from starving
-
-            # OTHER DEATH resulting from starvation of the 'starving' population
-            animal.other_death_starving.append(
-                AnimalPopulation.calculate_starving_other_death_head(
-                    animal, population_starving_post_all_slaughter_homekill
+                # reduce pregnant animals by the other death rate (proportional to the population)
+                # only do this if not a baseline scenario
+                # determine if baseline scenario-like from options and absence of starvation
+                if (
+                    animal.reduction_in_animal_breeding == 0
+                    and animal.target_population_fraction == 1
+                    and animal.other_death_starving[-1] < 10
+                ):
+                    # if baseline, then don't reduce the pregnant animals
+                    pass
+                else:
+                    AnimalPopulation.other_death_pregnant_adjustment(animal)
+
+                animal.total_homekill_this_month.append(animal.total_homekill())
+
+                # FINALLY WE CAN Calculate THE NEW POPULATION
+                AnimalPopulation.calculate_final_population(animal)
+                if profile:
+                    AnimalModelProfiler.add(
+                        country_code, "starvation_and_final_population", start
+                    )
+                # next do the other death from starving.
+                # might be zero if all of starving is dead
+
+                # FINALLY, we have it all
+                # New population
+                # animal.slaughter is the professionally slaughtered animals
+                # animal.total_homekill_this_month is the unprofessinlally slaughtered (can apply weighting/wastage factor)
+                # animal.other_death_total is the other death (basically non-recoverable - lost due to sickness/loss - no
+                #  meat from here)
+                #
+
+                # Homekill notes:
+                # homekill healthy is demand driven homekill. This will be higher if the population is despereate. It is a
+                #  'pull factor'
+                # homekill starving is a 'push factor' it's not that the human population desperatly needs the food, but
+                #  the animal has a high chance of dying and it's good to get some meat out of it
+                # important to run the homemkill functions in the right order, as they all draw on the homekill capacity,
+                #  and healthy homekill
+                # should come last (as I think it's sensible to assume people will buthcer sick/dead animals first)
+
+            # and for cleanliness, the population is appended here right at the end
+            if profile:
+                start = AnimalModelProfiler.start()
+            AnimalPopulation.appened_current_populations(all_animals)
+            if profile:
+                AnimalModelProfiler.add(
+                    country_code, "appened_current_populations", start
                 )
-            )
 
-            animal.other_death_total.append(
-                animal.other_death_starving[-1]
-                + animal.other_death_causes_other_than_starving[-1]
-            )
-            # reduce pregnant animals by the other death rate (proportional to the population)
-            # only do this if not a baseline scenario
-            # determine if baseline scenario-like from options and absence of starvation
-            if (
-                animal.reduction_in_animal_breeding == 0
-                and animal.target_population_fraction == 1
-                and animal.other_death_starving[-1] < 10
-            ):
-                # if baseline, then don't reduce the pregnant animals
-                pass
-            else:
-                AnimalPopulation.other_death_pregnant_adjustment(animal)
-
-            animal.total_homekill_this_month.append(animal.total_homekill())
-
-            # FINALLY WE CAN Calculate THE NEW POPULATION
-            AnimalPopulation.calculate_final_population(animal)
-            # next do the other death from starving.
-            # might be zero if all of starving is dead
-
-            # FINALLY, we have it all
-            # New population
-            # animal.slaughter is the professionally slaughtered animals
-            # animal.total_homekill_this_month is the unprofessinlally slaughtered (can apply weighting/wastage factor)
-            # animal.other_death_total is the other death (basically non-recoverable - lost due to sickness/loss - no
-            #  meat from here)
-            #
-
-            # Homekill notes:
-            # homekill healthy is demand driven homekill. This will be higher if the population is despereate. It is a
-            #  'pull factor'
-            # homekill starving is a 'push factor' it's not that the human population desperatly needs the food, but
-            #  the animal has a high chance of dying and it's good to get some meat out of it
-            # important to run the homemkill functions in the right order, as they all draw on the homekill capacity,
-            #  and healthy homekill
-            # should come last (as I think it's sensible to assume people will buthcer sick/dead animals first)
-
-        # and for cleanliness, the population is appended here right at the end
-        AnimalPopulation.appened_current_populations(all_animals)
+        # the histories are returned as arrays, the same as the array engine returns
+        for animal in all_animals:
+            AnimalModelBuilder.histories_to_arrays(animal)
+        country_object.homekill_hours_budget = np.array(
+            country_object.homekill_hours_budget, dtype=float
+        )
 
     # remove first month (as it's just the initial population)
     if remove_first_month == 1:
         for animal in all_animals:
             AnimalModelBuilder.remove_first_month(animal)
 
+    if return_animal_arrays:
+        return all_animals, feed_used, grass_used, animal_arrays
     return all_animals, feed_used, grass_used
 
 
+def main_for_countries(
+    country_codes,
+    available_feeds,
+    available_grasses,
+    scenario,
+    constants_inputs_by_country=None,
+    remove_first_month=0,
+    kcals_per_head_meat_dicts=None,
+):
+    """
+    Runs the animal population model for many countries at once, with the months of
+    all the countries run together by one AnimalPopulationArrays. The results for each
+    country are the same as running main for it.
+
+    Args:
+        country_codes (list): the countries to run
+        available_feeds (list): the feed (a Food) available to each country
+        available_grasses (list): the grass (a Food) available to each country
+        scenario (str): the breeding scenario
+        constants_inputs_by_country (list): the constants_inputs of each country, or
+            None
+        remove_first_month (int): 1 to remove the month zero entries
+        kcals_per_head_meat_dicts (list): the kcals_per_head_meat_dict of each
+            country, or None
+
+    Returns:
+        list: all_animals, feed_used and grass_used of each country, as returned by
+            main
+    """
+    n_countries = len(country_codes)
+    if constants_inputs_by_country is None:
+        constants_inputs_by_country = [None] * n_countries
+    if kcals_per_head_meat_dicts is None:
+        kcals_per_head_meat_dicts = [None] * n_countries
+    assert (
+        len(available_feeds) == n_countries
+        and len(available_grasses) == n_countries
+        and len(constants_inputs_by_country) == n_countries
+        and len(kcals_per_head_meat_dicts) == n_countries
+    ), "ERROR: the inputs of main_for_countries must be given for every country"
+
+    all_animals_by_country = []
+    country_objects = []
+    for country_code, constants_inputs, kcals_per_head_meat_dict in zip(
+        country_codes, constants_inputs_by_country, kcals_per_head_meat_dicts
+    ):
+        all_animals, country_object = create_country_animals(
+            country_code, scenario, constants_inputs, kcals_per_head_meat_dict
+        )
+        all_animals_by_country.append(all_animals)
+        country_objects.append(country_object)
+
+    months_to_run = len(available_feeds[0].kcals)
+    animal_arrays = AnimalPopulationArrays(
+        all_animals_by_country, country_objects, months_to_run
+    )
+    feed_used_by_country, grass_used_by_country = animal_arrays.run(
+        [available_feed.kcals for available_feed in available_feeds],
+        [available_grass.kcals for available_grass in available_grasses],
+    )
+    if AnimalModelProfiler.enabled:
+        start = AnimalModelProfiler.start()
+    animal_arrays.write_to_animals()
+    if AnimalModelProfiler.enabled:
+        AnimalModelProfiler.add(
+            animal_arrays.profiled_countries, "write_to_animals", start
+        )
+
+    results = []
+    for all_animals, feed_used_kcals, grass_used_kcals in zip(
+        all_animals_by_country, feed_used_by_country, grass_used_by_country
+    ):
+        if remove_first_month == 1:
+            for animal in all_animals:
+                AnimalModelBuilder.remove_first_month(animal)
+        results.append((all_animals, Food(feed_used_kcals), Food(grass_used_kcals)))
+    return results
+
+
 def world_test():
     """
     Test the animal population model for the case with full-trade by including worldwide aggregated
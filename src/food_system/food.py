@@ -18,7 +18,10 @@ Created on Tue Jul 19
 """
 import numpy as np
 import copy
-from src.food_system.unit_conversions import UnitConversions
+from src.food_system.unit_conversions import (
+    ConversionsOfCurrentScope,
+    UnitConversions,
+)
 from src.utilities.plotter import Plotter
 
 
@@ -103,8 +106,9 @@ class Food(UnitConversions):
 
     """
 
-    # public property used to convert between units
-    conversions = UnitConversions()
+    # public property used to convert between units: the conversions of the current
+    # conversions_scope, or the conversions shared by the process
+    conversions = ConversionsOfCurrentScope()
 
     @classmethod
     def get_Food_class(cls):
@@ -263,25 +267,26 @@ class Food(UnitConversions):
             #       as a default python list type and then get rid of all the casting to
             #       np arrays in the rest of the code
             self.kcals = np.array(self.kcals)
+            kcals_unit, fat_unit, protein_unit = self.unit_descriptors
             # this is used to set a reasonable default if kcals are supplied but fat and
             # protein are not
-            if "each month" not in self.kcals_units:
-                self.kcals_units = self.kcals_units + " each month"
+            if not kcals_unit.is_each_month:
+                self.kcals_units = kcals_unit.each_month_name
             if isinstance(self.fat, int):
                 self.fat = np.zeros(len(self.kcals))
-                self.fat_units = self.fat_units + " each month"
+                self.fat_units = fat_unit.each_month_name
             else:
                 self.fat = np.array(self.fat)
-                if "each month" not in self.fat_units:
-                    self.fat_units = self.fat_units + " each month"
+                if not fat_unit.is_each_month:
+                    self.fat_units = fat_unit.each_month_name
 
             if isinstance(self.protein, int):
                 self.protein = np.zeros(len(self.kcals))
-                self.protein_units = self.protein_units + " each month"
+                self.protein_units = protein_unit.each_month_name
             else:
                 self.protein = np.array(self.protein)
-                if "each month" not in self.protein_units:
-                    self.protein_units = self.protein_units + " each month"
+                if not protein_unit.is_each_month:
+                    self.protein_units = protein_unit.each_month_name
             self.set_units(
                 self.kcals_units,
                 self.fat_units,
@@ -426,9 +431,10 @@ class Food(UnitConversions):
         # Check if the food object is a list type
         if self.is_list_monthly():
             # Check if the units are set up correctly
-            assert " each month" in self.kcals_units
-            assert " each month" in self.fat_units
-            assert " each month" in self.protein_units
+            kcals_unit, fat_unit, protein_unit = self.unit_descriptors
+            assert kcals_unit.is_each_month
+            assert fat_unit.is_each_month
+            assert protein_unit.is_each_month
 
             # Check if the list type food has the same number of months for all nutrients
             assert (
@@ -1001,9 +1007,7 @@ class Food(UnitConversions):
                     self.kcals * other,
                     self.fat * other,
                     self.protein * other,
-                    self.kcals_units + " each month",
-                    self.fat_units + " each month",
-                    self.protein_units + " each month",
+                    *[unit.each_month_name for unit in self.unit_descriptors],
                 )
 
             # this is a food and other is a non food
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A food with a value of each nutrient for each month, stored in one (nutrients, months)
+numpy array.
+
+A monthly Food keeps its kcals, fat and protein in three separate arrays, and indexing
+it makes a new Food with copies of the values. A FoodArray keeps all the values in one
+array, in the order kcals, fat, protein. Its nutrients and its slices of months are
+views of that array, so reading them copies nothing, and the min, max and sum over the
+nutrients are a single numpy reduction.
+
+FoodArray and Food convert to each other, so the code can use a FoodArray where it
+indexes foods month by month, and keep using Food everywhere else:
+
+    >>> food_array = FoodArray.from_food(food)
+    >>> food_array[6:12].kcals  # a view of the kcals of months 6 to 11
+    >>> food_array.get_min_nutrient_each_month()
+    >>> food_array.to_food()  # a Food with views of the values of food_array
+
+The units of a FoodArray are always units of a list of months (" each month").
+"""
+
+import numpy as np
+
+from src.food_system.food import Food
+from src.food_system.unit_conversions import Unit, UnitConversions
+
+
+class FoodArray(UnitConversions):
+    # the order of the nutrients in the rows of the values
+    NUTRIENT_NAMES = ("kcals", "fat", "protein")
+
+    def __init__(
+        self,
+        values,
+        kcals_units="billion kcals each month",
+        fat_units="thousand tons each month",
+        protein_units="thousand tons each month",
+    ):
+        """
+        Initializes the food with the values of kcals, fat and protein (the rows of
+        values) each month (the columns). A float numpy array is used as it is, without
+        being copied.
+        """
+        super().__init__()
+
+        self.values = np.asarray(values, dtype=float)
+        assert self.values.ndim == 2 and self.values.shape[0] == 3, (
+            "ERROR: the values of a FoodArray must have a row for each of kcals, fat"
+            f" and protein, and a column for each month. shape: {self.values.shape}"
+        )
+
+        self.set_units(kcals_units, fat_units, protein_units)
+        if not all(unit.is_each_month for unit in self.unit_descriptors):
+            self.set_units(
+                *[
+                    unit.name if unit.is_each_month else unit.each_month_name
+                    for unit in self.unit_descriptors
+                ]
+            )
+
+    @property
+    def conversions(self):
+        """
+        The conversions of Food, which also convert the units of a FoodArray
+        """
+        return Food.conversions
+
+    @classmethod
+    def get_conversions(cls):
+        """
+        Returns the conversions object of Food.
+        This method is only used by the parent UnitConversions class.
+        """
+        return Food.conversions
+
+    @classmethod
+    def get_Food_class(cls):
+        """
+        Returns the Food class, which the parent UnitConversions class makes the
+        converted foods with.
+        """
+        return Food
+
+    # the nutrients are views of the rows of the values
+
+    @property
+    def kcals(self):
+        return self.values[0]
+
+    @kcals.setter
+    def kcals(self, kcals):
+        self.values[0] = kcals
+
+    @property
+    def fat(self):
+        return self.values[1]
+
+    @fat.setter
+    def fat(self, fat):
+        self.values[1] = fat
+
+    @property
+    def protein(self):
+        return self.values[2]
+
+    @protein.setter
+    def protein(self, protein):
+        self.values[2] = protein
+
+    @property
+    def NMONTHS(self):
+        return self.values.shape[1]
+
+    def __len__(self):
+        return self.NMONTHS
+
+    # conversion to and from Food
+
+    def from_food(food):
+        """
+        Returns a FoodArray with the values and units of the monthly food.
+
+        Args:
+            food (Food): a food with a value of each nutrient each month
+
+        Returns:
+            FoodArray: a food with a copy of the values of the food
+        """
+        assert (
+            food.is_list_monthly()
+        ), "ERROR: only a food with a value each month can be made into a FoodArray"
+        return FoodArray(
+            np.array([food.kcals, food.fat, food.protein], dtype=float),
+            food.kcals_units,
+            food.fat_units,
+            food.protein_units,
+        )
+
+    def to_food(self):
+        """
+        Returns a Food whose kcals, fat and protein are views of the rows of this food,
+        so changing the values of one changes the other.
+        """
+        food = Food(
+            self.kcals,
+            self.fat,
+            self.protein,
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+
+        # Food copies the nutrients it is made with
+        food.kcals = self.kcals
+        food.fat = self.fat
+        food.protein = self.protein
+        return food
+
+    def as_numpy_array(self):
+        """
+        Returns:
+            numpy.ndarray: the (nutrients, months) array of the values, not a copy.
+        """
+        return self.values
+
+    # months
+
+    def __getitem__(self, key):
+        """
+        Returns the months of the key as a FoodArray, or as a Food if the key is a single
+        month (see get_month).
+
+        A slice of months is a view of the values of this food, so the months are not
+        copied, and changing them changes this food.
+
+        Args:
+            key (int or slice): the index of a month, or a range of months
+
+        Returns:
+            FoodArray or Food: the months of the food
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.get_month(key)
+
+        return FoodArray(
+            self.values[:, key],
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+
+    def __setitem__(self, key, value):
+        """
+        Assigns the nutrients of the food (Food or FoodArray) to the months of the key.
+        """
+        assert isinstance(
+            value, (Food, FoodArray)
+        ), "ERROR: assigned value must be a Food or a FoodArray"
+        self.values[0, key] = value.kcals
+        self.values[1, key] = value.fat
+        self.values[2, key] = value.protein
+
+    def get_month(self, index):
+        """
+        Returns the nutrients of the month as a Food, with the units of a single month
+        (" per month").
+
+        Args:
+            index (int): the index of the month
+
+        Returns:
+            Food: the nutrients of the month
+        """
+        kcals, fat, protein = self.values[:, index].tolist()
+        food_at_month = Food(
+            kcals,
+            fat,
+            protein,
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+        food_at_month.set_units_from_list_to_element()
+        return food_at_month
+
+    # reductions over the nutrients and over the months
+
+    def get_included_nutrients(self):
+        """
+        Returns the rows of the nutrients that are included in the nutrition
+        requirements: kcals, and fat and protein if they are included.
+        """
+        included_nutrients = [0]
+        if self.conversions.include_fat:
+            included_nutrients.append(1)
+        if self.conversions.include_protein:
+            included_nutrients.append(2)
+        return included_nutrients
+
+    def get_included_values(self):
+        """
+        Returns the (nutrients, months) values of the included nutrients, after checking
+        the nutrients can be compared.
+        """
+        assert (
+            self.kcals_units == self.fat_units == self.protein_units
+        ), "ERROR: nutrients with different units cannot be compared"
+
+        included_nutrients = self.get_included_nutrients()
+        if len(included_nutrients) == 3:
+            return self.values
+        return self.values[included_nutrients]
+
+    def get_min_nutrient_each_month(self):
+        """
+        Returns:
+            numpy.ndarray: the smallest value of the included nutrients each month
+        """
+        return self.get_included_values().min(axis=0)
+
+    def get_max_nutrient_each_month(self):
+        """
+        Returns:
+            numpy.ndarray: the largest value of the included nutrients each month
+        """
+        return self.get_included_values().max(axis=0)
+
+    def get_sum_of_nutrients_each_month(self):
+        """
+        Returns:
+            numpy.ndarray: the sum of the values of the included nutrients each month
+        """
+        return self.get_included_values().sum(axis=0)
+
+    def get_min_nutrient(self):
+        """
+        Returns the name and value of the smallest included nutrient of any month, as
+        Food.get_min_nutrient does for a monthly food.
+
+        Returns:
+            tuple: the name and the value of the minimum nutrient
+        """
+        min_of_each_nutrient = self.get_included_values().min(axis=1)
+        row = int(np.argmin(min_of_each_nutrient))
+        nutrient = self.get_included_nutrients()[row]
+        return (self.NUTRIENT_NAMES[nutrient], min_of_each_nutrient[row])
+
+    def get_nutrients_sum(self):
+        """
+        Sums up each nutrient over all the months, as Food.get_nutrients_sum does.
+
+        Returns:
+            Food: the total of each nutrient, with the units of a total
+        """
+        kcals, fat, protein = self.values.sum(axis=1).tolist()
+        food_sum = Food(
+            kcals,
+            fat,
+            protein,
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+        food_sum.set_units_from_list_to_total()
+        return food_sum
+
+    # arithmetic
+
+    def get_values_of(self, other):
+        """
+        Returns the values of the other food (Food or FoodArray) as a (nutrients, months)
+        array, after checking the units of the foods are the same.
+        """
+        assert self.units == other.units, "ERROR: combining foods with different units!"
+        if isinstance(other, FoodArray):
+            return other.values
+        return np.array([other.kcals, other.fat, other.protein], dtype=float)
+
+    def __add__(self, other):
+        """
+        Adds a Food or FoodArray with the same units, and returns a new FoodArray.
+        """
+        return FoodArray(
+            self.values + self.get_values_of(other),
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+
+    def __sub__(self, other):
+        """
+        Subtracts a Food or FoodArray with the same units, and returns a new FoodArray.
+        """
+        return FoodArray(
+            self.values - self.get_values_of(other),
+            self.kcals_units,
+            self.fat_units,
+            self.protein_units,
+        )
+
+    def min_elementwise(food1, food2):
+        """
+        Returns a FoodArray with the smaller value of each nutrient each month of the
+        two foods (Food or FoodArray, with the same units).
+        """
+        return FoodArray(
+            np.minimum(food1.values, food1.get_values_of(food2)),
+            food1.kcals_units,
+            food1.fat_units,
+            food1.protein_units,
+        )
+
+    def in_units(self, to_units_kcals, to_units_fat, to_units_protein):
+        """
+        Returns the food converted to the units (each month), as a FoodArray.
+        """
+        to_units = [
+            unit.name if unit.is_each_month else unit.each_month_name
+            for unit in Unit.get_nutrient_units(
+                to_units_kcals, to_units_fat, to_units_protein
+            )
+        ]
+        conversion = self.get_conversion(self.units, *to_units)
+        return FoodArray(np.array(conversion)[:, np.newaxis] * self.values, *to_units)
+
+    # comparison and printing
+
+    def __eq__(self, other):
+        """
+        A FoodArray equals a Food or FoodArray with the same units and values.
+        """
+        if not isinstance(other, (Food, FoodArray)) or self.units != other.units:
+            return False
+        return np.array_equal(self.values, self.get_values_of(other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return (
+            f"    kcals: {self.kcals} {self.kcals_units}\n"
+            f"    fat: {self.fat} {self.fat_units}\n"
+            f"    protein: {self.protein} {self.protein_units}"
+        )
@@ -14,6 +14,8 @@ Created on Tue Jul 19
 
 @author: morgan
 """
+import contextlib
+import contextvars
 import os
 import sys
 
@@ -22,6 +24,65 @@ if module_path not in sys.path:
     sys.path.append(module_path)
 
 
+class Unit:
+    """
+    A unit of a nutrient, such as "billion kcals each month", parsed once.
+
+    There is only one Unit with each name (see Unit.get), which knows whether it is a
+    ratio, a percent, a list of months ("each month") or a single month ("per month"),
+    and the names of the same unit for a list of months, a single month, and the total
+    of all the months. The names are interned, so comparing the units of two foods
+    usually only compares the identity of the strings.
+    """
+
+    # every unit parsed so far, by name
+    interned = {}
+
+    # the units of the kcals, fat and protein of foods, by their names
+    interned_nutrient_units = {}
+
+    def __init__(self, name):
+        self.name = sys.intern(name)
+
+        self.is_each_month = " each month" in name
+        self.is_per_month = " per month" in name
+        self.is_ratio = "ratio" in name
+        self.is_percent = "percent" in name
+
+        # the unit for a list of months, and for a single month
+        self.each_month_name = sys.intern(name + " each month")
+        self.per_month_name = sys.intern(name + " per month")
+
+        # the unit for one of the months of a list of months, and for the sum of them
+        self.element_name = sys.intern(name.replace(" each month", " per month"))
+        self.total_name = sys.intern(name.split(" each month")[0])
+
+    def __reduce__(self):
+        # copies and unpickled units are the interned unit of the same name
+        return (Unit.get, (self.name,))
+
+    def get(name):
+        """
+        Returns the Unit with the name, parsing the name the first time it is used.
+        """
+        unit = Unit.interned.get(name)
+        if unit is None:
+            unit = Unit(name)
+            Unit.interned[unit.name] = unit
+        return unit
+
+    def get_nutrient_units(kcals_units, fat_units, protein_units):
+        """
+        Returns the Units of the kcals, fat and protein of a food as a tuple.
+        """
+        names = (kcals_units, fat_units, protein_units)
+        nutrient_units = Unit.interned_nutrient_units.get(names)
+        if nutrient_units is None:
+            nutrient_units = tuple(Unit.get(name) for name in names)
+            Unit.interned_nutrient_units[names] = nutrient_units
+        return nutrient_units
+
+
 class UnitConversions:
     """
     This class is used to convert units of nutrients
@@ -56,7 +117,31 @@ class UnitConversions:
         So, running get_conversions() (the class function to get the conversions object
         in the child food class), this will obtain all the conversion data instantiated
         through the Food class.
+
+        The conversion factors between units are cached (see get_conversion), and the
+        cache is only emptied when the nutrition requirements or population change.
         """
+        nutrition_state = (
+            kcals_daily,
+            fat_daily,
+            protein_daily,
+            include_fat,
+            include_protein,
+            population,
+        )
+        if not self.NUTRITION_PROPERTIES_ASSIGNED:
+            # counted over every nutrition requirement set, for profiling
+            self.conversion_cache_hits = 0
+            self.conversion_cache_misses = 0
+        if (
+            not self.NUTRITION_PROPERTIES_ASSIGNED
+            or nutrition_state != self.nutrition_state
+        ):
+            self.nutrition_state = nutrition_state
+            # the kcals, fat and protein multiplier dictionaries, made when first used
+            self.multiplier_tables = None
+            # the conversion factors from one triplet of units to another
+            self.conversion_factors = {}
 
         self.days_in_month = 30
 
@@ -93,112 +178,85 @@ class UnitConversions:
         """
         gets the units so that they reflect that of a single month
         """
-        # Make sure this only happens for monthly food
-        assert "each month" in self.kcals_units
-        assert "each month" in self.fat_units
-        assert "each month" in self.protein_units
+        kcals_unit, fat_unit, protein_unit = self.get_unit_descriptors()
 
-        # remove the " each month" part of the units
-        kcals_units = self.kcals_units.split(" each month")[0]
-
-        # remove the " each month" part of the units
-        fat_units = self.fat_units.split(" each month")[0]
+        # Make sure this only happens for monthly food
+        assert kcals_unit.is_each_month
+        assert fat_unit.is_each_month
+        assert protein_unit.is_each_month
 
         # remove the " each month" part of the units
-        protein_units = self.protein_units.split(" each month")[0]
-
-        return [kcals_units, fat_units, protein_units]
+        return [kcals_unit.total_name, fat_unit.total_name, protein_unit.total_name]
 
     def set_units_from_list_to_total(self):
         """
         sets the units so that they reflect that of a single month
         """
-        # Make sure this only happens for monthly food
-        assert "each month" in self.kcals_units
-        assert "each month" in self.fat_units
-        assert "each month" in self.protein_units
         # remove the " each month" part of the units
-        [
-            self.kcals_units,
-            self.fat_units,
-            self.protein_units,
-        ] = self.get_units_from_list_to_total()
-
-        self.units = [self.kcals_units, self.fat_units, self.protein_units]
+        self.set_units(*self.get_units_from_list_to_total())
 
     def get_units_from_list_to_element(self):
         """
         gets the units so that they reflect that of a single month
         """
-        # Make sure this only happens for monthly food
-        assert "each month" in self.kcals_units
-        assert "each month" in self.fat_units
-        assert "each month" in self.protein_units
+        kcals_unit, fat_unit, protein_unit = self.get_unit_descriptors()
 
-        # replace the " each month" part of the units with "per month"
-        kcals_units = self.kcals_units.replace(" each month", " per month")
-
-        # replace the " each month" part of the units with "per month"
-        fat_units = self.fat_units.replace(" each month", " per month")
+        # Make sure this only happens for monthly food
+        assert kcals_unit.is_each_month
+        assert fat_unit.is_each_month
+        assert protein_unit.is_each_month
 
         # replace the " each month" part of the units with "per month"
-        protein_units = self.protein_units.replace(" each month", " per month")
-
-        return [kcals_units, fat_units, protein_units]
+        return [
+            kcals_unit.element_name,
+            fat_unit.element_name,
+            protein_unit.element_name,
+        ]
 
     def set_units_from_list_to_element(self):
         """
         sets the units so that they reflect that of a single month
         """
-        # Make sure this only happens for monthly food
-        assert "each month" in self.kcals_units
-        assert "each month" in self.fat_units
-        assert "each month" in self.protein_units
-        [
-            self.kcals_units,
-            self.fat_units,
-            self.protein_units,
-        ] = self.get_units_from_list_to_element()
+        self.set_units(*self.get_units_from_list_to_element())
 
     def get_units_from_element_to_list(self):
         """
         gets the units so that they reflect that of a list of months
         """
-        assert "each month" not in self.kcals_units
-        assert "each month" not in self.fat_units
-        assert "each month" not in self.protein_units
+        kcals_unit, fat_unit, protein_unit = self.get_unit_descriptors()
 
-        # add " each month" to units to signify a food list
-        kcals_units = self.kcals_units + " each month"
-
-        # add " each month" to units to signify a food list
-        fat_units = self.fat_units + " each month"
+        assert not kcals_unit.is_each_month
+        assert not fat_unit.is_each_month
+        assert not protein_unit.is_each_month
 
         # add " each month" to units to signify a food list
-        protein_units = self.protein_units + " each month"
-
-        return [kcals_units, fat_units, protein_units]
+        return [
+            kcals_unit.each_month_name,
+            fat_unit.each_month_name,
+            protein_unit.each_month_name,
+        ]
 
     def set_units_from_element_to_list(self):
         """
         sets the units so that they reflect that of a list of months
         """
-        assert "each month" not in self.kcals_units
-        assert "each month" not in self.fat_units
-        assert "each month" not in self.protein_units
-        [
-            self.kcals_units,
-            self.fat_units,
-            self.protein_units,
-        ] = self.get_units_from_element_to_list()
+        self.set_units(*self.get_units_from_element_to_list())
 
     def get_units(self):
         """
         update and return the unit values as a 3 element array
         """
-        self.units = [self.kcals_units, self.fat_units, self.protein_units]
+        self.set_units(self.kcals_units, self.fat_units, self.protein_units)
         return self.units
 
+    def get_unit_descriptors(self):
+        """
+        Returns the parsed Unit of each nutrient of the food
+        """
+        return Unit.get_nutrient_units(
+            self.kcals_units, self.fat_units, self.protein_units
+        )
+
     def set_units(self, kcals_units, fat_units, protein_units):
         """
         Sets the units of the food (for example, billion_kcals,thousand_tons, dry
@@ -209,11 +267,15 @@ class UnitConversions:
 
         """
         # Make sure this can only happen for monthly food if "each month" is in the units
-        self.kcals_units = kcals_units
-        self.fat_units = fat_units
-        self.protein_units = protein_units
+        self.unit_descriptors = Unit.get_nutrient_units(
+            kcals_units, fat_units, protein_units
+        )
+        kcals_unit, fat_unit, protein_unit = self.unit_descriptors
+        self.kcals_units = kcals_unit.name
+        self.fat_units = fat_unit.name
+        self.protein_units = protein_unit.name
 
-        self.units = [kcals_units, fat_units, protein_units]
+        self.units = [self.kcals_units, self.fat_units, self.protein_units]
 
     # examine properties of units
 
@@ -232,27 +294,15 @@ class UnitConversions:
         Returns if units are all "ratio" type
         """
 
-        if (
-            "ratio" in self.kcals_units
-            and "ratio" in self.fat_units
-            and "ratio" in self.protein_units
-        ):
-            return True
-        else:
-            return False
+        kcals_unit, fat_unit, protein_unit = self.unit_descriptors
+        return kcals_unit.is_ratio and fat_unit.is_ratio and protein_unit.is_ratio
 
     def is_units_percent(self):
         """
         Returns if units are all "percent" type
         """
-        if (
-            "percent" in self.kcals_units
-            and "percent" in self.fat_units
-            and "percent" in self.protein_units
-        ):
-            return True
-        else:
-            return False
+        kcals_unit, fat_unit, protein_unit = self.unit_descriptors
+        return kcals_unit.is_percent and fat_unit.is_percent and protein_unit.is_percent
 
     # CONVERSIONS BETWEEN UNITS
 
@@ -471,19 +521,42 @@ class UnitConversions:
             * percent_protein_to_grams_per_day,
         }
 
-    def get_unit_multipliers_from_billion_kcals_thou_tons_thou_tons(self, units):
+    def get_multiplier_tables(self):
+        """
+        Returns the kcals, fat and protein multiplier dictionaries, from the nutrition
+        requirements currently set. They are made once for each nutrition requirement.
+        """
+        conversions = self.get_conversions()
+        if conversions.multiplier_tables is None:
+            conversions.multiplier_tables = [
+                self.get_kcal_multipliers(),
+                self.get_fat_multipliers(),
+                self.get_protein_multipliers(),
+            ]
+        return conversions.multiplier_tables
+
+    def get_unit_multipliers_from_billion_kcals_thou_tons_thou_tons(
+        self, units, multiplier_tables=None
+    ):
         """
         First, check if the unit is a known conversion.
 
         Then, returns the conversion value to get from billion kcals, thousand tons fat, thousand tons protein, to
         whatever units are specified in "units" triplet argument. units[0] is kcals units, units[1] is fat units,
         units[2] is protein units.
+
+        The multiplier dictionaries can be passed in as multiplier_tables (see get_multiplier_tables), so that they
+        are made once when looking up several units.
         """
         # the unit_multiplier refers to the fraction that the ratio this unit takes relative to the units billion
         # kcals, thousand tons fat, thousand tons protein.
-        unit_multiplier_kcals = self.get_kcal_multipliers()
-        unit_multiplier_fat = self.get_fat_multipliers()
-        unit_multiplier_protein = self.get_protein_multipliers()
+        if multiplier_tables is None:
+            multiplier_tables = self.get_multiplier_tables()
+        (
+            unit_multiplier_kcals,
+            unit_multiplier_fat,
+            unit_multiplier_protein,
+        ) = multiplier_tables
 
         if units[0] not in unit_multiplier_kcals.keys():
             assert False, (
@@ -512,14 +585,26 @@ class UnitConversions:
         billion kcals, thousand tons fat, thousand tons protein, by dividing the given value by the unit_multiplier
         dictionary value. We then convert back to the to_units by multiplying by the to_unit dictionary value.
 
+        The conversion factors are cached until the nutrition requirements change. The hits and misses of the cache
+        are counted for profiling (see get_conversion_cache_counts).
         """
-
+        conversions = self.get_conversions()
+        key = (*from_units, to_units_kcals, to_units_fat, to_units_protein)
+        conversion = conversions.conversion_factors.get(key)
+        if conversion is not None:
+            conversions.conversion_cache_hits += 1
+            return list(conversion)
+        conversions.conversion_cache_misses += 1
+
+        multiplier_tables = self.get_multiplier_tables()
         from_unit_multiplier = (
-            self.get_unit_multipliers_from_billion_kcals_thou_tons_thou_tons(from_units)
+            self.get_unit_multipliers_from_billion_kcals_thou_tons_thou_tons(
+                from_units, multiplier_tables
+            )
         )
         to_unit_multiplier = (
             self.get_unit_multipliers_from_billion_kcals_thou_tons_thou_tons(
-                [to_units_kcals, to_units_fat, to_units_protein]
+                [to_units_kcals, to_units_fat, to_units_protein], multiplier_tables
             )
         )
 
@@ -527,51 +612,49 @@ class UnitConversions:
         fat_conversion = 1 / from_unit_multiplier[1] * to_unit_multiplier[1]
         protein_conversion = 1 / from_unit_multiplier[2] * to_unit_multiplier[2]
 
+        conversions.conversion_factors[key] = (
+            kcals_conversion,
+            fat_conversion,
+            protein_conversion,
+        )
         return [kcals_conversion, fat_conversion, protein_conversion]
 
+    def get_conversion_cache_counts(self):
+        """
+        Returns the number of conversions between units that were found in the cache
+        (hits) and that had to be calculated (misses), and the number of conversions in
+        the cache. Run from the conversions object, for example:
+
+            Food.conversions.get_conversion_cache_counts()
+        """
+        return {
+            "hits": self.conversion_cache_hits,
+            "misses": self.conversion_cache_misses,
+            "size": len(self.conversion_factors),
+        }
+
     def in_units(self, to_units_kcals, to_units_fat, to_units_protein):
         from_units = self.units
+        to_units = Unit.get_nutrient_units(
+            to_units_kcals, to_units_fat, to_units_protein
+        )
 
-        if " each month" in from_units[0]:
-            new_units_kcals = to_units_kcals + " each month"
-            new_units_fat = to_units_fat + " each month"
-            new_units_protein = to_units_protein + " each month"
-
-            [
-                kcals_conversion,
-                fat_conversion,
-                protein_conversion,
-            ] = self.get_conversion(
-                from_units, new_units_kcals, new_units_fat, new_units_protein
-            )
-
-        elif " per month" in from_units[0]:
-            new_units_kcals = to_units_kcals + " per month"
-            new_units_fat = to_units_fat + " per month"
-            new_units_protein = to_units_protein + " per month"
-
-            [
-                kcals_conversion,
-                fat_conversion,
-                protein_conversion,
-            ] = self.get_conversion(
-                from_units,
-                to_units_kcals + " per month",
-                to_units_fat + " per month",
-                to_units_protein + " per month",
-            )
+        # the new units are a list of months or a single month, as the units were
+        if self.unit_descriptors[0].is_each_month:
+            new_units = [unit.each_month_name for unit in to_units]
+        elif self.unit_descriptors[0].is_per_month:
+            new_units = [unit.per_month_name for unit in to_units]
         else:
-            new_units_kcals = to_units_kcals
-            new_units_fat = to_units_fat
-            new_units_protein = to_units_protein
-
-            [
-                kcals_conversion,
-                fat_conversion,
-                protein_conversion,
-            ] = self.get_conversion(
-                from_units, to_units_kcals, to_units_fat, to_units_protein
-            )
+            new_units = [unit.name for unit in to_units]
+        new_units_kcals, new_units_fat, new_units_protein = new_units
+
+        [
+            kcals_conversion,
+            fat_conversion,
+            protein_conversion,
+        ] = self.get_conversion(
+            from_units, new_units_kcals, new_units_fat, new_units_protein
+        )
 
         Food = self.get_Food_class()
 
@@ -583,3 +666,50 @@ class UnitConversions:
             fat_units=new_units_fat,
             protein_units=new_units_protein,
         )
+
+
+# The conversions set by conversions_scope for the current thread or asyncio task, if
+# any. Each thread starts with none set, and each asyncio task with those of the code
+# which created it.
+current_conversions = contextvars.ContextVar("current_conversions", default=None)
+
+
+class ConversionsOfCurrentScope:
+    """
+    The conversions property of Food. Reading Food.conversions returns the conversions
+    of the current conversions_scope, or the conversions shared by the whole process
+    when no scope is open, so code which sets Food.conversions and converts units
+    works the same in and out of a scope.
+    """
+
+    def __init__(self):
+        self.shared_conversions = UnitConversions()
+
+    def __get__(self, instance, owner):
+        conversions = current_conversions.get()
+        if conversions is None:
+            return self.shared_conversions
+        return conversions
+
+
+@contextlib.contextmanager
+def conversions_scope(conversions=None):
+    """
+    Within the with block, Food.conversions is the given UnitConversions (or a new one)
+    for this thread or asyncio task only. This lets the foods of many countries be
+    converted at the same time, each with its own nutrition requirements and
+    population, for example:
+
+        with conversions_scope() as conversions:
+            conversions.set_nutrition_requirements(...)
+            food.in_units_percent_fed()
+
+    Scopes can be nested, and the previous conversions are used again after the block.
+    """
+    if conversions is None:
+        conversions = UnitConversions()
+    token = current_conversions.set(conversions)
+    try:
+        yield conversions
+    finally:
+        current_conversions.reset(token)
@@ -24,19 +24,32 @@ class Extractor:
         """
         self.constants = constants
 
-    def extract_results(self, model, variables, time_consts):
+    def extract_results(self, model, variables, time_consts, solution=None):
         """
         Extracts the results from the model and stores them in the Extractor object.
         Args:
             model (pysd.PySD): the PySD model object
             variables (dict): a dictionary of model variables
             time_consts (dict): a dictionary of time constants
+            solution (dict): the values of the modeled variables from
+                Optimizer.get_solution, as arrays with one value per month. If not
+                given, they are read from the variables.
         Returns:
             Extractor: the Extractor object with the extracted results stored in its attributes
         """
+        if solution is None:
+            solution = {
+                key: np.array([variable.varValue for variable in value], dtype=float)
+                for key, value in variables.items()
+                if isinstance(value, list)
+                and isinstance(value[0], pulp.pulp.LpVariable)
+            }
+        # from here on, each modeled variable is an array of its values each month,
+        # and a variable that was not modeled is still a list of zeros
+        variables = {**variables, **solution}
 
         # extract the objective optimization results
-        self.get_objective_optimization_results(model)
+        self.get_objective_optimization_results(variables)
 
         # extract the nonhuman consumption time constant
         self.nonhuman_consumption = time_consts["nonhuman_consumption"]
@@ -140,11 +153,15 @@ class Extractor:
         """
         Converts a list of variables to a monthly list of values.
         Args:
-            variables (list): A list of variables to be converted.
+            variables (list or np.array): A list of variables to be converted, or an
+                array of their values.
             conversion (float): A conversion factor to be applied to each variable.
         Returns:
             np.array: A numpy array of the converted monthly values.
         """
+        if isinstance(variables, np.ndarray):
+            return variables * conversion
+
         variable_output = []
 
         # Check if the variable was not modeled
@@ -181,43 +198,24 @@ class Extractor:
         attributed to the eating of stored up crops.
 
         Args:
-            - crops_food_eaten: list of the amount of crops eaten each month
+            - crops_food_eaten: array of the amount of crops eaten each month
             - crops_kcals_produced: list of the amount of crop production (kcals) each month
             - conversion: conversion factor from kcals to another unit of measurement
 
         Returns:
-            - A list of two lists:
-                - The first list contains the amount of outdoor crop production (converted to the specified
+            - A list of two arrays:
+                - The first contains the amount of outdoor crop production (converted to the specified
                 unit of measurement) that is immediately eaten each month.
-                - The second list contains the amount of outdoor crop production (converted to the specified
+                - The second contains the amount of outdoor crop production (converted to the specified
                 unit of measurement) that is stored for later consumption each month.
         """
+        nmonths = self.constants["NMONTHS"]
+        cf_produced = np.asarray(crops_kcals_produced, dtype=float)[:nmonths]
+        cf_eaten = crops_food_eaten[:nmonths]
 
-        immediately_eaten_output = []
-        new_stored_eaten_output = []
-        cf_produced_output = []
-        for month in range(0, self.constants["NMONTHS"]):
-            cf_produced = crops_kcals_produced[month]
-            cf_produced_output.append(cf_produced)
-            # print("")
-            # print("cf_produced")
-            # print(cf_produced)
-            cf_eaten = crops_food_eaten[month].varValue
-            # print("cf_eaten")
-            # print(cf_eaten)
-
-            if cf_produced <= cf_eaten:
-                immediately_eaten = cf_produced
-                new_stored_crops_eaten = cf_eaten - cf_produced
-            else:
-                immediately_eaten = cf_eaten
-                new_stored_crops_eaten = 0
-            # print("immediately_eaten")
-            # print(immediately_eaten)
-            # print("new_stored_crops_eaten")
-            # print(new_stored_crops_eaten)
-            immediately_eaten_output.append(immediately_eaten * conversion)
-            new_stored_eaten_output.append(new_stored_crops_eaten * conversion)
+        # whatever is eaten beyond this month's production comes from stored crops
+        immediately_eaten_output = np.minimum(cf_produced, cf_eaten) * conversion
+        new_stored_eaten_output = np.maximum(cf_eaten - cf_produced, 0) * conversion
 
         # import matplotlib.pyplot as plt
 
@@ -352,7 +350,7 @@ class Extractor:
 
         """
         if (
-            not isinstance(crops_food_to_humans[0], pulp.pulp.LpVariable)
+            not isinstance(crops_food_to_humans, np.ndarray)
             and sum(crops_food_to_humans) == 0
         ):
             # if ADD_OUTDOOR_CROPS is false, handle this edgecase
@@ -398,7 +396,7 @@ class Extractor:
         )
 
         if (
-            not isinstance(crops_food_to_humans[0], pulp.pulp.LpVariable)
+            not isinstance(crops_food_to_humans, np.ndarray)
             and sum(crops_food_to_humans) == 0
         ):
             # if ADD_OUTDOOR_CROPS is false, handle this edgecase
@@ -411,7 +409,7 @@ class Extractor:
                 protein_units="billion people fed each month",
             )
         if (
-            not isinstance(crops_food_to_humans[0], pulp.pulp.LpVariable)
+            not isinstance(crops_food_to_humans, np.ndarray)
             and sum(crops_food_to_humans) == 0
             and np.sum(to_humans_outdoor_crop_production) == 0
         ):
@@ -491,10 +489,9 @@ class Extractor:
             + np.array(billions_fed_new_stored_outdoor_crops_kcals)
             - np.array(self.outdoor_crops_to_humans.kcals)
         )
-        for element in difference:
-            assert np.isclose(
-                element, 0, atol=1e-3
-            ), """ERROR: Immediate and new stored sources do not add up to the input of outdoor crop for humans"""
+        assert np.all(
+            np.isclose(difference, 0, atol=1e-3)
+        ), """ERROR: Immediate and new stored sources do not add up to the input of outdoor crop for humans"""
 
     def set_new_stored_outdoor_crops_values(
         self, billions_fed_new_stored_outdoor_crops_kcals
@@ -688,67 +685,23 @@ class Extractor:
     # are not exhausted, and the model will not be able to solve if the usage from
     # biofuels and feed are more than the available stored food and outdoor crop production.
 
-    def get_objective_optimization_results(self, model):
+    def get_objective_optimization_results(self, variables):
         """
         This function extracts the optimization results for the objective function of the model.
         Args:
             self: instance of the Extractor class
-            model: the optimization model to extract results from
+            variables: the values of the model variables, as arrays for the modeled ones
         Returns:
             tuple: a tuple containing the optimization results for consumed_kcals, consumed_fat, and consumed_protein
+                (empty if they were not modeled)
         """
-
-        # Initialize empty lists to store the optimization results
-        consumed_kcals = []
-        consumed_fat = []
-        consumed_protein = []
-        order_kcals = []
-        order_fat = []
-        order_protein = []
-
-        # Loop through all variables in the model
-        for var in model.variables():
-            # Check if the variable is related to consumed kcals
-            if "Humans_Fed_Kcals_" in var.name:
-                # Append the optimization result to the consumed_kcals list
-                consumed_kcals.append(var.value() / 100 * self.constants["POP"] / 1e9)
-                # Extract the order of the variable and append it to the order_kcals list
-                order_kcals.append(
-                    int(var.name[len("Humans_Fed_Kcals_") :].split("_")[0])
-                )
-
-            # Check if the variable is related to consumed fat
-            if "Humans_Fed_Fat_" in var.name:
-                # Append the optimization result to the consumed_fat list
-                consumed_fat.append(var.value() / 100 * self.constants["POP"] / 1e9)
-                # Extract the order of the variable and append it to the order_fat list
-                order_fat.append(int(var.name[len("Humans_Fed_Fat_") :].split("_")[0]))
-
-            # Check if the variable is related to consumed protein
-            if "Humans_Fed_Protein_" in var.name:
-                # Append the optimization result to the consumed_protein list
-                consumed_protein.append(var.value() / 100 * self.constants["POP"] / 1e9)
-                # Extract the order of the variable and append it to the order_protein list
-                order_protein.append(
-                    int(var.name[len("Humans_Fed_Protein_") :].split("_")[0])
-                )
-
-        # Sort the lists based on the order of the variables
-        zipped_lists = zip(order_kcals, consumed_kcals)
-        sorted_zipped_lists = sorted(zipped_lists)
-        consumed_kcals_optimizer = [element for _, element in sorted_zipped_lists]
-
-        zipped_lists = zip(order_fat, consumed_fat)
-        sorted_zipped_lists = sorted(zipped_lists)
-        consumed_fat_optimizer = [element for _, element in sorted_zipped_lists]
-
-        zipped_lists = zip(order_protein, consumed_protein)
-        sorted_zipped_lists = sorted(zipped_lists)
-        consumed_protein_optimizer = [element for _, element in sorted_zipped_lists]
+        results = []
+        for key in ["consumed_kcals", "consumed_fat", "consumed_protein"]:
+            if isinstance(variables[key], np.ndarray):
+                # convert from percent fed to billions of people fed
+                results.append(variables[key] / 100 * self.constants["POP"] / 1e9)
+            else:
+                results.append([])
 
         # Return the optimization results as a tuple
-        return (
-            consumed_kcals_optimizer,
-            consumed_fat_optimizer,
-            consumed_protein_optimizer,
-        )
+        return tuple(results)
@@ -0,0 +1,258 @@
+"""
+The food that each food source provides to humans in many countries, as one
+(countries, food sources, nutrients, months) numpy array.
+
+The tensor is made from the interpreted results of the countries (see
+Interpreter.sum_many_results_together). It converts the food of each country from
+percent of the country's people fed to billion kcals and thousand tons of fat and
+protein, so the food of different countries can be added up. Scaling each country so it
+feeds at most 100% of its people, weighting by population, and adding up the world are
+each a single numpy operation, and the food of each country can still be looked up
+afterwards:
+
+    >>> food_tensor = FoodTensor.from_interpreters(many_results)
+    >>> food_tensor.get_capped_at_100_percent().get_world_food("fish")
+    >>> food_tensor.get_country_food("ARG")["meat"]
+"""
+
+import numpy as np
+
+from src.food_system.food_array import FoodArray
+from src.food_system.unit_conversions import conversions_scope
+
+
+class FoodTensor:
+    # the food sources eaten by humans, by the names of their interpreted results
+    FOOD_SOURCES = (
+        "fish",
+        "cell_sugar",
+        "scp",
+        "greenhouse",
+        "seaweed",
+        "milk",
+        "meat",
+        "immediate_outdoor_crops",
+        "new_stored_outdoor_crops",
+        "stored_food",
+    )
+
+    # the food sources which are added to the model by each constant
+    ADD_CONSTANTS = (
+        "ADD_FISH",
+        "ADD_CELLULOSIC_SUGAR",
+        "ADD_METHANE_SCP",
+        "ADD_GREENHOUSES",
+        "ADD_SEAWEED",
+        "ADD_MILK",
+        "ADD_MEAT",
+        "ADD_OUTDOOR_GROWING",
+        "ADD_STORED_FOOD",
+    )
+
+    # the units of the values of the tensor
+    UNITS = (
+        "billion kcals each month",
+        "thousand tons each month",
+        "thousand tons each month",
+    )
+
+    def __init__(
+        self,
+        countries,
+        values,
+        population,
+        percent_people_fed,
+        include_fat,
+        include_protein,
+        time_months_middle,
+        add_constants,
+    ):
+        """
+        Initializes the tensor with the (countries, food sources, nutrients, months)
+        values of the food of the countries in billion kcals, thousand tons of fat and
+        thousand tons of protein each month, and the population and percent of people
+        fed of each country.
+        """
+        self.countries = list(countries)
+        self.values = np.asarray(values, dtype=float)
+        self.population = np.asarray(population, dtype=float)
+        self.percent_people_fed = np.asarray(percent_people_fed, dtype=float)
+
+        assert self.values.shape[:3] == (
+            len(self.countries),
+            len(self.FOOD_SOURCES),
+            3,
+        ), f"ERROR: the food tensor has the wrong shape: {self.values.shape}"
+        assert (
+            self.population.shape
+            == self.percent_people_fed.shape
+            == (len(self.countries),)
+        ), "ERROR: each country must have a population and a percent of people fed"
+
+        self.country_indices = {
+            country: index for index, country in enumerate(self.countries)
+        }
+
+        # the settings shared by all the countries
+        self.include_fat = include_fat
+        self.include_protein = include_protein
+        self.time_months_middle = time_months_middle
+        self.add_constants = add_constants
+
+    def from_interpreters(many_results):
+        """
+        Makes the tensor of the food of the countries from the interpreted results of
+        each country.
+
+        Args:
+            many_results (dict): the Interpreter of each country, by country
+
+        Returns:
+            FoodTensor: the food of the countries
+        """
+        countries = list(many_results)
+        assert len(countries) > 0, "ERROR: no results to make a food tensor of"
+
+        first_interpreter = many_results[countries[0]]
+        include_fat = first_interpreter.include_fat
+        include_protein = first_interpreter.include_protein
+        time_months_middle = first_interpreter.time_months_middle
+        add_constants = {
+            name: first_interpreter.constants[name] for name in FoodTensor.ADD_CONSTANTS
+        }
+
+        country_values = []
+        population = []
+        percent_people_fed = []
+        for country, interpreter in many_results.items():
+            # make sure all the interpreters have the same sets of constants
+            assert interpreter.include_fat == include_fat
+            assert interpreter.include_protein == include_protein
+            assert interpreter.time_months_middle == time_months_middle
+            for name, value in add_constants.items():
+                assert (
+                    interpreter.constants[name] == value
+                ), f"ERROR: {country} has a different {name} than {countries[0]}"
+
+            foods = [getattr(interpreter, name) for name in FoodTensor.FOOD_SOURCES]
+            for food in foods:
+                assert food.units == foods[0].units, (
+                    "ERROR: the food sources of a country must have the same units to"
+                    " be made into a food tensor"
+                )
+
+            nutrition = interpreter.constants["inputs"]["NUTRITION"]
+            # needed to do unit conversions properly, for this country only
+            with conversions_scope() as conversions:
+                conversions.set_nutrition_requirements(
+                    kcals_daily=nutrition["KCALS_DAILY"],
+                    fat_daily=nutrition["FAT_DAILY"],
+                    protein_daily=nutrition["PROTEIN_DAILY"],
+                    include_fat=include_fat,
+                    include_protein=include_protein,
+                    population=interpreter.constants["POP"],
+                )
+                # the same conversion applies to every food source of the country
+                conversion = foods[0].get_conversion(foods[0].units, *FoodTensor.UNITS)
+
+            food_values = np.array(
+                [[food.kcals, food.fat, food.protein] for food in foods], dtype=float
+            )
+            country_values.append(
+                food_values * np.array(conversion)[np.newaxis, :, np.newaxis]
+            )
+            population.append(interpreter.constants["POP"])
+            percent_people_fed.append(interpreter.percent_people_fed)
+
+        return FoodTensor(
+            countries,
+            np.array(country_values),
+            population,
+            percent_people_fed,
+            include_fat,
+            include_protein,
+            time_months_middle,
+            add_constants,
+        )
+
+    def get_ratios_so_adds_to_100_percent(self):
+        """
+        Returns the ratio of each country's food that would feed at most 100% of its
+        people: 1 for the countries feeding 100% or less, and otherwise the ratio which
+        makes the food of all the sources add up to 100% fed.
+        """
+        return np.where(
+            self.percent_people_fed <= 100,
+            1.0,
+            100 / np.maximum(self.percent_people_fed, 100),
+        )
+
+    def get_capped_at_100_percent(self):
+        """
+        Returns the tensor with the food of each country scaled so that no country
+        feeds more than 100% of its people.
+        """
+        ratios = self.get_ratios_so_adds_to_100_percent()
+        return self.with_values(
+            self.values * ratios[:, np.newaxis, np.newaxis, np.newaxis],
+            np.minimum(self.percent_people_fed, 100),
+        )
+
+    def with_values(self, values, percent_people_fed):
+        """
+        Returns a tensor of the same countries and settings with other values.
+        """
+        return FoodTensor(
+            self.countries,
+            values,
+            self.population,
+            percent_people_fed,
+            self.include_fat,
+            self.include_protein,
+            self.time_months_middle,
+            self.add_constants,
+        )
+
+    def get_country_food(self, country):
+        """
+        Returns the food of each food source of the country, as FoodArrays which are
+        views of the tensor.
+        """
+        country_values = self.values[self.country_indices[country]]
+        return {
+            name: FoodArray(country_values[source], *self.UNITS)
+            for source, name in enumerate(self.FOOD_SOURCES)
+        }
+
+    def get_world_sum(self):
+        """
+        Returns:
+            numpy.ndarray: the (food sources, nutrients, months) food of all the
+            countries added up
+        """
+        return self.values.sum(axis=0)
+
+    def get_world_food(self, name):
+        """
+        Returns the food of the food source of all the countries added up, as a
+        FoodArray.
+        """
+        source = self.FOOD_SOURCES.index(name)
+        return FoodArray(self.values[:, source].sum(axis=0), *self.UNITS)
+
+    def get_world_total_food(self):
+        """
+        Returns the food of all the food sources of all the countries added up, as a
+        FoodArray.
+        """
+        return FoodArray(self.values.sum(axis=(0, 1)), *self.UNITS)
+
+    def get_world_population(self):
+        return self.population.sum()
+
+    def get_population_weighted_percent_people_fed(self):
+        """
+        Returns the mean of the percent of people fed of the countries, weighted by
+        their population.
+        """
+        return np.average(self.percent_people_fed, weights=self.population)
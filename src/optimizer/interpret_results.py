@@ -13,6 +13,7 @@ Created on Tue Jul 19
 
 import numpy as np
 from src.food_system.food import Food
+from src.optimizer.food_tensor import FoodTensor
 import pandas as pd
 
 import datetime
@@ -668,163 +669,36 @@ class Interpreter:
         sum together the results from many different runs of the model
         create a new object summing the results
 
+        The food of the countries is added up from a FoodTensor of the results (see
+        FoodTensor.from_interpreters), so each country is converted and scaled in a
+        single numpy operation.
+
         returns: the interpreter object with the summed results divided by the
         population in question
         """
-
-        i = 0
-        net_pop = 0
-        previous_interpreter = []
-        for country, interpreter in many_results.items():
-            # record some useful values for plotting from the interpreter
-            # will check later that these are consistent
-            include_fat = interpreter.include_fat
-            include_protein = interpreter.include_protein
-            time_months_middle = interpreter.time_months_middle
-
-            ADD_FISH = interpreter.constants["ADD_FISH"]
-            ADD_CELLULOSIC_SUGAR = interpreter.constants["ADD_CELLULOSIC_SUGAR"]
-            ADD_METHANE_SCP = interpreter.constants["ADD_METHANE_SCP"]
-            ADD_GREENHOUSES = interpreter.constants["ADD_GREENHOUSES"]
-            ADD_SEAWEED = interpreter.constants["ADD_SEAWEED"]
-            ADD_MILK = interpreter.constants["ADD_MILK"]
-            ADD_MEAT = interpreter.constants["ADD_MEAT"]
-            ADD_OUTDOOR_GROWING = interpreter.constants["ADD_OUTDOOR_GROWING"]
-            ADD_STORED_FOOD = interpreter.constants["ADD_STORED_FOOD"]
-
-            # print(interpreter.constants)
-            net_pop += interpreter.constants["POP"]
-            kcals_daily = interpreter.constants["inputs"]["NUTRITION"]["KCALS_DAILY"]
-            # needed to do unit conversions properly
-            Food.conversions.set_nutrition_requirements(
-                kcals_daily=kcals_daily,
-                fat_daily=interpreter.constants["inputs"]["NUTRITION"]["FAT_DAILY"],
-                protein_daily=interpreter.constants["inputs"]["NUTRITION"][
-                    "PROTEIN_DAILY"
-                ],
-                include_fat=include_fat,
-                include_protein=include_protein,
-                population=interpreter.constants["POP"],
-            )
-
-            fish = interpreter.fish.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            cell_sugar = (
-                interpreter.cell_sugar.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-            scp = interpreter.scp.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            greenhouse = (
-                interpreter.greenhouse.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-            seaweed = (
-                interpreter.seaweed.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-            milk = interpreter.milk.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            cmpgcm = interpreter.meat
-            meat = cmpgcm.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-
-            immediate_outdoor_crops = (
-                interpreter.immediate_outdoor_crops_to_humans.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-            new_stored_outdoor_crops = (
-                interpreter.new_stored_outdoor_crops_to_humans.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-            stored_food = (
-                interpreter.stored_food_to_humans.in_units_bil_kcals_thou_tons_thou_tons_per_month()
-            )
-
-            if interpreter.percent_people_fed <= 100:
-                ratio_so_adds_to_100_percent = 1
-            else:
-                # this is always less than 1. The value is the amount so percent people
-                # fed would be 100 if all the components are added up
-                ratio_so_adds_to_100_percent = 100 / interpreter.percent_people_fed
-                assert 0 < ratio_so_adds_to_100_percent < 1
-
-            if cap_at_100_percent:
-                fish = fish * ratio_so_adds_to_100_percent
-                cell_sugar = cell_sugar * ratio_so_adds_to_100_percent
-                scp = scp * ratio_so_adds_to_100_percent
-                greenhouse = greenhouse * ratio_so_adds_to_100_percent
-                seaweed = seaweed * ratio_so_adds_to_100_percent
-                milk = milk * ratio_so_adds_to_100_percent
-                meat = meat * ratio_so_adds_to_100_percent
-                immediate_outdoor_crops = (
-                    immediate_outdoor_crops * ratio_so_adds_to_100_percent
-                )
-                new_stored_outdoor_crops = (
-                    new_stored_outdoor_crops * ratio_so_adds_to_100_percent
-                )
-                stored_food = stored_food * ratio_so_adds_to_100_percent
-
-            if i == 0:
-                fish_cumulative = fish
-                cell_sugar_cumulative = cell_sugar
-                scp_cumulative = scp
-                greenhouse_cumulative = greenhouse
-                seaweed_cumulative = seaweed
-                milk_cumulative = milk
-                meat_cumulative = meat
-                immediate_outdoor_crops_cumulative = immediate_outdoor_crops
-                new_stored_outdoor_crops_cumulative = new_stored_outdoor_crops
-                stored_food_cumulative = stored_food
-            else:
-                # make sure all the interpreters have the same sets of constants
-                assert previous_interpreter.include_fat == include_fat
-                assert previous_interpreter.include_protein == include_protein
-                assert previous_interpreter.time_months_middle == time_months_middle
-
-                assert ADD_FISH == previous_interpreter.constants["ADD_FISH"]
-
-                assert (
-                    ADD_CELLULOSIC_SUGAR
-                    == previous_interpreter.constants["ADD_CELLULOSIC_SUGAR"]
-                )
-
-                assert (
-                    ADD_METHANE_SCP == previous_interpreter.constants["ADD_METHANE_SCP"]
-                )
-
-                assert (
-                    ADD_GREENHOUSES == previous_interpreter.constants["ADD_GREENHOUSES"]
-                )
-
-                assert ADD_SEAWEED == previous_interpreter.constants["ADD_SEAWEED"]
-
-                assert ADD_MILK == previous_interpreter.constants["ADD_MILK"]
-
-                assert ADD_MEAT == previous_interpreter.constants["ADD_MEAT"]
-
-                assert (
-                    ADD_OUTDOOR_GROWING
-                    == previous_interpreter.constants["ADD_OUTDOOR_GROWING"]
-                )
-
-                assert (
-                    ADD_OUTDOOR_GROWING
-                    == previous_interpreter.constants["ADD_OUTDOOR_GROWING"]
-                )
-
-                assert (
-                    ADD_STORED_FOOD == previous_interpreter.constants["ADD_STORED_FOOD"]
-                )
-
-                fish_cumulative = fish_cumulative + fish
-                cell_sugar_cumulative = cell_sugar_cumulative + cell_sugar
-                scp_cumulative = scp_cumulative + scp
-                greenhouse_cumulative = greenhouse_cumulative + greenhouse
-                seaweed_cumulative = seaweed_cumulative + seaweed
-                milk_cumulative = milk_cumulative + milk
-                meat_cumulative = meat_cumulative + meat
-                immediate_outdoor_crops_cumulative = (
-                    immediate_outdoor_crops_cumulative + immediate_outdoor_crops
-                )
-                new_stored_outdoor_crops_cumulative = (
-                    new_stored_outdoor_crops_cumulative + new_stored_outdoor_crops
-                )
-                stored_food_cumulative = stored_food_cumulative + stored_food
-
-            previous_interpreter = interpreter
-            i += 1
+        food_tensor = FoodTensor.from_interpreters(many_results)
+        if cap_at_100_percent:
+            food_tensor = food_tensor.get_capped_at_100_percent()
+
+        include_fat = food_tensor.include_fat
+        include_protein = food_tensor.include_protein
+        time_months_middle = food_tensor.time_months_middle
+        net_pop = food_tensor.get_world_population()
+
+        world_food = {
+            name: food_tensor.get_world_food(name).to_food()
+            for name in FoodTensor.FOOD_SOURCES
+        }
+        fish_cumulative = world_food["fish"]
+        cell_sugar_cumulative = world_food["cell_sugar"]
+        scp_cumulative = world_food["scp"]
+        greenhouse_cumulative = world_food["greenhouse"]
+        seaweed_cumulative = world_food["seaweed"]
+        milk_cumulative = world_food["milk"]
+        meat_cumulative = world_food["meat"]
+        immediate_outdoor_crops_cumulative = world_food["immediate_outdoor_crops"]
+        new_stored_outdoor_crops_cumulative = world_food["new_stored_outdoor_crops"]
+        stored_food_cumulative = world_food["stored_food"]
 
         # kcals per person per day
         KCALS_DAILY = 2100
@@ -847,16 +721,7 @@ class Interpreter:
         global_results = Interpreter()
 
         humans_fed_sum = (
-            fish_cumulative.in_units_percent_fed()
-            + cell_sugar_cumulative.in_units_percent_fed()
-            + scp_cumulative.in_units_percent_fed()
-            + greenhouse_cumulative.in_units_percent_fed()
-            + seaweed_cumulative.in_units_percent_fed()
-            + milk_cumulative.in_units_percent_fed()
-            + meat_cumulative.in_units_percent_fed()
-            + immediate_outdoor_crops_cumulative.in_units_percent_fed()
-            + new_stored_outdoor_crops_cumulative.in_units_percent_fed()
-            + stored_food_cumulative.in_units_percent_fed()
+            food_tensor.get_world_total_food().to_food().in_units_percent_fed()
         )
 
         global_results.time_months_middle = time_months_middle
@@ -866,17 +731,7 @@ class Interpreter:
         global_results.fat_fed = humans_fed_sum.fat
         global_results.protein_fed = humans_fed_sum.protein
 
-        global_results.constants = {}
-        global_results.constants["ADD_FISH"] = ADD_FISH
-        global_results.constants["ADD_CELLULOSIC_SUGAR"] = ADD_CELLULOSIC_SUGAR
-        global_results.constants["ADD_METHANE_SCP"] = ADD_METHANE_SCP
-        global_results.constants["ADD_GREENHOUSES"] = ADD_GREENHOUSES
-        global_results.constants["ADD_SEAWEED"] = ADD_SEAWEED
-        global_results.constants["ADD_MILK"] = ADD_MILK
-        global_results.constants["ADD_MEAT"] = ADD_MEAT
-        global_results.constants["ADD_OUTDOOR_GROWING"] = ADD_OUTDOOR_GROWING
-        global_results.constants["ADD_OUTDOOR_GROWING"] = ADD_OUTDOOR_GROWING
-        global_results.constants["ADD_STORED_FOOD"] = ADD_STORED_FOOD
+        global_results.constants = dict(food_tensor.add_constants)
 
         global_results.kcals_fed = humans_fed_sum.kcals
         global_results.fat_fed = humans_fed_sum.fat
@@ -0,0 +1,250 @@
+"""
+Solves the optimizer's chain of objectives on one live model.
+
+The optimizer solves each model several times: first to maximize the minimum month
+fed, then (with the first objective held by new constraints) for the best foods going to
+humans, and finally to smooth out month to month fluctuations. Each stage only adds
+variables and constraints to the model and swaps the objective.
+
+With a solver backend that supports warm starts (highs), the model is passed to the
+solver once and each later stage adds only its new columns and rows, instead of the
+whole model being rebuilt in the solver at every stage. The solver can also continue
+from the optimal basis of the previous stage (reuse_basis). That takes fewer simplex
+iterations, but HiGHS does not presolve a model it is given a basis for, and on the
+optimizer's models presolve saves more time than the basis does, so by default each
+stage is presolved and solved from scratch. The first stage's constraints can also be
+passed in as sparse matrices (add_linear_program), skipping PuLP for them entirely.
+
+Other backends solve the whole model from scratch at each stage.
+"""
+
+import numpy as np
+from pulp import (
+    LpMaximize,
+    LpStatusInfeasible,
+    LpStatusNotSolved,
+    LpStatusOptimal,
+    LpStatusUnbounded,
+)
+
+
+class LexicographicSolver:
+    def __init__(self, model, solver_backend, reuse_basis=False):
+        """
+        Args:
+            model (pulp.LpProblem): the model solved at every stage. Stages may add
+                variables and constraints and change the objective and sense, but
+                constraints already added must not be changed or removed.
+            solver_backend (SolverBackend): the backend used to solve the model
+            reuse_basis (bool): whether each stage starts from the optimal basis of
+                the previous stage (only if the backend supports warm starts)
+        """
+        self.model = model
+        self.solver_backend = solver_backend
+        self.reuse_basis = reuse_basis
+        self.iterations = None  # simplex iterations of the last solve, if known
+
+        self.highs = None
+        if solver_backend.supports_warm_start:
+            import highspy
+
+            self.highspy = highspy
+            self.highs = highspy.Highs()
+            self.variables = []  # the PuLP variable of each column
+            self.col_index = {}
+            self.n_constraints_added = 0
+
+    def solve(self, gap_rel, msg=False):
+        """
+        Solves the model as it is now, and returns the PuLP status (1 if the
+        optimization succeeded). The solution is written onto the PuLP variables.
+
+        Args:
+            gap_rel (float): the relative gap tolerance passed to the solver
+            msg (bool): whether to print the solver output
+
+        Returns:
+            int: the PuLP status of the solve
+        """
+        if self.highs is None:
+            return self.solver_backend.solve(self.model, gap_rel, msg)
+
+        self.add_new_constraints()
+        self.set_objective()
+        if not self.reuse_basis:
+            # keeps the model, but drops the previous solution and basis
+            self.highs.clearSolver()
+        self.highs.setOptionValue("output_flag", msg)
+        self.highs.setOptionValue("mip_rel_gap", gap_rel)
+        self.highs.run()
+        self.iterations = self.highs.getInfo().simplex_iteration_count
+        return self.read_solution()
+
+    def get_solution_vector(self):
+        """
+        Returns the value of every column in the last solve, in the order the columns
+        were added, or None if the solver has no solution.
+        """
+        if self.highs is None:
+            return None
+        solution = self.highs.getSolution()
+        if not solution.value_valid:
+            return None
+        return np.asarray(solution.col_value)
+
+    def get_model_size(self):
+        """
+        Returns the number of variables and constraints in the model as it was last
+        solved.
+        """
+        if self.highs is None:
+            return len(self.model.variables()), len(self.model.constraints)
+        return self.highs.getNumCol(), self.highs.getNumRow()
+
+    def add_linear_program(self, linear_program, variables):
+        """
+        Passes constraints already assembled as sparse matrices straight to the solver,
+        before the first solve. Constraints added to the PuLP model are added after
+        them.
+
+        Args:
+            linear_program (LinearProgram): the constraints to add
+            variables (list): the PuLP variable of each column
+        """
+        assert (
+            self.highs is not None
+        ), "ERROR: only solver backends that support warm starts can add matrices"
+        assert (
+            self.n_constraints_added == 0 and len(self.variables) == 0
+        ), "ERROR: a linear program can only be added before the first solve"
+
+        self.add_columns(variables)
+        assert [variable.name for variable in self.variables] == list(
+            linear_program.col_names
+        ), "ERROR: the variables do not match the columns of the linear program"
+
+        matrix = linear_program.matrix.tocsr()
+        self.highs.addRows(
+            linear_program.n_rows,
+            np.asarray(linear_program.row_lower, dtype=float),
+            np.asarray(linear_program.row_upper, dtype=float),
+            matrix.nnz,
+            matrix.indptr[:-1].astype(np.int32),
+            matrix.indices.astype(np.int32),
+            matrix.data.astype(float),
+        )
+
+    def add_columns(self, variables):
+        """
+        Adds a column for each of the variables not already in the solver.
+        """
+        new_variables = []
+        for variable in variables:
+            if variable.name in self.col_index:
+                continue
+            self.col_index[variable.name] = len(self.variables)
+            self.variables.append(variable)
+            new_variables.append(variable)
+
+        if len(new_variables) == 0:
+            return
+        lower = [
+            -np.inf if variable.lowBound is None else variable.lowBound
+            for variable in new_variables
+        ]
+        upper = [
+            np.inf if variable.upBound is None else variable.upBound
+            for variable in new_variables
+        ]
+        self.highs.addCols(
+            len(new_variables),
+            np.zeros(len(new_variables)),
+            np.array(lower, dtype=float),
+            np.array(upper, dtype=float),
+            0,
+            np.array([], dtype=np.int32),
+            np.array([], dtype=np.int32),
+            np.array([], dtype=float),
+        )
+
+    def add_new_constraints(self):
+        """
+        Adds the constraints added to the model since the last solve as new rows,
+        along with any variables they introduce.
+        """
+        constraints = list(self.model.constraints.values())
+        assert len(constraints) >= self.n_constraints_added, (
+            "ERROR: constraints were removed from a model that is being solved in "
+            "stages"
+        )
+        new_constraints = constraints[self.n_constraints_added :]
+        self.n_constraints_added = len(constraints)
+
+        for constraint in new_constraints:
+            self.add_columns(constraint.keys())
+        self.add_columns(self.model.objective.keys())
+
+        if len(new_constraints) == 0:
+            return
+        starts = []
+        indices = []
+        values = []
+        lower = []
+        upper = []
+        for constraint in new_constraints:
+            starts.append(len(indices))
+            for variable, coefficient in constraint.items():
+                indices.append(self.col_index[variable.name])
+                values.append(coefficient)
+            constraint_lower = constraint.getLb()
+            constraint_upper = constraint.getUb()
+            lower.append(-np.inf if constraint_lower is None else constraint_lower)
+            upper.append(np.inf if constraint_upper is None else constraint_upper)
+
+        self.highs.addRows(
+            len(new_constraints),
+            np.array(lower, dtype=float),
+            np.array(upper, dtype=float),
+            len(indices),
+            np.array(starts, dtype=np.int32),
+            np.array(indices, dtype=np.int32),
+            np.array(values, dtype=float),
+        )
+
+    def set_objective(self):
+        costs = np.zeros(len(self.variables))
+        for variable, coefficient in self.model.objective.items():
+            costs[self.col_index[variable.name]] = coefficient
+        self.highs.changeColsCost(
+            len(costs), np.arange(len(costs), dtype=np.int32), costs
+        )
+        if self.model.sense == LpMaximize:
+            self.highs.changeObjectiveSense(self.highspy.ObjSense.kMaximize)
+        else:
+            self.highs.changeObjectiveSense(self.highspy.ObjSense.kMinimize)
+
+    def read_solution(self):
+        """
+        Writes the solution onto the PuLP variables and returns the PuLP status.
+        """
+        model_status = self.highs.getModelStatus()
+        HighsModelStatus = self.highspy.HighsModelStatus
+        if model_status == HighsModelStatus.kOptimal:
+            status = LpStatusOptimal
+        elif model_status in [
+            HighsModelStatus.kInfeasible,
+            HighsModelStatus.kUnboundedOrInfeasible,
+        ]:
+            status = LpStatusInfeasible
+        elif model_status == HighsModelStatus.kUnbounded:
+            status = LpStatusUnbounded
+        else:
+            status = LpStatusNotSolved
+
+        solution = self.highs.getSolution()
+        if solution.value_valid:
+            for variable, value in zip(self.variables, solution.col_value):
+                variable.varValue = value
+
+        self.model.status = status
+        return status
@@ -0,0 +1,243 @@
+"""
+A linear program in matrix form:
+
+    maximize or minimize  c . x
+    subject to            row_lower <= A x <= row_upper
+                          col_lower <= x <= col_upper
+
+The rows and columns keep the constraint and variable names used by the PuLP model, so
+a linear program can be converted from a PuLP model and compared against one built
+directly from the time constants (see lp_matrix_builder.py), or checked against a
+solution.
+"""
+
+import numpy as np
+from pulp import LpMaximize
+from scipy.sparse import coo_matrix
+
+
+class LinearProgram:
+    def __init__(
+        self,
+        matrix,
+        row_lower,
+        row_upper,
+        row_names,
+        objective,
+        col_lower,
+        col_upper,
+        col_names,
+        sense=LpMaximize,
+    ):
+        """
+        Args:
+            matrix (scipy.sparse.csr_matrix): the constraint coefficients, one row per
+                constraint and one column per variable
+            row_lower (np.ndarray): lower bound of each row (-inf if none)
+            row_upper (np.ndarray): upper bound of each row (inf if none)
+            row_names (list): the constraint name of each row
+            objective (np.ndarray): the objective coefficient of each column
+            col_lower (np.ndarray): lower bound of each column (-inf if none)
+            col_upper (np.ndarray): upper bound of each column (inf if none)
+            col_names (list): the variable name of each column
+            sense (int): LpMaximize (-1) or LpMinimize (1)
+        """
+        self.matrix = matrix
+        self.row_lower = row_lower
+        self.row_upper = row_upper
+        self.row_names = row_names
+        self.objective = objective
+        self.col_lower = col_lower
+        self.col_upper = col_upper
+        self.col_names = col_names
+        self.sense = sense
+
+    @property
+    def n_rows(self):
+        return len(self.row_names)
+
+    @property
+    def n_cols(self):
+        return len(self.col_names)
+
+    @classmethod
+    def from_pulp(cls, model):
+        """
+        Converts a PuLP model into a linear program in matrix form.
+
+        Args:
+            model (pulp.LpProblem): the model to convert
+
+        Returns:
+            LinearProgram: the same model in matrix form
+        """
+        variables = model.variables()
+        col_index = {variable.name: i for i, variable in enumerate(variables)}
+
+        row_indices = []
+        col_indices = []
+        values = []
+        row_names = []
+        row_lower = np.empty(len(model.constraints))
+        row_upper = np.empty(len(model.constraints))
+        for row, (name, constraint) in enumerate(model.constraints.items()):
+            for variable, coefficient in constraint.items():
+                row_indices.append(row)
+                col_indices.append(col_index[variable.name])
+                values.append(coefficient)
+            row_names.append(name)
+            lower = constraint.getLb()
+            upper = constraint.getUb()
+            row_lower[row] = -np.inf if lower is None else lower
+            row_upper[row] = np.inf if upper is None else upper
+
+        matrix = coo_matrix(
+            (values, (row_indices, col_indices)),
+            shape=(len(row_names), len(variables)),
+        ).tocsr()
+
+        objective = np.zeros(len(variables))
+        if model.objective is not None:
+            for variable, coefficient in model.objective.items():
+                objective[col_index[variable.name]] = coefficient
+
+        col_lower = np.array(
+            [-np.inf if v.lowBound is None else v.lowBound for v in variables]
+        )
+        col_upper = np.array(
+            [np.inf if v.upBound is None else v.upBound for v in variables]
+        )
+
+        return cls(
+            matrix,
+            row_lower,
+            row_upper,
+            row_names,
+            objective,
+            col_lower,
+            col_upper,
+            [variable.name for variable in variables],
+            sense=model.sense,
+        )
+
+    def get_row_violations(self, values):
+        """
+        Returns how far each row is outside its bounds for the given values of the
+        columns (0 for rows that are satisfied).
+
+        Args:
+            values (np.ndarray): the value of each column
+
+        Returns:
+            np.ndarray: the violation of each row
+        """
+        activity = self.matrix @ values
+        return np.maximum(
+            np.maximum(self.row_lower - activity, activity - self.row_upper), 0
+        )
+
+    def get_rows_as_dicts(self):
+        """
+        Returns the nonzero coefficients of each row as a dictionary of
+        {variable name: coefficient}, keyed by the row name.
+        """
+        matrix = self.matrix.tocsr()
+        rows = {}
+        for row, name in enumerate(self.row_names):
+            start = matrix.indptr[row]
+            end = matrix.indptr[row + 1]
+            rows[name] = {
+                self.col_names[col]: value
+                for col, value in zip(matrix.indices[start:end], matrix.data[start:end])
+                if value != 0
+            }
+        return rows
+
+    def get_differences(self, other, rtol=1e-9, atol=1e-9):
+        """
+        Lists every way this linear program differs from another one. Rows and columns
+        are matched by name, so they may be in any order. Zero coefficients are ignored,
+        and a row is allowed to be the other row multiplied by -1 (x <= 1 is the same
+        constraint as -x >= -1).
+
+        Args:
+            other (LinearProgram): the linear program to compare against
+            rtol (float): relative tolerance on coefficients and bounds
+            atol (float): absolute tolerance on coefficients and bounds
+
+        Returns:
+            list: a description of each difference found (empty if equivalent)
+        """
+
+        def close(a, b):
+            return np.allclose(a, b, rtol=rtol, atol=atol)
+
+        def same_row(
+            coefficients, lower, upper, other_coefficients, other_lower, other_upper
+        ):
+            if set(coefficients.keys()) != set(other_coefficients.keys()):
+                return False
+            names = list(coefficients.keys())
+            these = np.array([coefficients[name] for name in names])
+            others = np.array([other_coefficients[name] for name in names])
+            if close(these, others) and close(
+                [lower, upper], [other_lower, other_upper]
+            ):
+                return True
+            # the same constraint, written with the sides swapped
+            return close(these, -others) and close(
+                [lower, upper], [-other_upper, -other_lower]
+            )
+
+        differences = []
+        if self.sense != other.sense:
+            differences.append("objective sense differs")
+
+        these_rows = self.get_rows_as_dicts()
+        other_rows = other.get_rows_as_dicts()
+        for name in these_rows.keys() - other_rows.keys():
+            differences.append("row " + name + " is missing from the other program")
+        for name in other_rows.keys() - these_rows.keys():
+            differences.append("row " + name + " is missing from this program")
+
+        this_row_index = {name: i for i, name in enumerate(self.row_names)}
+        other_row_index = {name: i for i, name in enumerate(other.row_names)}
+        for name in these_rows.keys() & other_rows.keys():
+            i = this_row_index[name]
+            j = other_row_index[name]
+            if not same_row(
+                these_rows[name],
+                self.row_lower[i],
+                self.row_upper[i],
+                other_rows[name],
+                other.row_lower[j],
+                other.row_upper[j],
+            ):
+                differences.append("row " + name + " differs")
+
+        this_objective = {
+            self.col_names[col]: self.objective[col]
+            for col in np.flatnonzero(self.objective)
+        }
+        other_objective = {
+            other.col_names[col]: other.objective[col]
+            for col in np.flatnonzero(other.objective)
+        }
+        if set(this_objective.keys()) != set(other_objective.keys()) or not close(
+            [this_objective[name] for name in this_objective],
+            [other_objective[name] for name in this_objective],
+        ):
+            differences.append("objective differs")
+
+        other_col_index = {name: i for i, name in enumerate(other.col_names)}
+        for i, name in enumerate(self.col_names):
+            if name not in other_col_index:
+                continue
+            j = other_col_index[name]
+            if not close(
+                [self.col_lower[i], self.col_upper[i]],
+                [other.col_lower[j], other.col_upper[j]],
+            ):
+                differences.append("bounds of column " + name + " differ")
+
+        return differences
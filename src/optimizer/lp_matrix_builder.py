@@ -0,0 +1,866 @@
+"""
+Assembles the optimizer's linear program directly as sparse matrices.
+
+The Optimizer builds its model one month at a time out of PuLP expressions, which
+creates a python object for every term of every constraint. LPMatrixBuilder emits the
+same constraints for all months at once from the time constant arrays: each family of
+constraints (for example "Stored_Food_Eaten") becomes one block of rows whose
+coefficients are numpy arrays over the months.
+
+Rows and columns are named exactly as the Optimizer names its constraints and
+variables, so the two can be compared constraint by constraint with cross_check.
+
+Which rows and columns exist, and where the nonzeros are, depends only on a few flags
+and the number of months (see get_structure_key), not on the country. The first build
+of each structure compiles it into an LPTemplate: the names, the column of each
+variable and the sparse layout of the matrix. Later builds with the same structure
+only compute the coefficients and bounds, and drop them into the template.
+"""
+
+import numpy as np
+from pulp import LpMaximize
+from scipy.sparse import csr_matrix
+
+from src.optimizer.linear_program import LinearProgram
+
+
+class LPTemplate:
+    """
+    The structure of a linear program built by LPMatrixBuilder: everything except the
+    values of the coefficients and bounds.
+    """
+
+    def __init__(self, columns, col_names, row_names, row_indices, col_indices):
+        """
+        Args:
+            columns (dict): the column index of each variable, by month, keyed like the
+                Optimizer's variables dictionary
+            col_names (list): the name of each column
+            row_names (list): the name of each row
+            row_indices (np.ndarray): the row of each coefficient, in the order the
+                coefficients are computed
+            col_indices (np.ndarray): the column of each coefficient, in the same order
+        """
+        self.columns = columns
+        self.col_names = col_names
+        self.row_names = row_names
+        self.shape = (len(row_names), len(col_names))
+
+        # the order that sorts the coefficients into a CSR matrix
+        self.csr_order = np.lexsort((col_indices, row_indices))
+        sorted_rows = row_indices[self.csr_order]
+        sorted_cols = col_indices[self.csr_order]
+        assert not np.any(
+            (np.diff(sorted_rows) == 0) & (np.diff(sorted_cols) == 0)
+        ), "ERROR: a variable appears twice in the same row of the matrix model"
+        self.indices = sorted_cols
+        self.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(sorted_rows, minlength=len(row_names)))]
+        )
+
+    def get_matrix(self, values):
+        """
+        Returns the matrix with the given coefficients, in the order they are computed.
+        """
+        return csr_matrix(
+            (values[self.csr_order], self.indices, self.indptr), shape=self.shape
+        )
+
+
+class LPMatrixBuilder:
+    # compiled structures, shared by every builder in this process
+    templates = {}
+
+    def __init__(self, optimizer):
+        """
+        Args:
+            optimizer (Optimizer): the optimizer whose model is to be assembled. Its
+                constants, time constants and variable prefixes are used.
+        """
+        self.optimizer = optimizer
+        self.consts_for_optimizer = optimizer.consts_for_optimizer
+        self.time_consts = optimizer.time_consts
+        self.NMONTHS = optimizer.NMONTHS
+        self.months = np.arange(self.NMONTHS)
+
+        self.resource_functions = {
+            "ADD_SEAWEED": self.add_seaweed_rows,
+            "ADD_OUTDOOR_GROWING": self.add_outdoor_crops_rows,
+            "ADD_STORED_FOOD": self.add_stored_food_rows,
+            "ADD_MEAT": self.add_meat_rows,
+            "ADD_METHANE_SCP": self.add_methane_scp_rows,
+            "ADD_CELLULOSIC_SUGAR": self.add_cellulosic_sugar_rows,
+        }
+
+    def build(self, optimization_type, use_template=True):
+        """
+        Assembles the linear program the Optimizer would build with
+        add_variables_and_constraints_to_model.
+
+        Args:
+            optimization_type (str): "to_humans" or "to_animals"
+            use_template (bool): whether to reuse (or compile and keep) the template
+                for this structure
+
+        Returns:
+            LinearProgram: the model in matrix form
+        """
+        assert optimization_type in [
+            "to_humans",
+            "to_animals",
+        ], "ERROR: only to_humans or to_animals allowed to optimize"
+        self.optimization_type = optimization_type
+
+        structure_key = self.get_structure_key()
+        self.template = None
+        if use_template:
+            self.template = LPMatrixBuilder.templates.get(structure_key)
+
+        self.n_rows = 0
+        self.values = []
+        self.row_lower = []
+        self.row_upper = []
+        if self.template is None:
+            self.columns = {}
+            self.col_names = []
+            self.row_names = []
+            self.row_indices = []
+            self.col_indices = []
+            self.add_columns()
+        else:
+            self.columns = self.template.columns
+
+        for key, resource in self.optimizer.resource_constants.items():
+            if self.consts_for_optimizer[key]:
+                self.resource_functions[key]()
+                if optimization_type == "to_animals":
+                    self.add_predetermined_human_consumption_rows(resource["food_name"])
+
+        self.add_feed_biofuel_rows()
+        if optimization_type == "to_humans":
+            self.add_total_human_consumption_rows()
+        self.add_percentage_intake_rows()
+
+        if optimization_type == "to_humans":
+            self.add_maximize_min_month_objective_rows()
+        else:
+            self.add_maximize_sum_total_feed_used_by_animals_rows()
+
+        template = self.template
+        if template is None:
+            template = LPTemplate(
+                self.columns,
+                self.col_names,
+                self.row_names,
+                np.concatenate(self.row_indices),
+                np.concatenate(self.col_indices),
+            )
+            if use_template:
+                LPMatrixBuilder.templates[structure_key] = template
+
+        n_cols = len(template.col_names)
+        objective = np.zeros(n_cols)
+        objective[template.columns["objective_function"][0]] = 1
+
+        return LinearProgram(
+            template.get_matrix(np.concatenate(self.values)),
+            np.concatenate(self.row_lower),
+            np.concatenate(self.row_upper),
+            template.row_names,
+            objective,
+            np.zeros(n_cols),
+            np.full(n_cols, np.inf),
+            template.col_names,
+            sense=LpMaximize,
+        )
+
+    def get_structure_key(self):
+        """
+        Returns everything that decides which rows and columns the linear program has
+        and where its nonzeros are. Two models with the same key differ only in the
+        values of their coefficients and bounds.
+        """
+        consts = self.consts_for_optimizer
+        include_fat = bool(consts["inputs"]["INCLUDE_FAT"])
+        include_protein = bool(consts["inputs"]["INCLUDE_PROTEIN"])
+        key = (
+            self.optimization_type,
+            self.NMONTHS,
+            bool(consts["STORE_FOOD_BETWEEN_YEARS"]),
+            include_fat,
+            include_protein,
+        ) + tuple(bool(consts[flag]) for flag in self.resource_functions)
+
+        if consts["ADD_OUTDOOR_GROWING"] and include_fat and include_protein:
+            fat_multiplier, protein_multiplier = self.get_crops_nutrient_multipliers()
+            key += (tuple(fat_multiplier != protein_multiplier),)
+        return key
+
+    def cross_check(self, model, optimization_type):
+        """
+        Asserts that the PuLP model built by the Optimizer is the same linear program
+        as the one assembled here.
+
+        Args:
+            model (pulp.LpProblem): the model from add_variables_and_constraints_to_model
+            optimization_type (str): "to_humans" or "to_animals"
+        """
+        differences = self.build(optimization_type).get_differences(
+            LinearProgram.from_pulp(model)
+        )
+        assert len(differences) == 0, (
+            "ERROR: the sparse matrix model differs from the PuLP model for "
+            + str(self.consts_for_optimizer["inputs"]["COUNTRY_CODE"])
+            + " ("
+            + str(len(differences))
+            + " differences): "
+            + "; ".join(differences[:10])
+        )
+
+    # COLUMNS
+
+    def add_monthly_columns(self, key, names):
+        self.columns[key] = len(self.col_names) + self.months
+        self.col_names.extend(names)
+
+    def add_columns(self):
+        """
+        Adds a column for every variable the Optimizer creates, in the same order.
+        """
+        for key, resource in self.optimizer.resource_constants.items():
+            if not self.consts_for_optimizer[key]:
+                continue
+            for prefix in resource["prefixes"]:
+                self.add_monthly_columns(
+                    prefix.lower(),
+                    [f"{prefix}_Month_{month}_Variable" for month in self.months],
+                )
+
+        # the objective is a single variable, repeated for each month so that it can be
+        # used in the monthly rows like any other column
+        self.columns["objective_function"] = np.full(self.NMONTHS, len(self.col_names))
+        self.col_names.append("Objective_To_Optimize")
+
+        if self.optimization_type == "to_humans":
+            for key, nutrient in [
+                ("consumed_kcals", "Kcals"),
+                ("consumed_fat", "Fat"),
+                ("consumed_protein", "Protein"),
+            ]:
+                self.add_monthly_columns(
+                    key,
+                    [
+                        f"Humans_Fed_{nutrient}_{month}_Variable"
+                        for month in self.months
+                    ],
+                )
+
+    def has(self, key):
+        return key in self.columns
+
+    # ROWS
+
+    def add_rows(self, n_rows, names, terms, lower, upper):
+        """
+        Adds n_rows rows. When the structure comes from a template, the names and
+        columns are already known and are passed as None.
+
+        Args:
+            n_rows (int): the number of rows to add
+            names (list): the name of each row
+            terms (list): (columns, coefficients) pairs, each giving one entry per row.
+                Coefficients may be a scalar or an array with one value per row.
+            lower (float or np.ndarray): lower bound of the rows
+            upper (float or np.ndarray): upper bound of the rows
+        """
+        if n_rows == 0:
+            return
+        rows = self.n_rows + np.arange(n_rows)
+        for columns, coefficients in terms:
+            self.values.append(
+                np.broadcast_to(np.asarray(coefficients, dtype=float), n_rows)
+            )
+            if self.template is None:
+                self.row_indices.append(rows)
+                self.col_indices.append(columns)
+        if self.template is None:
+            self.row_names.extend(names)
+        self.row_lower.append(np.broadcast_to(np.asarray(lower, dtype=float), n_rows))
+        self.row_upper.append(np.broadcast_to(np.asarray(upper, dtype=float), n_rows))
+        self.n_rows += n_rows
+
+    def add_monthly_rows(
+        self,
+        prefix,
+        months,
+        terms,
+        lower=-np.inf,
+        upper=np.inf,
+        suffix="Constraint",
+    ):
+        """
+        Adds one row for each of the given months, named like the Optimizer names them
+        ("{prefix}_{month}_Constraint").
+
+        Args:
+            prefix (str): the constraint name prefix
+            months (np.ndarray): the months to add a row for
+            terms (list): (variable key, month offset, coefficients) triples. The month
+                offset is 0 for the variable of the same month, -1 for the month before.
+            lower (float or np.ndarray): lower bound of the rows
+            upper (float or np.ndarray): upper bound of the rows
+            suffix (str): the end of the constraint name
+        """
+        if self.template is not None:
+            self.add_rows(
+                len(months),
+                None,
+                [(None, coefficients) for key, offset, coefficients in terms],
+                lower,
+                upper,
+            )
+            return
+        self.add_rows(
+            len(months),
+            [f"{prefix}_{month}_{suffix}" for month in months],
+            [
+                (self.columns[key][months + offset], coefficients)
+                for key, offset, coefficients in terms
+            ],
+            lower,
+            upper,
+        )
+
+    def add_monthly_equality_rows(self, prefix, months, terms, value=0):
+        self.add_monthly_rows(prefix, months, terms, lower=value, upper=value)
+
+    def get_monthly(self, values):
+        return np.asarray(values, dtype=float)[self.months]
+
+    # RESOURCES
+
+    def add_seaweed_rows(self):
+        consts = self.consts_for_optimizer
+        months = self.months
+        initial_seaweed = consts["INITIAL_SEAWEED"]
+        initial_built_area = consts["INITIAL_BUILT_SEAWEED_AREA"]
+        built_area = self.get_monthly(self.time_consts["built_area"])
+
+        self.add_monthly_rows(
+            "Seaweed_Wet_On_Farm_Lowerbound",
+            months,
+            [("seaweed_wet_on_farm", 0, 1)],
+            lower=initial_seaweed,
+        )
+        self.add_monthly_rows(
+            "Seaweed_Wet_On_Farm_Upperbound",
+            months,
+            [("seaweed_wet_on_farm", 0, 1)],
+            upper=consts["MAXIMUM_DENSITY"] * built_area,
+        )
+        self.add_monthly_rows(
+            "Used_Area_Lowerbound",
+            months,
+            [("used_area", 0, 1)],
+            lower=initial_built_area,
+        )
+        self.add_monthly_rows(
+            "Used_Area_Upperbound", months, [("used_area", 0, 1)], upper=built_area
+        )
+
+        first_month = months[:1]
+        self.add_monthly_equality_rows(
+            "Seaweed_Wet_On_Farm",
+            first_month,
+            [("seaweed_wet_on_farm", 0, 1)],
+            initial_seaweed,
+        )
+        self.add_monthly_equality_rows(
+            "Used_Area", first_month, [("used_area", 0, 1)], initial_built_area
+        )
+        for prefix in ["Seaweed_To_Humans", "Seaweed_Feed", "Seaweed_Biofuel"]:
+            self.add_monthly_equality_rows(
+                prefix, first_month, [(prefix.lower(), 0, 1)]
+            )
+
+        later_months = months[1:]
+        growth_rate = (
+            np.asarray(self.time_consts["growth_rates_monthly"], dtype=float)[
+                later_months
+            ]
+            / 100.0
+        )
+        area_loss = consts["MINIMUM_DENSITY"] * consts["HARVEST_LOSS"] / 100.0
+        self.add_monthly_equality_rows(
+            "Seaweed_Wet_On_Farm",
+            later_months,
+            [
+                ("seaweed_wet_on_farm", 0, 1),
+                ("seaweed_wet_on_farm", -1, -(1 + growth_rate)),
+                (
+                    "seaweed_to_humans",
+                    0,
+                    1 / (1 - consts["SEAWEED_WASTE_RETAIL"] / 100),
+                ),
+                ("seaweed_feed", 0, 1),
+                ("seaweed_biofuel", 0, 1),
+                ("used_area", 0, area_loss),
+                ("used_area", -1, -area_loss),
+            ],
+        )
+
+    def add_outdoor_crops_rows(self):
+        consts = self.consts_for_optimizer
+        months = self.months
+        waste = 1 / (1 - consts["CROP_WASTE_RETAIL"] / 100)
+
+        self.add_monthly_equality_rows(
+            "Crops_Food_Consumed",
+            months,
+            [
+                ("crops_food_consumed", 0, 1),
+                ("crops_food_to_humans", 0, -waste),
+                ("crops_food_biofuel", 0, -1),
+                ("crops_food_feed", 0, -1),
+            ],
+        )
+
+        use_relocated_crops = consts["inputs"]["OG_USE_BETTER_ROTATION"]
+        initial_harvest_duration = (
+            consts["INITIAL_HARVEST_DURATION_IN_MONTHS"]
+            + consts["DELAY"]["ROTATION_CHANGE_IN_MONTHS"]
+        )
+        fat_multiplier, protein_multiplier = self.get_crops_nutrient_multipliers()
+
+        include_fat = consts["inputs"]["INCLUDE_FAT"]
+        include_protein = consts["inputs"]["INCLUDE_PROTEIN"]
+        protein_months = months if include_protein else months[:0]
+        if include_fat and include_protein:
+            # the optimizer keys the nutrients by their multiplier, so in a month where
+            # fat and protein have the same multiplier only the fat rows are added
+            protein_months = months[fat_multiplier != protein_multiplier]
+        fat_months = months if include_fat else months[:0]
+
+        for nutrient, nutrient_months, multiplier in [
+            ("_Protein", protein_months, protein_multiplier),
+            ("_Fat", fat_months, fat_multiplier),
+        ]:
+            lowercase_nutrient = nutrient.lower()
+            self.add_monthly_equality_rows(
+                "Crops_Food_Consumed" + nutrient,
+                nutrient_months,
+                [
+                    ("crops_food_consumed" + lowercase_nutrient, 0, 1),
+                    ("crops_food_to_humans" + lowercase_nutrient, 0, -waste),
+                    ("crops_food_biofuel" + lowercase_nutrient, 0, -1),
+                    ("crops_food_feed" + lowercase_nutrient, 0, -1),
+                ],
+            )
+            for usage_type in ["_Feed", "_Biofuel"]:
+                lowercase_usage_type = usage_type.lower()
+                self.add_monthly_equality_rows(
+                    "Crops_Food_Eaten_Conversion" + usage_type + nutrient,
+                    nutrient_months,
+                    [
+                        (
+                            "crops_food" + lowercase_usage_type + lowercase_nutrient,
+                            0,
+                            1,
+                        ),
+                        (
+                            "crops_food" + lowercase_usage_type,
+                            0,
+                            -multiplier[nutrient_months],
+                        ),
+                    ],
+                )
+
+        production = self.get_monthly(
+            self.time_consts["outdoor_crops"].production.kcals
+        )
+        self.add_monthly_equality_rows(
+            "Crops_Food_Storage",
+            months[:1],
+            [("crops_food_storage", 0, 1), ("crops_food_consumed", 0, 1)],
+            production[:1],
+        )
+        self.add_monthly_equality_rows(
+            "Crops_Food_Storage",
+            months[1:],
+            [
+                ("crops_food_storage", 0, 1),
+                ("crops_food_storage", -1, -1),
+                ("crops_food_consumed", 0, 1),
+            ],
+            production[1:],
+        )
+
+        last_month = months[1:][-1:]
+        if use_relocated_crops and len(last_month) > 0:
+            assert (
+                last_month[0] > initial_harvest_duration
+            ), """ERROR: In relocated case, you need to have a scenario at least 1 harvest duration long.
+                Right now it is this many months for harvest duration:""" + str(
+                initial_harvest_duration
+            )
+        # if we're not optimizing to maximize animal feed, then make sure all stored crop food is used
+        if self.optimization_type != "to_animals":
+            self.add_monthly_equality_rows(
+                "Crops_Food_None_Left", last_month, [("crops_food_storage", 0, 1)]
+            )
+
+    def get_crops_nutrient_multipliers(self):
+        """
+        Returns the fraction of outdoor crop kcals that becomes fat and protein in each
+        month (the rotation fractions once relocated crops are harvested).
+        """
+        consts = self.consts_for_optimizer
+        initial_harvest_duration = (
+            consts["INITIAL_HARVEST_DURATION_IN_MONTHS"]
+            + consts["DELAY"]["ROTATION_CHANGE_IN_MONTHS"]
+        )
+        rotated = np.logical_and(
+            consts["inputs"]["OG_USE_BETTER_ROTATION"],
+            self.months >= initial_harvest_duration,
+        )
+        fat_multiplier = np.where(
+            rotated, consts["OG_ROTATION_FRACTION_FAT"], consts["OG_FRACTION_FAT"]
+        )
+        protein_multiplier = np.where(
+            rotated,
+            consts["OG_ROTATION_FRACTION_PROTEIN"],
+            consts["OG_FRACTION_PROTEIN"],
+        )
+        return fat_multiplier, protein_multiplier
+
+    def add_stored_food_rows(self):
+        consts = self.consts_for_optimizer
+        months = self.months
+        max_kcals = consts["stored_food"].initial_available.kcals
+
+        self.add_monthly_equality_rows(
+            "Stored_Food_Start", months[:1], [("stored_food_start", 0, 1)], max_kcals
+        )
+        self.add_monthly_equality_rows(
+            "Stored_Food_Start",
+            months[1:],
+            [("stored_food_start", 0, 1), ("stored_food_end", -1, -1)],
+        )
+
+        if consts["STORE_FOOD_BETWEEN_YEARS"]:
+            eaten_months = months
+            # be sure to eat all the stored food by the end, unless you are optimizing to animals
+            if self.optimization_type != "to_animals":
+                self.add_monthly_equality_rows(
+                    "Stored_Food_End", months[1:][-1:], [("stored_food_end", 0, 1)]
+                )
+        else:
+            # stored food can only be used in the first year
+            eaten_months = months[months <= 12]
+            for prefix in [
+                "Stored_Food_To_Humans",
+                "Stored_Food_Feed",
+                "Stored_Food_Biofuel",
+            ]:
+                self.add_monthly_equality_rows(
+                    prefix, months[months > 12], [(prefix.lower(), 0, 1)]
+                )
+
+        self.add_monthly_equality_rows(
+            "Stored_Food_Eaten",
+            eaten_months,
+            [
+                ("stored_food_end", 0, 1),
+                ("stored_food_start", 0, -1),
+                (
+                    "stored_food_to_humans",
+                    0,
+                    1 / (1 - consts["STORED_FOOD_WASTE_RETAIL"] / 100),
+                ),
+                ("stored_food_feed", 0, 1),
+                ("stored_food_biofuel", 0, 1),
+            ],
+        )
+
+    def add_meat_rows(self):
+        consts = self.consts_for_optimizer
+        months = self.months
+        waste = 1 / (1 - consts["MEAT_WASTE_RETAIL"] / 100)
+
+        if not consts["STORE_FOOD_BETWEEN_YEARS"]:
+            self.add_monthly_rows(
+                "Meat_Eaten",
+                months,
+                [("meat_eaten", 0, waste)],
+                upper=self.get_monthly(
+                    self.time_consts["each_month_meat_slaughtered"].kcals
+                ),
+            )
+            return
+
+        self.add_monthly_equality_rows(
+            "Meat_Start",
+            months[:1],
+            [("meat_start", 0, 1)],
+            consts["meat_summed_consumption"],
+        )
+        self.add_monthly_equality_rows(
+            "Meat_Start", months[1:], [("meat_start", 0, 1), ("meat_end", -1, -1)]
+        )
+        self.add_monthly_equality_rows(
+            "Meat_Eaten",
+            months,
+            [("meat_end", 0, 1), ("meat_start", 0, -1), ("meat_eaten", 0, waste)],
+        )
+        self.add_monthly_rows(
+            "Meat_Eaten_Maximum",
+            months,
+            [("meat_eaten", 0, waste)],
+            upper=self.get_monthly(
+                self.time_consts["max_consumed_culled_kcals_each_month"]
+            ),
+        )
+
+    def add_methane_scp_rows(self):
+        self.add_monthly_rows(
+            "Methane_SCP",
+            self.months,
+            [
+                (
+                    "methane_scp_to_humans",
+                    0,
+                    1 / (1 - self.consts_for_optimizer["SCP_RETAIL_WASTE"] / 100),
+                ),
+                ("methane_scp_feed", 0, 1),
+                ("methane_scp_biofuel", 0, 1),
+            ],
+            upper=self.get_monthly(self.time_consts["methane_scp"].kcals),
+        )
+
+    def add_cellulosic_sugar_rows(self):
+        self.add_monthly_rows(
+            "Cellulosic_Sugar",
+            self.months,
+            [
+                (
+                    "cellulosic_sugar_to_humans",
+                    0,
+                    1
+                    / (1 - self.consts_for_optimizer["CELL_SUGAR_RETAIL_WASTE"] / 100),
+                ),
+                ("cellulosic_sugar_feed", 0, 1),
+                ("cellulosic_sugar_biofuel", 0, 1),
+            ],
+            upper=self.get_monthly(self.time_consts["cellulosic_sugar"].kcals),
+        )
+
+    def add_predetermined_human_consumption_rows(self, food_name):
+        """
+        Fixes the human consumption of a food to the amount found in the to_humans
+        optimization, within a small tolerance.
+        """
+        constraint_name, variable_key, coefficient = {
+            "outdoor_crops": ("Outdoor_crops", "crops_food_to_humans", 1),
+            "stored_food": ("Stored_food", "stored_food_to_humans", 1),
+            "meat": ("Meat", "meat_eaten", 1),
+            "methane_scp": ("Methane_SCP", "methane_scp_to_humans", 1),
+            "cellulosic_sugar": ("Cellulosic_Sugar", "cellulosic_sugar_to_humans", 1),
+            "seaweed": (
+                "Seaweed",
+                "seaweed_to_humans",
+                self.consts_for_optimizer["SEAWEED_KCALS"],
+            ),
+        }[food_name]
+
+        min_consumption = self.get_monthly(
+            self.time_consts["min_human_food_consumption"][food_name]
+            .in_units_bil_kcals_thou_tons_thou_tons_per_month()
+            .kcals
+        )
+        if self.consts_for_optimizer["POP"] < 1e7:
+            lower_bound = 0.9999 * min_consumption
+            upper_bound = 1.0001 * min_consumption
+        else:
+            lower_bound = 0.99999 * min_consumption
+            upper_bound = 1.00001 * min_consumption
+
+        terms = [(variable_key, 0, coefficient)]
+        self.add_monthly_rows(
+            constraint_name + "_Min_Requirement", self.months, terms, lower=lower_bound
+        )
+        self.add_monthly_rows(
+            constraint_name + "_Max_Requirement", self.months, terms, upper=upper_bound
+        )
+
+    # RESOURCES COMBINED
+
+    def get_nonhuman_terms(self, usage):
+        """
+        Returns (variable key, coefficient) for every food that can be used for
+        the usage ("feed" or "biofuel"), in kcals.
+        """
+        terms = [
+            ("stored_food_" + usage, 1),
+            ("crops_food_" + usage, 1),
+            ("seaweed_" + usage, self.consts_for_optimizer["SEAWEED_KCALS"]),
+            ("cellulosic_sugar_" + usage, 1),
+            ("methane_scp_" + usage, 1),
+        ]
+        return [(key, coefficient) for key, coefficient in terms if self.has(key)]
+
+    def add_feed_biofuel_rows(self):
+        months = self.months
+        for usage, prefix in [("feed", "Feed"), ("biofuel", "Biofuel")]:
+            terms = self.get_nonhuman_terms(usage)
+            if len(terms) == 0:
+                continue
+            if self.optimization_type == "to_humans":
+                self.add_monthly_equality_rows(
+                    prefix + "_Used",
+                    months,
+                    [(key, 0, coefficient) for key, coefficient in terms],
+                    self.get_monthly(self.time_consts[usage].kcals),
+                )
+                continue
+
+            self.add_monthly_rows(
+                prefix + "_Used",
+                months,
+                [(key, 0, coefficient) for key, coefficient in terms],
+                upper=self.get_monthly(
+                    self.time_consts["max_" + usage + "_that_could_be_used"].kcals
+                ),
+            )
+            self.add_monthly_rows(
+                prefix + "_Decreases",
+                months[1:],
+                [(key, -1, coefficient) for key, coefficient in terms]
+                + [(key, 0, -coefficient) for key, coefficient in terms],
+                lower=0,
+            )
+
+    def add_total_human_consumption_rows(self):
+        consts = self.consts_for_optimizer
+        to_percent_fed = 100 / consts["BILLION_KCALS_NEEDED"]
+        terms = [
+            ("stored_food_to_humans", 1),
+            ("crops_food_to_humans", 1),
+            ("seaweed_to_humans", consts["SEAWEED_KCALS"]),
+            ("meat_eaten", 1),
+            ("cellulosic_sugar_to_humans", 1),
+            ("methane_scp_to_humans", 1),
+        ]
+        fixed_kcals = (
+            self.get_monthly(self.time_consts["milk_kcals"])
+            + self.get_monthly(self.time_consts["greenhouse_crops"].kcals)
+            + self.get_monthly(self.time_consts["fish"].to_humans.kcals)
+        )
+        self.add_monthly_equality_rows(
+            "Kcals_Fed_Month",
+            self.months,
+            [("consumed_kcals", 0, 1)]
+            + [
+                (key, 0, -coefficient * to_percent_fed)
+                for key, coefficient in terms
+                if self.has(key)
+            ],
+            fixed_kcals * to_percent_fed,
+        )
+
+    def add_percentage_intake_rows(self):
+        consts = self.consts_for_optimizer
+        months = self.months
+        initial_population_minimum_needs = (
+            consts["POP"] * consts["KCALS_MONTHLY"] / 1e9
+        )  # Billion kcals
+
+        for food_name, kcal_to_nutrient_ratio in [
+            ("Seaweed", consts["SEAWEED_KCALS"]),
+            ("Methane_SCP", 1),
+            ("Cellulosic_Sugar", 1),
+        ]:
+            if not consts["ADD_" + food_name.upper()]:
+                continue
+
+            def max_fraction(constraint_type):
+                return (
+                    consts["inputs"][
+                        "MAX_"
+                        + food_name.upper()
+                        + "_AS_PERCENT_KCALS_"
+                        + constraint_type
+                    ]
+                    / 100
+                )
+
+            if self.optimization_type == "to_humans":
+                terms = [(food_name.lower() + "_to_humans", 0, kcal_to_nutrient_ratio)]
+                self.add_monthly_rows(
+                    food_name + "_Limit_HUMANS",
+                    months,
+                    terms,
+                    upper=max_fraction("HUMANS") * initial_population_minimum_needs,
+                )
+                self.add_monthly_rows(
+                    food_name + "_Limit_Reduced_Population_HUMANS",
+                    months,
+                    terms
+                    + [
+                        (
+                            "consumed_kcals",
+                            0,
+                            -max_fraction("HUMANS")
+                            * consts["BILLION_KCALS_NEEDED"]
+                            / 100,
+                        )
+                    ],
+                    upper=0,
+                )
+
+            for constraint_type, usage in [("FEED", "feed"), ("BIOFUEL", "biofuel")]:
+                self.add_monthly_rows(
+                    food_name + "_Limit_" + constraint_type,
+                    months,
+                    [(food_name.lower() + "_" + usage, 0, kcal_to_nutrient_ratio)],
+                    upper=max_fraction(constraint_type)
+                    * self.get_monthly(self.time_consts[usage].kcals),
+                )
+
+    # OBJECTIVES
+
+    def add_maximize_min_month_objective_rows(self):
+        nutrients = [("Kcals", "consumed_kcals")]
+        if self.consts_for_optimizer["inputs"]["INCLUDE_FAT"]:
+            nutrients.append(("Fat", "consumed_fat"))
+        if self.consts_for_optimizer["inputs"]["INCLUDE_PROTEIN"]:
+            nutrients.append(("Protein", "consumed_protein"))
+
+        for nutrient, key in nutrients:
+            self.add_monthly_rows(
+                nutrient + "_Fed_Month",
+                self.months,
+                [("objective_function", 0, 1), (key, 0, -1)],
+                upper=0,
+                suffix="Objective_Constraint",
+            )
+
+    def add_maximize_sum_total_feed_used_by_animals_rows(self):
+        # the objective is at most two thirds of the feed summed over all months plus a
+        # third of the biofuel summed over all months
+        columns = [self.columns["objective_function"][:1]]
+        coefficients = [np.ones(1)]
+        for usage, weight in [("feed", 2 / 3), ("biofuel", 1 / 3)]:
+            for key, coefficient in self.get_nonhuman_terms(usage):
+                columns.append(self.columns[key])
+                coefficients.append(np.full(self.NMONTHS, -weight * coefficient))
+        self.values.append(np.concatenate(coefficients))
+        if self.template is None:
+            columns = np.concatenate(columns)
+            self.row_indices.append(np.full(len(columns), self.n_rows))
+            self.col_indices.append(columns)
+            self.row_names.append(
+                "Nonhuman_Consumption_All_Months_Objective_Constraint"
+            )
+        self.row_lower.append(np.array([-np.inf]))
+        self.row_upper.append(np.array([0.0]))
+        self.n_rows += 1
@@ -5,9 +5,13 @@ over time including models for traditional and resilient foods.
 """
 
 import sys
-import pulp
 import json
-from pulp import LpMaximize, LpMinimize, LpProblem, LpVariable
+import time
+import numpy as np
+from pulp import LpMaximize, LpMinimize, LpProblem, LpStatus, LpVariable
+from src.optimizer.lexicographic_solver import LexicographicSolver
+from src.optimizer.lp_matrix_builder import LPMatrixBuilder
+from src.optimizer.solver_backends import DEFAULT_SOLVER_BACKEND, get_solver_backend
 
 
 class Optimizer:
@@ -29,6 +33,20 @@ class Optimizer:
         # Set the number of months as an instance variable
         self.NMONTHS = consts_for_optimizer["NMONTHS"]
 
+        # Choose the solver backend used for every solve (CBC unless specified)
+        self.solver_backend = get_solver_backend(
+            consts_for_optimizer["inputs"].get("SOLVER", DEFAULT_SOLVER_BACKEND)
+        )
+
+        # One record of timings, sizes and results for every solve, see solve_model
+        self.solve_records = []
+
+        # The model in matrix form and the variable of each column, when it is
+        # passed to the solver directly
+        self.linear_program = None
+        self.linear_program_variables = None
+        self.linear_program_columns = None
+
         # Load the variable names and prefixes as instance variables
         self.initial_variables = self.load_variable_names_and_prefixes()
 
@@ -275,6 +293,18 @@ class Optimizer:
         - `maximize_constraints`: A list of the objective functions added to the model, used for validation purposes.
         """
         self.optimization_type = optimization_type  # stored food isn't forced to be entirely consumed in to_animals
+        self.stage_start_time = time.perf_counter()  # building counts towards stage 1
+
+        # backends that keep the model live in the solver are given the constraints as
+        # sparse matrices, which is much faster than building them with PuLP
+        if self.solver_backend.supports_warm_start:
+            return self.add_linear_program_to_model(
+                model, variables, consts_for_optimizer, optimization_type
+            )
+        self.linear_program = None
+        self.linear_program_variables = None
+        self.linear_program_columns = None
+
         for key, resource in self.resource_constants.items():
             if consts_for_optimizer[key]:  # if ADD_[resource name] is true...
                 prefixes = resource["prefixes"]
@@ -329,8 +359,105 @@ class Optimizer:
             sys.exit()
         model += variables["objective_function"]
 
+        # Set this to True to check the model against the same model assembled as
+        # sparse matrices by LPMatrixBuilder
+        CROSS_CHECK_LP_MATRIX_FLAG = False
+        if CROSS_CHECK_LP_MATRIX_FLAG:
+            LPMatrixBuilder(self).cross_check(model, optimization_type)
+
+        return model, variables, maximize_constraints
+
+    def add_linear_program_to_model(
+        self, model, variables, consts_for_optimizer, optimization_type
+    ):
+        """
+        Creates the same variables as add_variables_and_constraints_to_model, but
+        assembles the constraints as sparse matrices with LPMatrixBuilder instead of
+        adding them to the PuLP model. The matrices are passed to the solver in
+        run_optimizations_on_constraints. The PuLP model only holds the objective and
+        the constraints added by the later optimization stages.
+
+        Returns:
+            list: the model, the variables and the names of the objective constraints
+        """
+        for key, resource in self.resource_constants.items():
+            if consts_for_optimizer[key]:
+                variables = self.add_variable_from_prefixes(
+                    variables, resource["prefixes"]
+                )
+        if optimization_type == "to_humans":
+            for month in range(0, self.NMONTHS):
+                variables = self.add_human_consumption_variables(variables, month)
+
+        builder = LPMatrixBuilder(self)
+        self.linear_program = builder.build(optimization_type)
+        self.linear_program_columns = builder.columns
+        maximize_constraints = [
+            name
+            for name in self.linear_program.row_names
+            if name.endswith("_Objective_Constraint")
+        ]
+
+        variables_by_name = self.get_variables_by_name(variables)
+        self.linear_program_variables = [
+            variables_by_name[name] for name in self.linear_program.col_names
+        ]
+
+        # PuLP only knows about variables that appear in the model, so register the
+        # ones that appear in the matrix (for extracting and validating the results)
+        used_columns = np.diff(self.linear_program.matrix.tocsc().indptr) > 0
+        model.addVariables(
+            [
+                variable
+                for variable, used in zip(self.linear_program_variables, used_columns)
+                if used
+            ]
+        )
+
+        model += variables["objective_function"]
         return model, variables, maximize_constraints
 
+    def get_solution(self, variables):
+        """
+        Returns the values of every variable family in the last solve, keyed like the
+        variables dictionary, as an array with one value per month. Families that were
+        not modeled are left out.
+
+        When the model was passed to the solver as matrices, the whole solution is
+        read from the solver at once and each family is a slice of it. Otherwise each
+        variable's value is read from PuLP.
+        """
+        solution_vector = None
+        if self.linear_program is not None:
+            solution_vector = self.lexicographic_solver.get_solution_vector()
+
+        solution = {}
+        if solution_vector is not None:
+            for key, columns in self.linear_program_columns.items():
+                if key == "objective_function":
+                    continue
+                # the months of a family are consecutive columns
+                solution[key] = solution_vector[columns[0] : columns[-1] + 1]
+            return solution
+
+        for key, value in variables.items():
+            if isinstance(value, list) and isinstance(value[0], LpVariable):
+                solution[key] = np.array(
+                    [variable.varValue for variable in value], dtype=float
+                )
+        return solution
+
+    def get_variables_by_name(self, variables):
+        """
+        Returns every PuLP variable in the variables dictionary, by name.
+        """
+        variables_by_name = {}
+        for value in variables.values():
+            for variable in value if isinstance(value, list) else [value]:
+                if isinstance(variable, LpVariable):
+                    variables_by_name[variable.name] = variable
+        return variables_by_name
+
     def add_resource_specific_conditions_to_model(
         self, model, variables, month, optimization_type, func, food_name
     ):
@@ -392,15 +519,41 @@ class Optimizer:
                 " variable definitions."
             )
             print(model)
+
+        # Every stage below adds to this same model, which stays live in the solver
+        # between stages when the solver backend supports warm starts.
+        # Set this to True to also start each stage from the previous stage's basis
+        # (fewer simplex iterations, but slower overall as the model isn't presolved)
+        REUSE_BASIS_FLAG = False
+        self.lexicographic_solver = LexicographicSolver(
+            model, self.solver_backend, reuse_basis=REUSE_BASIS_FLAG
+        )
+        if self.linear_program is not None:
+            self.lexicographic_solver.add_linear_program(
+                self.linear_program, self.linear_program_variables
+            )
+
         # Solve the initial model
-        status = model.solve(
-            pulp.PULP_CBC_CMD(gapRel=0.00001, msg=PRINT_PULP_MESSAGES_FLAG)
+        status = self.solve_model(
+            model,
+            gap_rel=0.00001,
+            msg=PRINT_PULP_MESSAGES_FLAG,
+            stage="max-min" if optimization_type == "to_humans" else "max-feed",
         )
 
         # Assert that the optimization was successful
         ASSERT_SUCCESSFUL_OPTIMIZATION_FLAG = True
         if ASSERT_SUCCESSFUL_OPTIMIZATION_FLAG:
-            if status != 1:
+            if status != 1 and self.linear_program is not None:
+                # the constraints are only in the solver, not in the PuLP model
+                print("")
+                print("")
+                self.lexicographic_solver.highs.writeModel("model.mps")
+                print(
+                    f'model failed when running country {consts_for_optimizer["inputs"]["COUNTRY_CODE"]}! '
+                    "Saving the model as model.mps in root dir."
+                )
+            elif status != 1:
                 data = model.to_dict()
                 print("")
                 print("")
@@ -481,6 +634,53 @@ class Optimizer:
             )
         return percent_fed_from_first_optimization
 
+    def solve_model(self, model, gap_rel, msg=False, stage=""):
+        """
+        Solves the model with the solver backend chosen for this optimizer. The model
+        must be the one passed to run_optimizations_on_constraints, so that each stage
+        can continue from the solution of the previous one.
+
+        A record of the solve is added to solve_records: the country, stage, size of
+        the model, the time spent building the stage (since the previous solve, or
+        since the model was started) and solving it, the simplex iterations (if the
+        solver reports them), the status and the objective.
+
+        Args:
+            model (pulp.LpProblem): The model to solve.
+            gap_rel (float): The relative gap tolerance passed to the solver.
+            msg (bool): Whether to print the solver output.
+            stage (str): The name of the stage being solved, for the solve record.
+
+        Returns:
+            int: The PuLP status of the solve (1 if the optimization succeeded).
+        """
+        assert (
+            model is self.lexicographic_solver.model
+        ), "ERROR: only the model being optimized in stages can be solved"
+
+        solve_start_time = time.perf_counter()
+        status = self.lexicographic_solver.solve(gap_rel, msg)
+        solve_end_time = time.perf_counter()
+
+        n_variables, n_constraints = self.lexicographic_solver.get_model_size()
+        self.solve_records.append(
+            {
+                "country": self.consts_for_optimizer["inputs"]["COUNTRY_CODE"],
+                "optimization_type": self.optimization_type,
+                "stage": stage,
+                "solver": self.solver_backend.name,
+                "n_variables": n_variables,
+                "n_constraints": n_constraints,
+                "build_time": solve_start_time - self.stage_start_time,
+                "solve_time": solve_end_time - solve_start_time,
+                "iterations": self.lexicographic_solver.iterations,
+                "status": LpStatus[status],
+                "objective": model.objective.value(),
+            }
+        )
+        self.stage_start_time = solve_end_time
+        return status
+
     def constrain_next_optimization_to_have_same_total_resilient_foods_in_feed(
         self, model_max_to_humans, variables
     ):
@@ -721,8 +921,10 @@ class Optimizer:
         # Set the objective of the model to the objective function variable
         model_max_to_humans.setObjective(variables["objective_function_best_to_humans"])
 
-        # Solve the model using the PULP_CBC_CMD solver
-        status = model_max_to_humans.solve(pulp.PULP_CBC_CMD(gapRel=0.0001, msg=False))
+        # Solve the model using the chosen solver backend
+        status = self.solve_model(
+            model_max_to_humans, gap_rel=0.0001, stage="best-foods"
+        )
         if ASSERT_SUCCESSFUL_OPTIMIZATION:
             # Check if optimization was successful
             assert (
@@ -753,8 +955,9 @@ class Optimizer:
             tuple: A tuple containing the optimized model and the updated variables dictionary.
         """
 
-        # Create a copy of the model to optimize
-        model_smoothing = model.copy()
+        # The smoothing stage is added to the same model rather than a copy, so the
+        # solver can continue from the previous stage
+        model_smoothing = model
 
         # Set the sense of the model to minimize
         model_smoothing.sense = LpMinimize
@@ -950,8 +1153,8 @@ class Optimizer:
         # Set the objective of the model to the smoothing objective function
         model_smoothing.setObjective(smoothing_obj)
 
-        # Solve the model using the PULP_CBC_CMD solver
-        status = model_smoothing.solve(pulp.PULP_CBC_CMD(gapRel=0.0001, msg=False))
+        # Solve the model using the chosen solver backend
+        status = self.solve_model(model_smoothing, gap_rel=0.0001, stage="smoothing")
 
         # Assert if optimization was successful
         if ASSERT_SUCCESSFUL_OPTIMIZATION:
@@ -1383,15 +1586,7 @@ class Optimizer:
         """
 
         # Add variables for consumed kcals, fat, and protein
-        variables["consumed_kcals"][month] = LpVariable(
-            name="Humans_Fed_Kcals_" + str(month) + "_Variable", lowBound=0
-        )
-        variables["consumed_fat"][month] = LpVariable(
-            name="Humans_Fed_Fat_" + str(month) + "_Variable", lowBound=0
-        )
-        variables["consumed_protein"][month] = LpVariable(
-            name="Humans_Fed_Protein_" + str(month) + "_Variable", lowBound=0
-        )
+        variables = self.add_human_consumption_variables(variables, month)
 
         # Add constraint for consumed kcals
         model += (
@@ -1415,6 +1610,22 @@ class Optimizer:
 
         return model, variables
 
+    def add_human_consumption_variables(self, variables, month):
+        """
+        Adds the variables for the percent of humans fed by kcals, fat and protein in
+        the month.
+        """
+        variables["consumed_kcals"][month] = LpVariable(
+            name="Humans_Fed_Kcals_" + str(month) + "_Variable", lowBound=0
+        )
+        variables["consumed_fat"][month] = LpVariable(
+            name="Humans_Fed_Fat_" + str(month) + "_Variable", lowBound=0
+        )
+        variables["consumed_protein"][month] = LpVariable(
+            name="Humans_Fed_Protein_" + str(month) + "_Variable", lowBound=0
+        )
+        return variables
+
     def add_maximize_min_month_objective_to_model(
         self, model, variables, month, maximize_constraints
     ):
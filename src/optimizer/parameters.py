@@ -10,6 +10,7 @@
 #      it assigns the returned values to the constants.
 import numpy as np
 import copy
+import pickle
 from src.food_system.meat_and_dairy import MeatAndDairy
 from src.food_system.outdoor_crops import OutdoorCrops
 from src.food_system.seafood import Seafood
@@ -25,6 +26,10 @@ from src.optimizer.validate_results import Validator
 
 
 class Parameters:
+    # Set to True to check that no round of optimization changes the static inputs
+    # shared by the rounds (see compute_static_inputs)
+    ASSERT_STATIC_INPUTS_UNCHANGED = False
+
     def __init__(self):
         """
         Initializes the class instance with default values for the simulation starting month and a dictionary of months
@@ -85,6 +90,62 @@ class Parameters:
         # Ensure every parameter has been initialized for the scenarios_loader
         scenarios_loader.check_all_set()
 
+        # The food produced by each food source, which is the same in every round
+        self.static_inputs = self.compute_static_inputs(
+            constants_inputs, time_consts_inputs
+        )
+        if Parameters.ASSERT_STATIC_INPUTS_UNCHANGED:
+            self.static_inputs_snapshot = pickle.dumps(self.static_inputs)
+
+        # The first round adds the meat and dairy from breeding to the static inputs
+        constants_out = dict(self.static_inputs["constants_out"])
+        time_consts = dict(self.static_inputs["time_consts"])
+
+        # Initialize meat and dairy, feed and biofuels from breeding and subtract feed biofuels
+        (
+            constants_out,
+            time_consts,
+            feed_biofuels_class,  # zero feed, zero biofuel
+            biofuels_demand,  # biofuels requested by the user
+            feed_demand,  # feed requested by the user
+            meat_dictionary_round1,  # meat if no feed were available
+            feed_meat_object_round1,
+        ) = self.init_meat_and_dairy_and_feed_from_breeding_and_subtract_feed_biofuels_round1(
+            constants_out,
+            constants_inputs,
+            time_consts,
+        )
+
+        # Set inputs in constants_out
+        constants_out["inputs"] = constants_inputs
+
+        self.assert_static_inputs_unchanged()
+
+        return (
+            constants_out,
+            time_consts,
+            feed_biofuels_class,  # zero feed, zero biofuel
+            biofuels_demand,  # biofuels requested by the user
+            feed_demand,  # feed requested by the user
+            meat_dictionary_round1,
+            feed_meat_object_round1,
+        )
+
+    def compute_static_inputs(self, constants_inputs, time_consts_inputs):
+        """
+        Computes the parameters which are the same in every round of optimization: the
+        food produced by each food source, the feed and biofuels requested by the user,
+        and the grasses and meat nutrition of the animals. These are computed once for
+        the country in the first round and shared by all the rounds, which add the
+        meat, dairy, feed and biofuels of that round to copies of the dictionaries.
+
+        Args:
+            constants_inputs (dict): A dictionary containing the constant inputs for the model.
+            time_consts_inputs (dict): A dictionary containing the time dependent inputs.
+
+        Returns:
+            dict: the static inputs, which must not be changed by any round
+        """
         # Time dependent constants_out as inputs to the optimizer
         time_consts = {}
 
@@ -134,32 +195,78 @@ class Parameters:
             constants_out, constants_inputs, outdoor_crops
         )
 
-        # Initialize meat and dairy, feed and biofuels from breeding and subtract feed biofuels
+        feed_and_biofuels_class = FeedAndBiofuels(constants_inputs)
         (
-            constants_out,
-            time_consts,
-            feed_biofuels_class,  # zero feed, zero biofuel
-            biofuels_demand,  # biofuels requested by the user
-            feed_demand,  # feed requested by the user
-            meat_dictionary_round1,  # meat if no feed were available
-            feed_meat_object_round1,
-        ) = self.init_meat_and_dairy_and_feed_from_breeding_and_subtract_feed_biofuels_round1(
-            constants_out,
-            constants_inputs,
-            time_consts,
+            biofuels_demand,
+            feed_demand,
+        ) = feed_and_biofuels_class.get_biofuels_and_feed_from_delayed_shutoff(
+            constants_inputs
         )
 
-        # Set inputs in constants_out
-        constants_out["inputs"] = constants_inputs
+        meat_and_dairy = Parameters.get_meat_and_dairy(constants_inputs)
 
-        return (
-            constants_out,
-            time_consts,
-            feed_biofuels_class,  # zero feed, zero biofuel
-            biofuels_demand,  # biofuels requested by the user
-            feed_demand,  # feed requested by the user
-            meat_dictionary_round1,
-            feed_meat_object_round1,
+        return {
+            "constants_out": constants_out,
+            "time_consts": time_consts,
+            "inputs": constants_inputs,
+            "feed_and_biofuels": feed_and_biofuels_class,
+            "biofuels_demand": biofuels_demand,  # biofuels requested by the user
+            "feed_demand": feed_demand,  # feed requested by the user
+            "meat_and_dairy": meat_and_dairy,
+        }
+
+    def get_meat_and_dairy(constants_inputs):
+        """
+        Returns the MeatAndDairy of the country, with the grasses available to the
+        animals and the nutrition of their meat.
+        """
+        meat_and_dairy = MeatAndDairy(constants_inputs)
+        meat_and_dairy.initialize_this_country_animal_kcals(constants_inputs)
+        meat_and_dairy.calculate_meat_nutrition()
+        return meat_and_dairy
+
+    def get_feed_and_meat_inputs_round1(constants_inputs, meat_and_dairy, zero_feed):
+        """
+        Returns the inputs of CalculateFeedAndMeat in the first round of optimization,
+        where no feed is given to the animals. A world run calculates the first round
+        of its countries together with these inputs before the countries are run (see
+        ScenarioRunnerNoTrade.calculate_feed_and_meat_round1), so that the first round
+        of each country finds its animals in the cache of CalculateFeedAndMeat.
+        """
+        return dict(
+            country_code=constants_inputs["COUNTRY_CODE"],
+            available_feed=zero_feed,
+            available_grass=meat_and_dairy.human_inedible_feed,
+            scenario=constants_inputs["BREEDING_STRATEGY"],  # tries to reduce breeding
+            kcals_per_head_meat_dict=meat_and_dairy.kcals_per_head_meat_dict,
+            constants_inputs=constants_inputs,
+        )
+
+    def copy_constants_of_first_round(self, constants_out_round1, time_consts_round1):
+        """
+        Copies the constants of the first round, for a later round to change. The
+        static inputs in them are shared rather than copied, as no round changes them.
+        """
+        static_values = [self.static_inputs["inputs"]]
+        static_values += list(self.static_inputs["constants_out"].values())
+        static_values += list(self.static_inputs["time_consts"].values())
+        shared = {id(value): value for value in static_values}
+
+        # copy.deepcopy returns the objects in its memo as they are
+        constants_out = copy.deepcopy(constants_out_round1, dict(shared))
+        time_consts = copy.deepcopy(time_consts_round1, dict(shared))
+        return constants_out, time_consts
+
+    def assert_static_inputs_unchanged(self):
+        """
+        If ASSERT_STATIC_INPUTS_UNCHANGED is set, checks that the static inputs are the
+        same as when they were computed in the first round.
+        """
+        if not Parameters.ASSERT_STATIC_INPUTS_UNCHANGED:
+            return
+        assert pickle.dumps(self.static_inputs) == self.static_inputs_snapshot, (
+            "ERROR: the static inputs shared by the rounds of optimization have been "
+            "changed"
         )
 
     def get_second_round_kcals_with_redistributed_meat(
@@ -268,15 +375,11 @@ class Parameters:
         constants_inputs,
         time_consts,
     ):
-        # Initialize FeedAndBiofuels and MeatAndDairy objects
-        feed_and_biofuels_class = FeedAndBiofuels(constants_inputs)
-
-        (
-            biofuels_demand,
-            feed_demand,
-        ) = feed_and_biofuels_class.get_biofuels_and_feed_from_delayed_shutoff(
-            constants_inputs
-        )
+        # The feed and biofuels requested by the user and the meat and dairy are static.
+        # Each round sets the feed and biofuels it uses on its own copy.
+        feed_and_biofuels_class = copy.copy(self.static_inputs["feed_and_biofuels"])
+        biofuels_demand = self.static_inputs["biofuels_demand"]
+        feed_demand = self.static_inputs["feed_demand"]
 
         # The first round of optimizations both calculates the maximum food animals could use,
         # based on the delayed shutoff from the scenario and the baseline feed usage,
@@ -301,18 +404,12 @@ class Parameters:
             protein_units=biofuels_demand.protein_units,
         )
 
-        meat_and_dairy = MeatAndDairy(constants_inputs)
-
-        grasses_for_animals = meat_and_dairy.human_inedible_feed
+        meat_and_dairy = self.static_inputs["meat_and_dairy"]
 
-        meat_and_dairy.initialize_this_country_animal_kcals(constants_inputs)
         feed_meat_object_round1 = CalculateFeedAndMeat(
-            country_code=constants_inputs["COUNTRY_CODE"],
-            available_feed=zero_feed,
-            available_grass=grasses_for_animals,
-            scenario=constants_inputs["BREEDING_STRATEGY"],  # tries to reduce breeding
-            kcals_per_head_meat_dict=meat_and_dairy.kcals_per_head_meat_dict,
-            constants_inputs=constants_inputs,
+            **Parameters.get_feed_and_meat_inputs_round1(
+                constants_inputs, meat_and_dairy, zero_feed
+            )
         )
         # MEAT AND DAIRY from breeding reduction strategy
 
@@ -1094,20 +1191,18 @@ class Parameters:
         available for animals after humans have used all they need for their minimum nutritional needs.
 
         """
-        time_consts_round2 = copy.deepcopy(time_consts_round1)
-        constants_out_round2 = copy.deepcopy(constants_out_round1)
-        feed_and_biofuels_class = FeedAndBiofuels(constants_inputs)
+        self.assert_static_inputs_unchanged()
         (
-            biofuels_demand,
-            feed_demand,
-        ) = feed_and_biofuels_class.get_biofuels_and_feed_from_delayed_shutoff(
-            constants_inputs
-        )
+            constants_out_round2,
+            time_consts_round2,
+        ) = self.copy_constants_of_first_round(constants_out_round1, time_consts_round1)
+        feed_and_biofuels_class = copy.copy(self.static_inputs["feed_and_biofuels"])
+        biofuels_demand = self.static_inputs["biofuels_demand"]
+        feed_demand = self.static_inputs["feed_demand"]
 
-        meat_and_dairy = MeatAndDairy(constants_inputs)
+        meat_and_dairy = self.static_inputs["meat_and_dairy"]
         grasses_for_animals = meat_and_dairy.human_inedible_feed
 
-        meat_and_dairy.initialize_this_country_animal_kcals(constants_inputs)
         feed_meat_object_second_round = CalculateFeedAndMeat(
             country_code=constants_inputs["COUNTRY_CODE"],
             available_feed=feed_demand,
@@ -1236,6 +1331,9 @@ class Parameters:
             print("END MINIMUM HUMAN NEEDS PRINTOUT")
             print("")
             print("")
+
+        self.assert_static_inputs_unchanged()
+
         return (
             constants_out_round2,
             time_consts_round2,
@@ -1300,162 +1398,41 @@ class Parameters:
             protein_units="effective kcals per person per day",
         )
 
-        # Initialize arrays to store the monthly consumption for each type of food
-        fish_consumption = []
-        meat_consumption = []
-        dairy_consumption = []
-        greenhouse_consumption = []
-        outdoor_crops_consumption = []
-        stored_food_consumption = []
-        scp_consumption = []
-        cs_consumption = []
-        seaweed_consumption = []
-
-        for month_index in range(0, constants_inputs["NMONTHS"]):
-            remaining_kcals = food_daily_maximum.kcals
-
-            # Function to calculate consumption for each food type
-            def consume(food_kcals):
-                nonlocal remaining_kcals
-                consumed = min(food_kcals, remaining_kcals)
-                remaining_kcals -= consumed
-                return consumed
-
-            # Calculate consumption for each food type following the order of preference
-            fish_consumption.append(
-                consume(
-                    interpreted_results_round1.fish_kcals_equivalent[month_index].kcals
-                )
-            )
-            meat_consumption.append(
-                consume(
-                    interpreted_results_round1.meat_kcals_equivalent[month_index].kcals
-                )
-            )
-            dairy_consumption.append(
-                consume(
-                    interpreted_results_round1.milk_kcals_equivalent[month_index].kcals
-                )
-            )
-            greenhouse_consumption.append(
-                consume(
-                    interpreted_results_round1.greenhouse_kcals_equivalent[
-                        month_index
-                    ].kcals
-                )
-            )
-            outdoor_crops_consumption.append(
-                consume(
-                    interpreted_results_round1.immediate_outdoor_crops_kcals_equivalent[
-                        month_index
-                    ].kcals
-                    + interpreted_results_round1.new_stored_outdoor_crops_kcals_equivalent[
-                        month_index
-                    ].kcals
-                )
-            )
-            stored_food_consumption.append(
-                consume(
-                    interpreted_results_round1.stored_food_kcals_equivalent[
-                        month_index
-                    ].kcals
-                )
-            )
-            scp_consumption.append(
-                consume(
-                    interpreted_results_round1.scp_kcals_equivalent[month_index].kcals
-                )
-            )
-            cs_consumption.append(
-                consume(
-                    interpreted_results_round1.cell_sugar_kcals_equivalent[
-                        month_index
-                    ].kcals
-                )
-            )
-            seaweed_consumption.append(
-                consume(
-                    interpreted_results_round1.seaweed_kcals_equivalent[
-                        month_index
-                    ].kcals
-                )
-            )
-
-        # Convert lists to numpy arrays and create the dictionary
-        human_food_consumption = {
-            "fish": Food(
-                kcals=fish_consumption,
-                fat=np.zeros_like(fish_consumption),
-                protein=np.zeros_like(fish_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
+        # The kcals of each food each month, in the order of preference for humans.
+        # Each food is consumed up to what remains of the maximum that month, for all
+        # the months at once (the same operations as consuming the foods one month at a
+        # time).
+        nmonths = constants_inputs["NMONTHS"]
+        foods_in_order_of_preference = {
+            "fish": interpreted_results_round1.fish_kcals_equivalent.kcals,
+            "meat": interpreted_results_round1.meat_kcals_equivalent.kcals,
+            "dairy": interpreted_results_round1.milk_kcals_equivalent.kcals,
+            "greenhouse": interpreted_results_round1.greenhouse_kcals_equivalent.kcals,
+            "outdoor_crops": (
+                interpreted_results_round1.immediate_outdoor_crops_kcals_equivalent.kcals
+                + interpreted_results_round1.new_stored_outdoor_crops_kcals_equivalent.kcals
             ),
-            "meat": Food(
-                kcals=meat_consumption,
-                fat=np.zeros_like(meat_consumption),
-                protein=np.zeros_like(meat_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
+            "stored_food": interpreted_results_round1.stored_food_kcals_equivalent.kcals,
+            "methane_scp": interpreted_results_round1.scp_kcals_equivalent.kcals,
+            "cellulosic_sugar": (
+                interpreted_results_round1.cell_sugar_kcals_equivalent.kcals
             ),
-            "dairy": Food(
-                kcals=dairy_consumption,
-                fat=np.zeros_like(dairy_consumption),
-                protein=np.zeros_like(dairy_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "greenhouse": Food(
-                kcals=greenhouse_consumption,
-                fat=np.zeros_like(greenhouse_consumption),
-                protein=np.zeros_like(greenhouse_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "outdoor_crops": Food(
-                kcals=outdoor_crops_consumption,
-                fat=np.zeros_like(outdoor_crops_consumption),
-                protein=np.zeros_like(outdoor_crops_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "stored_food": Food(
-                kcals=stored_food_consumption,
-                fat=np.zeros_like(stored_food_consumption),
-                protein=np.zeros_like(stored_food_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "methane_scp": Food(
-                kcals=scp_consumption,
-                fat=np.zeros_like(scp_consumption),
-                protein=np.zeros_like(scp_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "cellulosic_sugar": Food(
-                kcals=cs_consumption,
-                fat=np.zeros_like(cs_consumption),
-                protein=np.zeros_like(cs_consumption),
-                kcals_units="kcals per person per day",
-                fat_units="effective kcals per person per day",
-                protein_units="effective kcals per person per day",
-            ),
-            "seaweed": Food(
-                kcals=seaweed_consumption,
-                fat=np.zeros_like(seaweed_consumption),
-                protein=np.zeros_like(seaweed_consumption),
+            "seaweed": interpreted_results_round1.seaweed_kcals_equivalent.kcals,
+        }
+
+        remaining_kcals = np.full(nmonths, food_daily_maximum.kcals)
+        human_food_consumption = {}
+        for food_name, food_kcals in foods_in_order_of_preference.items():
+            consumed = np.minimum(food_kcals[:nmonths], remaining_kcals)
+            remaining_kcals = remaining_kcals - consumed
+            human_food_consumption[food_name] = Food(
+                kcals=consumed,
+                fat=np.zeros_like(consumed),
+                protein=np.zeros_like(consumed),
                 kcals_units="kcals per person per day",
                 fat_units="effective kcals per person per day",
                 protein_units="effective kcals per person per day",
-            ),
-        }
+            )
 
         self.assert_consumption_within_limits(
             human_food_consumption, kcals_daily_maximum
@@ -1552,15 +1529,17 @@ class Parameters:
         feed_meat_object_round1,
     ):
 
-        time_consts_round3 = copy.deepcopy(time_consts_round1)
-        constants_out_round3 = copy.deepcopy(constants_out_round1)
+        self.assert_static_inputs_unchanged()
+        (
+            constants_out_round3,
+            time_consts_round3,
+        ) = self.copy_constants_of_first_round(constants_out_round1, time_consts_round1)
 
-        meat_and_dairy = MeatAndDairy(constants_inputs)
+        meat_and_dairy = self.static_inputs["meat_and_dairy"]
         biofuel_sum_billion_kcals = (
             interpreted_results_round2.biofuels_sum_kcals_equivalent.in_units_bil_kcals_thou_tons_thou_tons_per_month()
         )
 
-        meat_and_dairy.initialize_this_country_animal_kcals(constants_inputs)
         if time_consts_round2 is not None:
             feed_sum_billion_kcals = (
                 interpreted_results_round2.feed_sum_kcals_equivalent.in_units_bil_kcals_thou_tons_thou_tons_per_month()
@@ -1672,6 +1651,8 @@ class Parameters:
         time_consts_round3["feed"] = feed_used_round3
         time_consts_round3["biofuel"] = biofuel_sum_billion_kcals
 
+        self.assert_static_inputs_unchanged()
+
         return (
             constants_out_round3,
             time_consts_round3,
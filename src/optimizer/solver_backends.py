@@ -0,0 +1,91 @@
+"""
+Solver backends for the optimizer.
+
+Each backend solves a PuLP model in place (variable values are written back onto the
+PuLP variables, the same as model.solve does) and returns the PuLP status code.
+
+    cbc:   PuLP's bundled CBC. The model is written to a file, CBC runs as a separate
+           process, and the solution file is read back. This is the default, and the
+           one used to produce the published results.
+    highs: HiGHS through its python bindings (highspy). The model is passed to the
+           solver in memory, so nothing is written to disk and no process is started.
+           HiGHS also supports warm starts: the optimizer keeps the model in the
+           solver between the stages of an optimization (see lexicographic_solver.py).
+"""
+
+import pulp
+
+DEFAULT_SOLVER_BACKEND = "cbc"
+
+
+class SolverBackend:
+    """
+    Base class for the solver backends.
+
+    Each subclass sets name (its key in SOLVER_BACKENDS) and defines
+    get_pulp_solver(gap_rel, msg), which returns the PuLP solver that solve passes to
+    model.solve.
+    """
+
+    name = None
+    supports_warm_start = False
+
+    def solve(self, model, gap_rel, msg=False):
+        """
+        Solves the model and returns the PuLP status (1 if the optimization succeeded)
+
+        Args:
+            model (pulp.LpProblem): the model to solve
+            gap_rel (float): the relative gap tolerance passed to the solver
+            msg (bool): whether to print the solver output
+
+        Returns:
+            int: the PuLP status of the solve
+        """
+        return model.solve(self.get_pulp_solver(gap_rel, msg))
+
+
+class CBCBackend(SolverBackend):
+    name = "cbc"
+
+    def get_pulp_solver(self, gap_rel, msg):
+        return pulp.PULP_CBC_CMD(gapRel=gap_rel, msg=msg)
+
+
+class HiGHSBackend(SolverBackend):
+    name = "highs"
+    supports_warm_start = True
+
+    def __init__(self):
+        assert pulp.HiGHS(msg=False).available(), (
+            "ERROR: the highs solver backend requires the highspy package. "
+            "Install it with: pip install highspy"
+        )
+
+    def get_pulp_solver(self, gap_rel, msg):
+        return pulp.HiGHS(gapRel=gap_rel, msg=msg)
+
+
+SOLVER_BACKENDS = {
+    CBCBackend.name: CBCBackend,
+    HiGHSBackend.name: HiGHSBackend,
+}
+
+
+def get_solver_backend(name=DEFAULT_SOLVER_BACKEND):
+    """
+    Returns an instance of the solver backend with the given name.
+
+    Args:
+        name (str): one of the keys of SOLVER_BACKENDS
+
+    Returns:
+        SolverBackend: the solver backend
+    """
+    assert name in SOLVER_BACKENDS, (
+        "ERROR: unknown solver backend '"
+        + str(name)
+        + "'. Choose one of: "
+        + ", ".join(SOLVER_BACKENDS.keys())
+    )
+    return SOLVER_BACKENDS[name]()
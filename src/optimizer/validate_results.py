@@ -10,6 +10,7 @@
 
 import numpy as np
 from src.food_system.food import Food
+from src.optimizer.linear_program import LinearProgram
 
 
 class Validator:
@@ -71,15 +72,26 @@ class Validator:
                     f"and protein but got\n {str(value.units)} for food {key}"
                 )
 
-    def check_constraints_satisfied(self, model, maximize_constraints, variables):
+    def check_constraints_satisfied(
+        self,
+        model,
+        maximize_constraints,
+        variables,
+        linear_program=None,
+        tolerance=1,
+    ):
         """
         This function checks if all constraints are satisfied by the final values of the variables.
-        It takes a really long time to run, so it's run infrequently.
+        The constraints are converted to a sparse matrix A with bounds, so that the
+        residuals of A x against the bounds are computed for every constraint at once.
 
         Args:
             model (pulp.LpProblem): The optimization model
             maximize_constraints (list): A list of constraints to maximize
             variables (list): A list of variables to check constraints against
+            linear_program (LinearProgram): constraints that were passed to the solver
+                as matrices instead of being added to the model, if any
+            tolerance (float): the largest violation allowed for any constraint
 
         Returns:
             None
@@ -89,74 +101,57 @@ class Validator:
 
         """
         SHOW_CONSTRAINT_CHECK = False
-        constraints_dict = {}
-        for c in variables:
-            if SHOW_CONSTRAINT_CHECK:
-                print(c)
-            if isinstance(c, list):
-                print("list")
-                continue
-            if c.name in maximize_constraints:
-                continue
-            constraints_dict[c.name] = c.varValue
-        differences = []
-        constraintlist = list(model.constraints.items())
-        for constraint in constraintlist:
-            if constraint[0] in maximize_constraints:
-                differences.append(0)
-                continue
-            compare_type = 0
-
-            splitted = str(constraint[1]).split(" = ")
-            if len(splitted) < 2:
-                compare_type = 1
-                splitted = str(constraint[1]).split(" <= ")
-                if len(splitted) < 2:
-                    compare_type = 2
-                    splitted = str(constraint[1]).split(" >= ")
-                    if len(splitted) < 2:
-                        print("Error! Assignment is not ==, <=, or >=")
-                        quit()
-                    # splitted=str(constraint[1]).split(' >= ')
-            variable_string = splitted[0]
-            equation_string = splitted[1]
-
-            for var in model.variables():
-                equation_string = equation_string.replace(
-                    var.name, str(constraints_dict[var.name])
-                )
-                variable_string = variable_string.replace(
-                    var.name, str(constraints_dict[var.name])
-                )
-            eq_val = eval(equation_string)
-            var_val = eval(variable_string)
-
-            if SHOW_CONSTRAINT_CHECK:
-                print(
-                    "checking constraint "
-                    + str(constraint[0])
-                    + " has "
-                    + str(constraint[1])
+        values = {
+            variable.name: variable.varValue
+            for variable in variables
+            if not isinstance(variable, list)
+        }
+
+        linear_programs = [LinearProgram.from_pulp(model)]
+        if linear_program is not None:
+            linear_programs.append(linear_program)
+
+        row_names = []
+        violations = []
+        for program in linear_programs:
+            # columns without any coefficients don't change the residuals
+            used = np.diff(program.matrix.tocsc().indptr) > 0
+            missing = [
+                name
+                for name, is_used in zip(program.col_names, used)
+                if is_used and values.get(name) is None
+            ]
+            assert (
+                len(missing) == 0
+            ), "ERROR: no value for these variables in the constraints: " + ", ".join(
+                missing[:10]
+            )
+            program_violations = program.get_row_violations(
+                np.array(
+                    [values.get(name) or 0 for name in program.col_names], dtype=float
                 )
-            if compare_type == 0:
-                if SHOW_CONSTRAINT_CHECK:
-                    print("difference" + str(abs(eq_val - var_val)))
-
-                assert abs(eq_val - var_val) < 1
-                differences.append(abs(eq_val - var_val))
-            if compare_type == 1:
-                assert var_val - eq_val <= 1
-                differences.append(var_val - eq_val)
-            if compare_type == 2:
-                assert eq_val - var_val <= 1
-                differences.append(eq_val - var_val)
-
-        print("all constraints satisfied")
-        m = max(differences)
-        print("biggest difference:" + str(m))
-        max_index = np.where(np.array(differences) == m)[0][0]
-        print("for constraint:")
-        print(constraintlist[max_index])
+            )
+            # the objective constraints were relaxed by the later optimizations
+            checked = [name not in maximize_constraints for name in program.row_names]
+            row_names.extend(np.array(program.row_names, dtype=object)[checked])
+            violations.append(program_violations[checked])
+        violations = np.concatenate(violations)
+
+        worst_first = np.argsort(-violations)
+        worst_violations = [
+            row_names[row] + " is off by " + str(violations[row])
+            for row in worst_first[:10]
+            if violations[row] > tolerance
+        ]
+        assert (
+            len(worst_violations) == 0
+        ), "ERROR: constraints are not satisfied: " + "; ".join(worst_violations)
+
+        if SHOW_CONSTRAINT_CHECK and len(violations) > 0:
+            print("all constraints satisfied")
+            print("biggest difference:" + str(violations[worst_first[0]]))
+            print("for constraint:")
+            print(row_names[worst_first[0]])
 
     def ensure_optimizer_returns_same_as_sum_nutrients(
         self,
@@ -0,0 +1,122 @@
+"""
+An on-disk cache of the results of running the model for a country, so that the same
+country and scenario options only ever have to be run once.
+
+Each result is saved in its own file, named by a hash of everything that determines
+it: the country's row of computer_readable_combined.csv, the scenario options and the
+version of the model (a hash of the source code and data files). If any of these
+change, the key changes, so a stale result is never returned. Stale results are simply
+no longer used, and are deleted when the cache grows past its size limit, least
+recently used first.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import git
+
+repo_root = git.Repo(".", search_parent_directories=True).working_dir
+
+# the user's cache directory, outside the repository so the results are never committed
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "allfed-integrated-model"
+    / "results"
+)
+DEFAULT_MAX_SIZE_BYTES = 1e9
+
+
+@functools.lru_cache(maxsize=None)
+def get_model_version():
+    """
+    Returns a hash of every source code and data file, which changes whenever the
+    model could give different results.
+    """
+    model_version = hashlib.sha256()
+    for directory, pattern in [("src", "*.py"), ("data", "*")]:
+        for path in sorted((Path(repo_root) / directory).rglob(pattern)):
+            if not path.is_file():
+                continue
+            model_version.update(str(path.relative_to(repo_root)).encode())
+            model_version.update(path.read_bytes())
+    return model_version.hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self, cache_dir=DEFAULT_CACHE_DIR, max_size_bytes=DEFAULT_MAX_SIZE_BYTES
+    ):
+        """
+        Args:
+            cache_dir (Path): the directory the results are saved in
+            max_size_bytes (float): the cache is trimmed to this size after each save
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+
+    def get_key(self, country_data, scenario_option):
+        """
+        Returns the key of the result of running the country with the scenario options.
+
+        Args:
+            country_data (pd.Series): the country's row of computer_readable_combined.csv
+            scenario_option (dict): the scenario options
+
+        Returns:
+            str: the key (a hash)
+        """
+        inputs = json.dumps(
+            {
+                "country_data": dict(country_data),
+                "scenario_option": scenario_option,
+                "model_version": get_model_version(),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(inputs.encode()).hexdigest()
+
+    def get_path(self, key):
+        return self.cache_dir / (key + ".pkl")
+
+    def load(self, key):
+        """
+        Returns the saved result for the key, or None if there isn't one.
+        """
+        path = self.get_path(key)
+        if not path.exists():
+            return None
+        os.utime(path)  # marks it as recently used
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, key, result):
+        """
+        Saves the result for the key, then trims the cache to its size limit.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.get_path(key)
+        # written under another name first, so a partly written result is never loaded
+        temporary_path = path.with_suffix(".tmp" + str(os.getpid()))
+        with open(temporary_path, "wb") as f:
+            pickle.dump(result, f)
+        os.replace(temporary_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used results until the cache fits its size limit.
+        """
+        paths = sorted(
+            self.cache_dir.glob("*.pkl"), key=lambda path: path.stat().st_mtime
+        )
+        total_size = sum(path.stat().st_size for path in paths)
+        for path in paths:
+            if total_size <= self.max_size_bytes:
+                break
+            total_size -= path.stat().st_size
+            path.unlink()
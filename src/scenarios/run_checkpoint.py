@@ -0,0 +1,96 @@
+"""
+Checkpoints of a run over many countries, so that a run which stops part way through
+(an assert in one country, or the machine going down) can be resumed without running
+the completed countries again.
+
+Each country's result is saved in the run directory as soon as the country finishes.
+When the run is resumed with the same run directory, the saved countries are loaded
+instead of run, and the totals and map are rebuilt from them along with the newly run
+countries.
+"""
+
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+
+class RunCheckpoint:
+    def __init__(self, run_dir, scenario_option):
+        """
+        Args:
+            run_dir (Path): the directory the countries' results are saved in
+            scenario_option (dict): the scenario options of the run. A run can only
+                be resumed with the same options.
+        """
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+
+        # compared as json, the way they are saved
+        scenario_option = json.loads(json.dumps(scenario_option, default=str))
+        options_path = self.run_dir / "scenario_option.json"
+        if options_path.exists():
+            with open(options_path, "r") as f:
+                saved_scenario_option = json.load(f)
+            assert saved_scenario_option == scenario_option, (
+                "ERROR: the run in "
+                + str(self.run_dir)
+                + " was made with different scenario options, and can't be resumed"
+            )
+        else:
+            with open(options_path, "w") as f:
+                json.dump(scenario_option, f, indent=4)
+
+    def get_path(self, country_code):
+        return self.run_dir / (country_code + ".pkl")
+
+    def load(self, country_code):
+        """
+        Returns the saved result of the country (in the form returned by
+        run_optimizer_for_country), or None if it hasn't been completed.
+        """
+        path = self.get_path(country_code)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            summary = pickle.load(f)
+        return (
+            summary["needs_ratio"],
+            summary["scenario_description"],
+            summary["interpreted_results"],
+            summary["solve_records"],
+        )
+
+    def save(self, country_data, country_result):
+        """
+        Saves the result of a completed country. Countries that failed are not saved.
+
+        Args:
+            country_data (pd.Series): the country's row of the country table
+            country_result (tuple): the result of run_optimizer_for_country
+        """
+        (
+            needs_ratio,
+            scenario_description,
+            interpreted_results,
+            solve_records,
+        ) = country_result
+        if np.isnan(needs_ratio):
+            return  # failed countries are run again when the run is resumed
+        summary = {
+            "iso3": country_data["iso3"],
+            "country": country_data["country"],
+            "population": country_data["population"],
+            "needs_ratio": needs_ratio,
+            "scenario_description": scenario_description,
+            "interpreted_results": interpreted_results,
+            "solve_records": solve_records,
+        }
+        path = self.get_path(country_data["iso3"])
+        # written under another name first, so a partly written result is never loaded
+        temporary_path = path.with_suffix(".tmp" + str(os.getpid()))
+        with open(temporary_path, "wb") as f:
+            pickle.dump(summary, f)
+        os.replace(temporary_path, path)
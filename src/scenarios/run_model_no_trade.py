@@ -8,6 +8,7 @@ Created on Wed Jul 15
 
 import pandas as pd
 import os
+import json
 import numpy as np
 import geopandas as gpd
 import warnings
@@ -16,7 +17,13 @@ import datetime
 from datetime import date
 from src.utilities.plotter import Plotter
 from src.scenarios.run_scenario import ScenarioRunner
+from src.scenarios.run_checkpoint import RunCheckpoint
+from src.optimizer.parameters import Parameters
+from src.food_system.animal_populations import CalculateFeedAndMeat
+from src.food_system.food import Food
+from src.food_system.unit_conversions import conversions_scope
 from itertools import product
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import git
 from pathlib import Path
 
@@ -27,6 +34,31 @@ logging.basicConfig(level=logging.ERROR)
 warnings.filterwarnings("ignore")
 
 
+def run_optimizer_for_country_in_worker(worker_arguments):
+    """
+    Runs a single country in a worker process. This has to be a module level function
+    so that it can be sent to the process pool. Figures and powerpoints are never made
+    in a worker.
+    """
+    (
+        country_data,
+        scenario_option,
+        save_all_results,
+        figure_save_postfix,
+        title,
+    ) = worker_arguments
+    scenario_runner = ScenarioRunnerNoTrade()
+    return scenario_runner.run_optimizer_for_country(
+        country_data,
+        scenario_option,
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        save_all_results=save_all_results,
+        figure_save_postfix=figure_save_postfix,
+        title=title,
+    )
+
+
 class ScenarioRunnerNoTrade(ScenarioRunner):
     """
     This function runs the model for all countries in the world, no trade.
@@ -163,6 +195,7 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
             percent_people_fed / 100,
             scenario_loader.scenario_description,
             interpreted_results,
+            scenario_runner.solve_records,
         )
 
     def fill_data_for_map(self, world, country_code, needs_ratio):
@@ -184,6 +217,198 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
             world_index = country_map.index
             world.loc[world_index, "needs_ratio"] = kcals_ratio_capped
 
+    def calculate_feed_and_meat_round1(self, countries_to_run, scenario_option):
+        """
+        Runs the animals of the first round of optimization (no feed given to them) of
+        the countries together with CalculateFeedAndMeat.for_countries, which saves
+        them in its cache, where the first round of each country finds them when the
+        country is run. The countries are run together in groups of the same breeding
+        strategy and number of months, as main_for_countries runs one scenario over
+        the same months for all its countries.
+        """
+        inputs_by_group = {}
+        for country_data in countries_to_run:
+            constants_for_params, _, _ = self.set_depending_on_option(
+                scenario_option, country_data=country_data
+            )
+            # the grasses are converted with the nutrition requirements of this country
+            nutrition = constants_for_params["NUTRITION"]
+            with conversions_scope() as conversions:
+                conversions.set_nutrition_requirements(
+                    kcals_daily=nutrition["KCALS_DAILY"],
+                    fat_daily=nutrition["FAT_DAILY"],
+                    protein_daily=nutrition["PROTEIN_DAILY"],
+                    include_fat=constants_for_params["INCLUDE_FAT"],
+                    include_protein=constants_for_params["INCLUDE_PROTEIN"],
+                    population=constants_for_params["POP"],
+                )
+                meat_and_dairy = Parameters.get_meat_and_dairy(constants_for_params)
+            # only the kcals of the feed are used by the animal model
+            zero_feed = Food(np.zeros(constants_for_params["NMONTHS"]))
+            inputs = Parameters.get_feed_and_meat_inputs_round1(
+                constants_for_params, meat_and_dairy, zero_feed
+            )
+            group = (inputs["scenario"], constants_for_params["NMONTHS"])
+            inputs_by_group.setdefault(group, []).append(inputs)
+
+        for (scenario, _), group_inputs in inputs_by_group.items():
+            CalculateFeedAndMeat.for_countries(
+                [inputs["country_code"] for inputs in group_inputs],
+                [inputs["available_feed"] for inputs in group_inputs],
+                [inputs["available_grass"] for inputs in group_inputs],
+                scenario,
+                [inputs["kcals_per_head_meat_dict"] for inputs in group_inputs],
+                [inputs["constants_inputs"] for inputs in group_inputs],
+            )
+
+    def run_optimizer_for_countries(
+        self,
+        countries_to_run,
+        scenario_option,
+        create_pptx_with_all_countries,
+        show_country_figures,
+        save_all_results,
+        figure_save_postfix,
+        title,
+        n_workers=1,
+        on_country_finished=None,
+    ):
+        """
+        Runs the optimizer for each country in countries_to_run, either one at a time
+        or spread over a pool of n_workers processes. When they are run one at a time,
+        the first round of their animals is calculated together beforehand (see
+        calculate_feed_and_meat_round1).
+
+        Arguments:
+            countries_to_run (list): the rows of the country table to run
+            n_workers (int): number of worker processes. 1 runs in this process.
+            on_country_finished (function): if given, called with the country's row
+                and result as soon as each country finishes, before any later error
+
+        Returns:
+            list: the result of run_optimizer_for_country for each country, in the
+                same order as countries_to_run
+        """
+        assert n_workers >= 1, "ERROR: n_workers must be at least 1"
+
+        if n_workers == 1 or len(countries_to_run) <= 1:
+            # The first round of the animals of the countries is run together, a batch
+            # at a time. Each country may add the animals of two more rounds to the
+            # cache, so the batches are small enough for the first round of every
+            # country of the batch to still be cached when the country is run.
+            batch_size = CalculateFeedAndMeat.MAX_CACHED_RUNS // 3
+            country_results = []
+            for index, country_data in enumerate(countries_to_run):
+                if len(countries_to_run) > 1 and index % batch_size == 0:
+                    self.calculate_feed_and_meat_round1(
+                        countries_to_run[index : index + batch_size], scenario_option
+                    )
+                country_result = self.run_optimizer_for_country(
+                    country_data,
+                    scenario_option,
+                    create_pptx_with_all_countries,
+                    show_country_figures,
+                    save_all_results,
+                    figure_save_postfix,
+                    title=title,
+                )
+                if on_country_finished is not None:
+                    on_country_finished(country_data, country_result)
+                country_results.append(country_result)
+            return country_results
+
+        worker_arguments = [
+            (
+                country_data,
+                scenario_option,
+                save_all_results,
+                figure_save_postfix,
+                title,
+            )
+            for country_data in countries_to_run
+        ]
+        with ProcessPoolExecutor(
+            max_workers=min(n_workers, len(countries_to_run))
+        ) as executor:
+            futures = [
+                executor.submit(run_optimizer_for_country_in_worker, arguments)
+                for arguments in worker_arguments
+            ]
+            if on_country_finished is not None:
+                country_of_future = dict(zip(futures, countries_to_run))
+                for future in as_completed(futures):
+                    if future.exception() is None:
+                        on_country_finished(country_of_future[future], future.result())
+            # raises the first error, after every other country has finished
+            return [future.result() for future in futures]
+
+    def run_optimizer_for_countries_with_cache(
+        self,
+        result_cache,
+        countries_to_run,
+        scenario_option,
+        save_all_results,
+        figure_save_postfix,
+        title,
+        n_workers=1,
+        on_country_finished=None,
+    ):
+        """
+        Same as run_optimizer_for_countries (without figures or powerpoints), but the
+        result of each country is taken from the result cache if it has been run
+        before with the same scenario options, and saved there otherwise.
+        """
+        keys = [
+            result_cache.get_key(country_data, scenario_option)
+            for country_data in countries_to_run
+        ]
+        country_results = [result_cache.load(key) for key in keys]
+        missing = [i for i, result in enumerate(country_results) if result is None]
+        if len(missing) < len(countries_to_run):
+            print(
+                "Using cached results for "
+                + str(len(countries_to_run) - len(missing))
+                + " of "
+                + str(len(countries_to_run))
+                + " countries"
+            )
+
+        if on_country_finished is not None:
+            for country_data, country_result in zip(countries_to_run, country_results):
+                if country_result is not None:
+                    on_country_finished(country_data, country_result)
+
+        def save_to_cache(country_data, country_result):
+            (
+                needs_ratio,
+                scenario_description,
+                interpreted_results,
+                solve_records,
+            ) = country_result
+            if not np.isnan(needs_ratio):  # failed countries are run again next time
+                # nothing was solved when the result is loaded, so no solve records
+                result_cache.save(
+                    result_cache.get_key(country_data, scenario_option),
+                    (needs_ratio, scenario_description, interpreted_results, []),
+                )
+            if on_country_finished is not None:
+                on_country_finished(country_data, country_result)
+
+        new_results = self.run_optimizer_for_countries(
+            [countries_to_run[i] for i in missing],
+            scenario_option,
+            False,
+            False,
+            save_all_results,
+            figure_save_postfix,
+            title,
+            n_workers,
+            on_country_finished=save_to_cache,
+        )
+        for i, country_result in zip(missing, new_results):
+            country_results[i] = country_result
+        return country_results
+
     def run_model_no_trade(
         self,
         title="untitled",
@@ -196,6 +421,10 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
         figure_save_postfix="",
         return_results=False,
         save_all_results=False,
+        n_workers=1,
+        save_solve_records=False,
+        result_cache=None,
+        run_dir=None,
     ):
         """
         This function runs the model for all countries in the world, no trade.
@@ -205,6 +434,20 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
 
         You can generate a powerpoint as an option here too
 
+        If n_workers is more than 1, the countries are run in that many worker
+        processes. The results are identical to running them one at a time.
+
+        A record of every solve of every country is kept in self.solve_records (see
+        Optimizer.solve_model). If save_solve_records is True, they are also saved to
+        results/ as json and csv.
+
+        If a result_cache (ResultCache) is given, countries that have already been run
+        with the same scenario options are loaded from it instead of being run again.
+
+        If a run_dir is given, each country's result is saved there as soon as it
+        finishes. Running again with the same run_dir resumes the run: the countries
+        saved there are loaded instead of run again.
+
         """
         assert len(scenario_option) > 0, "ERROR: a scenario must be specified"
 
@@ -261,6 +504,8 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
                 os.mkdir(Path(repo_root) / "results" / "large_reports")
             Plotter.start_pptx("No trade by country")
 
+        self.solve_records = []
+        countries_to_run = []
         for index, country_data in no_trade_table.iterrows():
             country_code = country_data["iso3"]
 
@@ -280,20 +525,97 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
             if np.isnan(population):
                 continue
 
-            country_name = country_data["country"]
-            (
-                needs_ratio,
-                scenario_description,
-                interpreted_results,
-            ) = self.run_optimizer_for_country(
-                country_data,
+            countries_to_run.append(country_data)
+
+        if n_workers > 1 and (create_pptx_with_all_countries or show_country_figures):
+            print(
+                "WARNING: country figures and powerpoints can only be made in the main "
+                "process. Running countries serially instead of with "
+                + str(n_workers)
+                + " workers."
+            )
+            n_workers = 1
+
+        if result_cache is not None and (
+            create_pptx_with_all_countries or show_country_figures
+        ):
+            print(
+                "WARNING: country figures and powerpoints are only made when the "
+                "countries are run. Not using the result cache."
+            )
+            result_cache = None
+
+        completed_results = {}
+        on_country_finished = None
+        if run_dir is not None:
+            run_checkpoint = RunCheckpoint(run_dir, scenario_option)
+            for country_data in countries_to_run:
+                country_result = run_checkpoint.load(country_data["iso3"])
+                if country_result is not None:
+                    completed_results[country_data["iso3"]] = country_result
+            if len(completed_results) > 0:
+                print(
+                    "Resuming the run in "
+                    + str(run_dir)
+                    + ": "
+                    + str(len(completed_results))
+                    + " of "
+                    + str(len(countries_to_run))
+                    + " countries already completed"
+                )
+            on_country_finished = run_checkpoint.save
+        remaining_countries = [
+            country_data
+            for country_data in countries_to_run
+            if country_data["iso3"] not in completed_results
+        ]
+
+        if result_cache is None:
+            new_results = self.run_optimizer_for_countries(
+                remaining_countries,
                 scenario_option,
                 create_pptx_with_all_countries,
                 show_country_figures,
                 save_all_results,
                 figure_save_postfix,
-                title=title,
+                title,
+                n_workers,
+                on_country_finished=on_country_finished,
+            )
+        else:
+            new_results = self.run_optimizer_for_countries_with_cache(
+                result_cache,
+                remaining_countries,
+                scenario_option,
+                save_all_results,
+                figure_save_postfix,
+                title,
+                n_workers,
+                on_country_finished=on_country_finished,
+            )
+        new_results = iter(new_results)
+        country_results = [
+            (
+                completed_results[country_data["iso3"]]
+                if country_data["iso3"] in completed_results
+                else next(new_results)
             )
+            for country_data in countries_to_run
+        ]
+
+        # results are merged in the order of the spreadsheet, so the output is the same
+        # whether or not the countries were run in parallel
+        for country_data, country_result in zip(countries_to_run, country_results):
+            country_code = country_data["iso3"]
+            country_name = country_data["country"]
+            population = country_data["population"]
+            (
+                needs_ratio,
+                scenario_description,
+                interpreted_results,
+                solve_records,
+            ) = country_result
+            self.solve_records.extend(solve_records)
             if np.isnan(needs_ratio):
                 n_errors += 1
                 failed_countries += " " + country_name
@@ -342,6 +664,8 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
         # print first value of the dict
         if save_all_results:
             self.save_all_results_to_csv(results, title)
+        if save_solve_records:
+            self.save_solve_records(self.solve_records, title)
         return [world, net_pop, net_pop_fed, results]
 
     def save_pptx(self, title):
@@ -428,6 +752,18 @@ class ScenarioRunnerNoTrade(ScenarioRunner):
 
         return
 
+    def save_solve_records(self, solve_records, title, output_dir=None):
+        """
+        Save the record of every solve to a json and a csv file, to see where the time
+        of a run is spent. The files are saved in output_dir, or results/ if it is None.
+        """
+        if output_dir is None:
+            output_dir = Path(repo_root) / "results"
+        file_root = Path(output_dir) / (title + "_solve_records")
+        with open(str(file_root) + ".json", "w") as f:
+            json.dump(solve_records, f, indent=4)
+        pd.DataFrame(solve_records).to_csv(str(file_root) + ".csv", index=False)
+
     def get_countries_to_run_and_skip(self, countries_list):
         """
         if there's any country code with a "!", skip that one
@@ -19,6 +19,7 @@ from pathlib import Path
 import pandas as pd
 
 from src.optimizer.optimizer import Optimizer
+from src.optimizer.solver_backends import DEFAULT_SOLVER_BACKEND
 from src.optimizer.interpret_results import Interpreter
 from src.optimizer.extract_results import Extractor
 from src.scenarios.scenarios import Scenarios
@@ -47,7 +48,8 @@ def are_dicts_approx_same(dict1, dict2):
 
 class ScenarioRunner:
     def __init__(self):
-        pass
+        # the solve records of every optimizer run by this scenario runner
+        self.solve_records = []
 
     def display_results_of_optimizer_round(
         self,
@@ -120,6 +122,7 @@ class ScenarioRunner:
             time_consts_round1,
             optimization_type="to_humans",
             title=title,
+            optimizer_round=1,
         )
 
         interpreted_results_round1.set_feed_and_biofuels(feed_and_biofuels_round1)
@@ -191,6 +194,7 @@ class ScenarioRunner:
             optimization_type="to_animals",
             min_human_food_consumption=min_human_food_consumption,
             title=title,
+            optimizer_round=2,
         )
 
         # looks like it's necessary to reduce the feed requirements by about 20kcals per month, in order
@@ -265,6 +269,7 @@ class ScenarioRunner:
             time_consts_round3,
             optimization_type="to_humans",
             title=title,
+            optimizer_round=3,
         )
         interpreted_results_round3.set_meat_dictionary(meat_dictionary_round3)
         interpreted_results_round3.set_feed_and_biofuels(feed_and_biofuels_round3)
@@ -543,12 +548,15 @@ class ScenarioRunner:
         percent_fed_from_model,
         optimization_type,
         title="Untitled",
+        solution=None,
     ):
         validator = Validator()
 
         extractor = Extractor(consts_for_optimizer)
         #  get values from all the optimizer in list and integer formats
-        extracted_results = extractor.extract_results(model, variables, time_consts)
+        extracted_results = extractor.extract_results(
+            model, variables, time_consts, solution
+        )
 
         # TODO: eventually all the values not directly solved by the optimizer should
         # be removed from extracted_results
@@ -577,9 +585,12 @@ class ScenarioRunner:
         optimization_type=None,
         min_human_food_consumption=None,
         title="Untitled",
+        optimizer_round=None,
     ):
         """
-        Runs the optimizer and returns the model, variables, and constants
+        Runs the optimizer and returns the model, variables, and constants.
+        The optimizer's solve records are added to self.solve_records, labelled with
+        the optimizer_round.
         """
         if optimization_type == "to_animals":
             assert (
@@ -611,6 +622,11 @@ class ScenarioRunner:
         else:
             raise ValueError("Optimization must be to humans or animals.")
 
+        self.solve_records.extend(
+            {"round": optimizer_round, **solve_record}
+            for solve_record in optimizer.solve_records
+        )
+
         interpreted_results = self.interpret_optimizer_results(
             consts_for_optimizer,
             model,
@@ -620,20 +636,18 @@ class ScenarioRunner:
             percent_fed_from_model,
             optimization_type=optimization_type,
             title=title,
+            solution=optimizer.get_solution(variables),
         )
 
-        CHECK_CONSTRAINTS_FLAG = False
+        CHECK_CONSTRAINTS_FLAG = True
         if CHECK_CONSTRAINTS_FLAG:
-            print("")
-            print("VALIDATION")
-            print("")
-            print("")
             # check all the mathematically defined constraints in the optimizer are
             # satisfied within reasonable rounding errors
             validator.check_constraints_satisfied(
                 model,
                 maximize_constraints,
                 model.variables(),
+                linear_program=optimizer.linear_program,
             )
 
         return interpreted_results
@@ -837,6 +851,12 @@ class ScenarioRunner:
 
         constants_for_params["NMONTHS"] = scenario_option_copy["NMONTHS"]
 
+        # SOLVER
+        if "SOLVER" in scenario_option_copy.keys():
+            constants_for_params["SOLVER"] = scenario_option_copy["SOLVER"]
+        else:
+            constants_for_params["SOLVER"] = DEFAULT_SOLVER_BACKEND
+
         # STORED FOOD
 
         if scenario_option_copy["stored_food"] == "zero":
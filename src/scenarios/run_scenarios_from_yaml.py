@@ -24,6 +24,12 @@ To run the script, two optional command line arguments can be provided:
 2. To display colored maps (True/False)
 If not provided, the default values are True for the first argument and False
 for the second.
+Countries that were already run with the same scenario options (and the same code
+and data) are loaded from the result cache in ~/.cache/allfed-integrated-model, unless
+--no-cache is given.
+With --checkpoint, each country's result is also saved in a new run directory in
+results/runs as soon as it finishes. If the run stops part way through, --resume
+<run_dir> runs only the countries that were not completed.
 
 YAML Configuration:
 The scenarios and their respective parameters are defined in a YAML file. Each
@@ -34,24 +40,51 @@ to visualize, edit, and manage various scenarios.
 
 import sys
 import os
+import datetime
 import yaml
 import git
 from pathlib import Path
 
 from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios.result_cache import ResultCache
+from src.optimizer.solver_backends import DEFAULT_SOLVER_BACKEND
 
 
 def run_scenarios_from_yaml(
-    config_data, show_country_figures, show_map_figures, web_interface
+    config_data,
+    show_country_figures,
+    show_map_figures,
+    web_interface,
+    use_cache=True,
+    run_dir=None,
 ):
     """
     Run the scenario in a loop, for each scenario specified, and using all data defined from the scenarios config file
+    If a run_dir is given, the countries of each scenario are checkpointed in a
+    directory inside it named after the scenario, and a run in it is resumed.
     """
     if "countries" in config_data["settings"]:
         countries = config_data["settings"]["countries"]
     else:
         countries = []  # runs all countries!
     nmonths = config_data["settings"]["NMONTHS"]
+    if "n_workers" in config_data["settings"]:
+        n_workers = config_data["settings"]["n_workers"]
+    else:
+        n_workers = 1  # runs the countries one at a time
+    if "save_solve_records" in config_data["settings"]:
+        save_solve_records = config_data["settings"]["save_solve_records"]
+    else:
+        save_solve_records = False  # timings and sizes of each solve, in results/
+    if "solver" in config_data["settings"]:
+        solver = config_data["settings"]["solver"]
+    else:
+        solver = DEFAULT_SOLVER_BACKEND
+
+    if use_cache:
+        result_cache = ResultCache()
+    else:
+        result_cache = None  # runs every country again
 
     if isinstance(countries, str):  # In case only one country is provided
         countries = [countries]
@@ -64,6 +97,7 @@ def run_scenarios_from_yaml(
         print("")
 
         this_simulation["NMONTHS"] = nmonths
+        this_simulation["SOLVER"] = solver
 
         if web_interface:
             return_results = True
@@ -72,6 +106,11 @@ def run_scenarios_from_yaml(
             return_results = False
             save_all_results = False
 
+        if run_dir is None:
+            scenario_run_dir = None
+        else:
+            scenario_run_dir = Path(run_dir) / scenario_name
+
         # Command line argument inputs (optional)
         scenario_runner = ScenarioRunnerNoTrade()
         scenario_runner.run_model_no_trade(
@@ -85,6 +124,10 @@ def run_scenarios_from_yaml(
             figure_save_postfix=f"_{scenario_name}",
             return_results=return_results,
             save_all_results=save_all_results,
+            n_workers=n_workers,
+            save_solve_records=save_solve_records,
+            result_cache=result_cache,
+            run_dir=scenario_run_dir,
         )
 
 
@@ -105,8 +148,12 @@ def print_usage_message(repo_root):
     print(
         "Usage: python3 run_scenarios_from_yaml.py",
         "<show_country_figures: True/False> <color_map: True/False> <yaml_filename>",
+        "[--no-cache] [--checkpoint] [--resume <run_dir>]",
     )
     print("Example: python3 run_scenarios_from_yaml.py True False scenarios.yaml")
+    print("--no-cache runs every country again instead of using cached results")
+    print("--checkpoint saves the result of each country in a new run directory")
+    print("--resume continues a run that stopped, from its directory in results/runs")
     print("Note: all yaml files must be in the scenarios/ directory")
 
     print("\nAvailable scenarios:")
@@ -121,6 +168,18 @@ def get_input_args(args):
     Print an error message if usage is incorrect.
     """
     repo_root = git.Repo(".", search_parent_directories=True).working_dir
+    use_cache = "--no-cache" not in args
+    checkpoint = "--checkpoint" in args
+    args = [arg for arg in args if arg not in ["--no-cache", "--checkpoint"]]
+    resume_run_dir = None
+    if "--resume" in args:
+        resume_index = args.index("--resume")
+        if resume_index + 1 >= len(args) or not os.path.isdir(args[resume_index + 1]):
+            print_usage_message(repo_root)
+            print("\nError: --resume must be followed by an existing run directory.")
+            sys.exit(1)
+        resume_run_dir = Path(args[resume_index + 1])
+        args = args[:resume_index] + args[resume_index + 2 :]
     if len(args) < 4:
         print_usage_message(repo_root)
         print("\nError: fewer than 4 arguments supplied.")
@@ -152,7 +211,25 @@ def get_input_args(args):
 
     yaml_filename = args[-1]
 
-    return show_country_figures, show_map_figures, web_interface, yaml_filename
+    return (
+        show_country_figures,
+        show_map_figures,
+        web_interface,
+        yaml_filename,
+        use_cache,
+        checkpoint,
+        resume_run_dir,
+    )
+
+
+def get_new_run_dir(yaml_filename):
+    """
+    Returns a new directory in results/runs for checkpointing a run of the yaml file.
+    """
+    repo_root = git.Repo(".", search_parent_directories=True).working_dir
+    now = datetime.datetime.now()
+    run_name = Path(yaml_filename).stem + "." + now.strftime("%Y.%m.%d.%H.%M.%S.%f")
+    return Path(repo_root) / "results" / "runs" / run_name
 
 
 def main(args):
@@ -167,11 +244,27 @@ def main(args):
         show_map_figures,
         web_interface,
         yaml_filename,
+        use_cache,
+        checkpoint,
+        run_dir,
     ) = get_input_args(args)
 
+    # results are only saved in a run directory when asked for, as the directories are
+    # never deleted
+    if run_dir is None and checkpoint:
+        run_dir = get_new_run_dir(yaml_filename)
+    if run_dir is not None:
+        print("Saving the result of each country in " + str(run_dir))
+        print("If the run stops, continue it by adding --resume " + str(run_dir))
+
     config_data = load_config_data(yaml_filename)
     run_scenarios_from_yaml(
-        config_data, show_country_figures, show_map_figures, web_interface
+        config_data,
+        show_country_figures,
+        show_map_figures,
+        web_interface,
+        use_cache,
+        run_dir,
     )
 
 
@@ -0,0 +1,57 @@
+"""
+Tests for reading the animal data files once and sharing them between runs
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.food_system.animal_populations import AnimalDataReader, main
+from src.food_system.food import Food
+
+
+def count_reads(monkeypatch):
+    reads = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        reads.append(args[0])
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counting_read_csv)
+    return reads
+
+
+def run_animal_model(constants_inputs=None):
+    feed = Food(np.zeros(12))
+    grass = Food(np.full(12, 1000.0))
+    return main("ARG", feed, grass, "baseline", constants_inputs)
+
+
+def test_files_are_read_once(monkeypatch):
+    AnimalDataReader.clear_cache()
+    reads = count_reads(monkeypatch)
+
+    run_animal_model()
+    assert len(reads) == 5
+    run_animal_model()
+    assert len(reads) == 5
+
+    AnimalDataReader.clear_cache()
+    run_animal_model()
+    assert len(reads) == 10
+
+
+def test_custom_populations_do_not_change_the_shared_data():
+    stock_info = AnimalDataReader.read_animal_population_data(
+        "FAOSTAT_head_and_slaughter.csv"
+    )
+    pig_head = stock_info.loc["ARG", "pig_head"]
+
+    all_animals, feed_used, grass_used = run_animal_model({"pig_head_start": 1e6})
+    pigs = [animal for animal in all_animals if animal.animal_type == "pig"][0]
+    assert pigs.population[0] == 1e6
+
+    assert stock_info.loc["ARG", "pig_head"] == pig_head
+    all_animals, feed_used, grass_used = run_animal_model()
+    pigs = [animal for animal in all_animals if animal.animal_type == "pig"][0]
+    assert pigs.population[0] == pig_head
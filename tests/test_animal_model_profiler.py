@@ -0,0 +1,59 @@
+"""
+Tests for timing the stages of the animal population model
+"""
+
+import json
+
+import numpy as np
+
+from src.food_system.animal_model_profiler import AnimalModelProfiler
+from src.food_system.animal_populations import main
+from src.food_system.food import Food
+
+
+def run_animal_model(use_array_engine=True):
+    return main(
+        "ARG",
+        Food(np.full(24, 500.0)),
+        Food(np.full(24, 1000.0)),
+        "reduced",
+        remove_first_month=1,
+        use_array_engine=use_array_engine,
+    )
+
+
+def test_nothing_is_timed_unless_enabled():
+    AnimalModelProfiler.disable()
+    AnimalModelProfiler.clear()
+    run_animal_model()
+    assert AnimalModelProfiler.totals == {}
+
+
+def test_stages_are_timed_for_each_country(tmp_path):
+    expected_animals, expected_feed_used, expected_grass_used = run_animal_model()
+
+    AnimalModelProfiler.enable()
+    try:
+        animals, feed_used, grass_used = run_animal_model()
+        run_animal_model(use_array_engine=False)
+    finally:
+        AnimalModelProfiler.disable()
+
+    # timing doesn't change the results
+    assert np.array_equal(feed_used.kcals, expected_feed_used.kcals)
+    for animal, expected_animal in zip(animals, expected_animals):
+        assert np.array_equal(animal.population, expected_animal.population)
+
+    stages = AnimalModelProfiler.totals["ARG"]
+    assert stages["append_month_zero"][1] == 2
+    assert stages["calculate_slaughter"][1] == 24
+    assert stages["calculate_change_in_population"][1] == 24
+    assert stages["homekill"][1] == 24 * len(animals)
+
+    summary = AnimalModelProfiler.get_summary()
+    assert set(summary["stage"]) == set(stages)
+    assert np.isclose(summary["fraction_of_country"].sum(), 1)
+
+    AnimalModelProfiler.save_summary(tmp_path / "profile")
+    with open(tmp_path / "profile.json") as f:
+        assert len(json.load(f)) == len(summary)
@@ -0,0 +1,174 @@
+"""
+Tests that the array engine for the animal populations gives the same results as
+running each species through the months one at a time, that resuming a run from the
+month its inputs changed gives the same results as running it from the start, and that
+running many countries together gives the same results as running each alone
+"""
+
+import numpy as np
+import pytest
+
+from src.food_system.animal_population_engine import MONTHLY_SERIES
+from src.food_system.animal_populations import main, main_for_countries
+from src.food_system.food import Food
+
+SERIES = MONTHLY_SERIES + [
+    "births_animals_month",
+    "transfer_population",
+    "transfer_births",
+    "retiring_milk_animals",
+]
+
+
+def run_animal_model(country_code, scenario, feed, grass, use_array_engine):
+    return main(
+        country_code,
+        Food(feed.copy()),
+        Food(grass.copy()),
+        scenario,
+        None,
+        remove_first_month=1,
+        use_array_engine=use_array_engine,
+    )
+
+
+@pytest.mark.parametrize("country_code", ["ARG", "IND", "NZL"])
+@pytest.mark.parametrize("scenario", ["baseline", "reduced", "feed_only_ruminants"])
+@pytest.mark.parametrize("feed_max, grass_max", [(2000.0, 5000.0), (20.0, 0.0)])
+def test_engine_matches_the_species_loop(country_code, scenario, feed_max, grass_max):
+    rng = np.random.default_rng(0)
+    feed = rng.uniform(0, feed_max, 120)
+    grass = rng.uniform(0, grass_max, 120)
+
+    animals, feed_used, grass_used = run_animal_model(
+        country_code, scenario, feed, grass, use_array_engine=True
+    )
+    (
+        expected_animals,
+        expected_feed_used,
+        expected_grass_used,
+    ) = run_animal_model(country_code, scenario, feed, grass, use_array_engine=False)
+
+    assert np.allclose(feed_used.kcals, expected_feed_used.kcals)
+    assert np.allclose(grass_used.kcals, expected_grass_used.kcals)
+    for animal, expected_animal in zip(animals, expected_animals):
+        assert animal.animal_type == expected_animal.animal_type
+        for name in SERIES:
+            if not hasattr(expected_animal, name):
+                continue
+            assert np.allclose(getattr(animal, name), getattr(expected_animal, name)), (
+                animal.animal_type,
+                name,
+            )
+
+
+@pytest.mark.parametrize("start_month", [0, 7, 60, 120])
+def test_resumed_run_matches_a_full_run(start_month):
+    rng = np.random.default_rng(1)
+    feed = rng.uniform(0, 2000, 120)
+    grass = rng.uniform(0, 3000, 120)
+    *_, previous_run = main(
+        "ARG",
+        Food(feed),
+        Food(grass),
+        "reduced",
+        remove_first_month=1,
+        return_animal_arrays=True,
+    )
+
+    new_feed = feed.copy()
+    new_grass = grass.copy()
+    new_feed[start_month:] *= 0.3
+    new_grass[start_month:] *= 1.5
+    assert previous_run.first_changed_month([new_feed], [new_grass]) == start_month
+
+    animals, feed_used, grass_used = main(
+        "ARG",
+        Food(new_feed),
+        Food(new_grass),
+        "reduced",
+        remove_first_month=1,
+        previous_run=previous_run,
+    )
+    expected_animals, expected_feed_used, expected_grass_used = main(
+        "ARG", Food(new_feed), Food(new_grass), "reduced", remove_first_month=1
+    )
+
+    assert np.array_equal(feed_used.kcals, expected_feed_used.kcals)
+    assert np.array_equal(grass_used.kcals, expected_grass_used.kcals)
+    for animal, expected_animal in zip(animals, expected_animals):
+        for name in SERIES:
+            if hasattr(expected_animal, name):
+                assert np.array_equal(
+                    getattr(animal, name), getattr(expected_animal, name)
+                ), name
+
+
+def test_states_are_only_saved_for_runs_that_can_be_resumed():
+    feed = np.full(24, 500.0)
+    grass = np.full(24, 1000.0)
+    *_, resumable_run = main(
+        "ARG", Food(feed), Food(grass), "reduced", return_animal_arrays=True
+    )
+    assert all(state is not None for state in resumable_run.states)
+
+    resumable_run.save_states = False
+    resumable_run.states = [None] * resumable_run.months_to_run
+    resumable_run.run([feed], [grass])
+    assert all(state is None for state in resumable_run.states)
+    with pytest.raises(AssertionError, match="states were saved"):
+        resumable_run.resume(12, [feed], [grass])
+
+
+def test_histories_are_views_of_the_arrays():
+    feed = np.full(24, 500.0)
+    grass = np.full(24, 1000.0)
+    animals, *_, animal_arrays = main(
+        "ARG",
+        Food(feed),
+        Food(grass),
+        "reduced",
+        remove_first_month=1,
+        return_animal_arrays=True,
+    )
+    for animal in animals:
+        for name in MONTHLY_SERIES:
+            assert np.shares_memory(getattr(animal, name), animal_arrays.series[name])
+            assert len(getattr(animal, name)) == 24
+
+    # the species loop returns its histories as arrays too
+    expected_animals, *_ = run_animal_model(
+        "ARG", "reduced", feed, grass, use_array_engine=False
+    )
+    for expected_animal in expected_animals:
+        for name in SERIES:
+            if hasattr(expected_animal, name) and len(getattr(expected_animal, name)):
+                assert isinstance(getattr(expected_animal, name), np.ndarray), name
+
+
+@pytest.mark.parametrize("scenario", ["baseline", "reduced"])
+def test_countries_run_together_match_countries_run_alone(scenario):
+    country_codes = ["ARG", "IND", "NZL", "JPN"]
+    rng = np.random.default_rng(2)
+    feeds = [Food(rng.uniform(0, 3000, 120)) for country_code in country_codes]
+    grasses = [Food(rng.uniform(0, 3000, 120)) for country_code in country_codes]
+
+    results = main_for_countries(
+        country_codes, feeds, grasses, scenario, remove_first_month=1
+    )
+
+    for country_code, feed, grass, (animals, feed_used, grass_used) in zip(
+        country_codes, feeds, grasses, results
+    ):
+        expected_animals, expected_feed_used, expected_grass_used = main(
+            country_code, feed, grass, scenario, remove_first_month=1
+        )
+        assert np.array_equal(feed_used.kcals, expected_feed_used.kcals)
+        assert np.array_equal(grass_used.kcals, expected_grass_used.kcals)
+        for animal, expected_animal in zip(animals, expected_animals):
+            assert animal.animal_type == expected_animal.animal_type
+            for name in SERIES:
+                if hasattr(expected_animal, name):
+                    assert np.array_equal(
+                        getattr(animal, name), getattr(expected_animal, name)
+                    )
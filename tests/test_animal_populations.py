@@ -7,6 +7,7 @@ from src.food_system.animal_populations import Debugging
 from src.food_system.food import Food
 
 
+import pickle
 import pytest
 
 """
@@ -186,6 +187,13 @@ class TestCountryData:
         else:
             raise AssertionError("Expected ValueError")
 
+    # Tests that a misspelt attribute raises an error rather than adding a new attribute
+    def test_misspelt_attribute(self):
+        country = CountryData("ARG")
+        country.homekill_fraction = 0
+        with pytest.raises(AttributeError):
+            country.homekill_fractoin = 0
+
 
 """
 Main functionalities:
@@ -436,6 +444,33 @@ class TestAnimalSpecies:
                 transfer_births_or_head=0,
             )
 
+    # Tests that a misspelt attribute raises an error rather than adding a new attribute
+    def test_misspelt_attribute(self):
+        animal = AnimalSpecies("cow", "dairy")
+        animal.set_animal_attributes(100, 10, "milk", 1, "ruminant", 500, 0.5)
+        with pytest.raises(AttributeError):
+            animal.current_populaton = 50
+        with pytest.raises(AttributeError):
+            animal.update_attributes(baseline_slaugter=10)
+        assert not hasattr(animal, "__dict__")
+
+    # Tests that get_attributes returns only the attributes that have been set
+    def test_get_attributes(self):
+        animal = AnimalSpecies("cow", "dairy")
+        animal.set_animal_attributes(100, 10, "milk", 1, "ruminant", 500, 0.5)
+        attributes = animal.get_attributes()
+        assert attributes["current_population"] == 100
+        assert attributes["population"] == []
+        assert "gestation" not in attributes
+
+    # Tests that an animal can be copied by pickling, as the results of the model are cached
+    def test_pickle_animal(self):
+        animal = AnimalSpecies("cow", "dairy")
+        animal.set_animal_attributes(100, 10, "milk", 1, "ruminant", 500, 0.5)
+        copied_animal = pickle.loads(pickle.dumps(animal))
+        assert copied_animal.get_attributes().keys() == animal.get_attributes().keys()
+        assert copied_animal.current_population == 100
+
 
 # Generated by CodiumAI
 
@@ -0,0 +1,67 @@
+"""
+Tests for extracting the optimizer's solution as arrays
+"""
+
+import numpy as np
+import pytest
+from pulp import LpVariable
+
+from src.optimizer.extract_results import Extractor
+from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios.run_scenario import ScenarioRunner
+from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+
+def test_monthly_list_is_the_same_from_variables_or_values():
+    extractor = Extractor({"NMONTHS": 3})
+    variables = [LpVariable(f"x_{month}") for month in range(3)]
+    for variable, value in zip(variables, [1.0, 2.5, 0.0]):
+        variable.varValue = value
+
+    from_variables = extractor.to_monthly_list(variables, 2)
+    from_values = extractor.to_monthly_list(np.array([1.0, 2.5, 0.0]), 2)
+    assert list(from_variables) == list(from_values) == [2.0, 5.0, 0.0]
+
+
+def test_crops_eaten_beyond_production_come_from_storage():
+    extractor = Extractor({"NMONTHS": 3})
+    immediately_eaten, new_stored_eaten = extractor.to_monthly_list_outdoor_crops_kcals(
+        np.array([5.0, 3.0, 4.0]), [4.0, 3.0, 6.0], 0.5
+    )
+    assert list(immediately_eaten) == [2.0, 1.5, 2.0]
+    assert list(new_stored_eaten) == [0.5, 0.0, 0.0]
+
+
+def test_solution_from_solver_matches_variable_values(monkeypatch):
+    interpret_optimizer_results = ScenarioRunner.interpret_optimizer_results
+    n_checked = []
+
+    def compare_then_interpret(self, *args, solution=None, **kwargs):
+        variables = args[2]
+        for key, values in solution.items():
+            assert values == pytest.approx(
+                [variable.varValue for variable in variables[key]]
+            ), key
+        n_checked.append(len(solution))
+        return interpret_optimizer_results(self, *args, solution=solution, **kwargs)
+
+    monkeypatch.setattr(
+        ScenarioRunner, "interpret_optimizer_results", compare_then_interpret
+    )
+
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    scenario_option["SOLVER"] = "highs"
+    ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_extract_results",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG"],
+        return_results=True,
+    )
+    assert len(n_checked) == 3
+    assert min(n_checked) > 0
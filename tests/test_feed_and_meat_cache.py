@@ -0,0 +1,85 @@
+"""
+Tests for reusing the animal model results when it is run again with the same inputs
+"""
+
+import numpy as np
+
+from src.food_system import animal_populations
+from src.food_system.animal_populations import CalculateFeedAndMeat
+from src.food_system.food import Food
+
+
+def count_runs(monkeypatch):
+    runs = []
+    main = animal_populations.main
+
+    def counting_main(*args, **kwargs):
+        runs.append(args[0])
+        return main(*args, **kwargs)
+
+    monkeypatch.setattr(animal_populations, "main", counting_main)
+    return runs
+
+
+def calculate_feed_and_meat(feed_kcals, constants_inputs=None):
+    return CalculateFeedAndMeat(
+        country_code="ARG",
+        available_feed=Food(feed_kcals),
+        available_grass=Food(np.full(120, 1000.0)),
+        scenario="baseline",
+        kcals_per_head_meat_dict=None,
+        constants_inputs=constants_inputs,
+    )
+
+
+def test_repeated_runs_are_reused(monkeypatch):
+    CalculateFeedAndMeat.clear_cache()
+    runs = count_runs(monkeypatch)
+
+    first = calculate_feed_and_meat(np.zeros(120))
+    second = calculate_feed_and_meat(np.zeros(120))
+    assert len(runs) == 1
+    assert np.array_equal(first.feed_used.kcals, second.feed_used.kcals)
+    for first_animal, second_animal in zip(first.all_animals, second.all_animals):
+        assert np.array_equal(first_animal.slaughter, second_animal.slaughter)
+
+    # any change to the inputs runs the animals again
+    calculate_feed_and_meat(np.full(120, 10.0))
+    assert len(runs) == 2
+    calculate_feed_and_meat(np.zeros(120), {"pig_head_start": 1e6})
+    assert len(runs) == 3
+
+
+def test_changing_a_result_does_not_change_the_cached_result():
+    CalculateFeedAndMeat.clear_cache()
+    first = calculate_feed_and_meat(np.zeros(120))
+    expected_feed_used = first.feed_used.kcals.copy()
+    expected_slaughter = first.all_animals[0].slaughter.copy()
+
+    first.feed_used.kcals += 1
+    first.all_animals[0].slaughter += 1
+
+    second = calculate_feed_and_meat(np.zeros(120))
+    assert np.array_equal(second.feed_used.kcals, expected_feed_used)
+    assert np.array_equal(second.all_animals[0].slaughter, expected_slaughter)
+
+
+def test_countries_calculated_together_are_reused(monkeypatch):
+    CalculateFeedAndMeat.clear_cache()
+    runs = count_runs(monkeypatch)
+
+    feed_and_meat_by_country = CalculateFeedAndMeat.for_countries(
+        ["ARG", "NZL"],
+        [Food(np.zeros(120)), Food(np.zeros(120))],
+        [Food(np.full(120, 1000.0)), Food(np.full(120, 1000.0))],
+        "baseline",
+        [None, None],
+    )
+    assert len(feed_and_meat_by_country) == 2
+    assert len(runs) == 0  # run together, not one at a time with main
+
+    expected = calculate_feed_and_meat(np.zeros(120))
+    assert len(runs) == 0
+    assert np.array_equal(
+        feed_and_meat_by_country[0].feed_used.kcals, expected.feed_used.kcals
+    )
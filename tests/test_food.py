@@ -1166,6 +1166,25 @@ def test_get_month_monthly_food():
     assert food.fat_units == "kcals per month"
 
 
+def test_get_month_units_are_parsed_again():
+    """
+    Tests that the parsed units of a month of a food are those of a single month, so
+    that multiplying the month by an array gives units of a list of months
+    """
+    food = create_food_monthly(kcals=[1, 2, 3], fat=[1, 2, 3], protein=[1, 2, 3])
+    month = food.get_month(1)
+    assert [unit.name for unit in month.unit_descriptors] == [
+        month.kcals_units,
+        month.fat_units,
+        month.protein_units,
+    ]
+    assert month.units == ["kcals per month"] * 3
+
+    months = month * np.array([1.0, 2.0, 3.0])
+    assert months.units == ["kcals per month each month"] * 3
+    assert list(months.kcals) == [2, 4, 6]
+
+
 def test_get_min_all_months_scalar_food():
     """
     Tests if the get_min_all_months function works
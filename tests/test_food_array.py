@@ -0,0 +1,186 @@
+"""
+Tests for the food stored in one (nutrients, months) array
+"""
+
+import numpy as np
+import pytest
+
+from src.food_system.food import Food
+from src.food_system.food_array import FoodArray
+from src.food_system.unit_conversions import conversions_scope
+
+
+@pytest.fixture(autouse=True)
+def nutrition_requirements():
+    with conversions_scope() as conversions:
+        conversions.set_nutrition_requirements(
+            kcals_daily=2100,
+            fat_daily=47,
+            protein_daily=51,
+            include_fat=True,
+            include_protein=True,
+            population=1e6,
+        )
+        yield conversions
+
+
+def create_food_monthly(kcals=[3, 2, 5, 1], fat=[4, 1, 2, 2], protein=[5, 3, 1, 2]):
+    return Food(
+        kcals=np.array(kcals, dtype=float),
+        fat=np.array(fat, dtype=float),
+        protein=np.array(protein, dtype=float),
+        kcals_units="kcals each month",
+        fat_units="kcals each month",
+        protein_units="kcals each month",
+    )
+
+
+def test_converting_to_and_from_food():
+    food = create_food_monthly()
+    food_array = FoodArray.from_food(food)
+
+    assert food_array.values.shape == (3, 4)
+    assert food_array.NMONTHS == 4
+    assert food_array.units == food.units
+    assert food_array == food
+    assert food_array.to_food() == food
+
+    # the Food made from a FoodArray shares its values
+    food_of_array = food_array.to_food()
+    food_of_array.kcals[0] = 10
+    assert food_array.kcals[0] == 10
+
+    # units of a single month are made units of a list of months
+    assert (
+        FoodArray(np.ones((3, 2)), "kcals", "kcals", "kcals").units
+        == ["kcals each month"] * 3
+    )
+
+    with pytest.raises(AssertionError):
+        FoodArray(np.ones((2, 4)))
+    with pytest.raises(AssertionError):
+        FoodArray.from_food(Food(1, 2, 3))
+
+
+def test_nutrients_and_months_are_views():
+    food_array = FoodArray.from_food(create_food_monthly())
+
+    assert np.shares_memory(food_array.kcals, food_array.values)
+    assert np.shares_memory(food_array.protein, food_array.values)
+
+    months = food_array[1:3]
+    assert isinstance(months, FoodArray)
+    assert np.shares_memory(months.values, food_array.values)
+    assert list(months.fat) == [1, 2]
+
+    months.fat[0] = 7
+    assert food_array.fat[1] == 7
+
+    food_array.kcals = np.zeros(4)
+    assert food_array.values[0].sum() == 0
+
+    food_array[0:2] = FoodArray(np.full((3, 2), 9.0), *food_array.units)
+    assert list(food_array.protein) == [9, 9, 1, 2]
+
+
+def test_single_month_is_a_food_of_that_month():
+    food = create_food_monthly()
+    food_array = FoodArray.from_food(food)
+
+    month = food_array[2]
+    assert isinstance(month, Food)
+    assert month == food.get_month(2)
+    assert month.kcals_units == "kcals per month"
+    assert [unit.name for unit in month.unit_descriptors] == [
+        month.kcals_units,
+        month.fat_units,
+        month.protein_units,
+    ]
+
+
+def test_reductions_match_food():
+    rng = np.random.default_rng(0)
+    food = create_food_monthly(*rng.uniform(0, 100, (3, 12)))
+    food_array = FoodArray.from_food(food)
+
+    assert np.array_equal(
+        food_array.get_min_nutrient_each_month(),
+        np.minimum(np.minimum(food.kcals, food.fat), food.protein),
+    )
+    assert np.array_equal(
+        food_array.get_max_nutrient_each_month(),
+        np.maximum(np.maximum(food.kcals, food.fat), food.protein),
+    )
+    assert np.allclose(
+        food_array.get_sum_of_nutrients_each_month(),
+        food.kcals + food.fat + food.protein,
+    )
+    assert food_array.get_min_nutrient() == food.get_min_nutrient()
+
+    food_sum = food.get_nutrients_sum()
+    food_array_sum = food_array.get_nutrients_sum()
+    assert food_array_sum.units == food_sum.units
+    assert np.allclose(
+        food_array_sum.as_numpy_array(), food_sum.as_numpy_array(), rtol=1e-12
+    )
+
+
+def test_reductions_leave_out_excluded_nutrients(nutrition_requirements):
+    nutrition_requirements.set_nutrition_requirements(
+        kcals_daily=2100,
+        fat_daily=47,
+        protein_daily=51,
+        include_fat=False,
+        include_protein=True,
+        population=1e6,
+    )
+    food_array = FoodArray.from_food(create_food_monthly(kcals=[3, 2, 5, 4]))
+
+    # with fat included, the min nutrient would be the fat of the second month
+    assert list(food_array.get_min_nutrient_each_month()) == [3, 2, 1, 2]
+    assert food_array.get_min_nutrient() == ("protein", 1)
+
+    food_array.fat = np.full(4, 10)
+    assert list(food_array.get_max_nutrient_each_month()) == [5, 3, 5, 4]
+
+    # nutrients in different units can't be compared
+    with pytest.raises(AssertionError):
+        FoodArray(
+            np.ones((3, 2)), "kcals", "thousand tons", "thousand tons"
+        ).get_min_nutrient_each_month()
+
+
+def test_arithmetic_and_unit_conversion_match_food():
+    food = create_food_monthly()
+    other = create_food_monthly([1, 1, 1, 1], [2, 2, 2, 2], [0, 9, 0, 9])
+    food_array = FoodArray.from_food(food)
+
+    assert food_array + other == food + other
+    assert food_array - FoodArray.from_food(other) == food - other
+    assert FoodArray.min_elementwise(food_array, other) == Food.min_elementwise(
+        food, other
+    )
+
+    with pytest.raises(AssertionError):
+        food_array + Food(
+            np.ones(4), np.ones(4), np.ones(4), "billion kcals", "kcals", "kcals"
+        )
+
+    food = Food(
+        kcals=np.array([1.0, 2.0]),
+        fat=np.array([3.0, 4.0]),
+        protein=np.array([5.0, 6.0]),
+    )
+    converted = FoodArray.from_food(food).in_units(
+        "kcals per person per day",
+        "effective kcals per person per day",
+        "effective kcals per person per day",
+    )
+    expected = food.in_units(
+        "kcals per person per day",
+        "effective kcals per person per day",
+        "effective kcals per person per day",
+    )
+    assert isinstance(converted, FoodArray)
+    assert converted.units == expected.units
+    assert np.allclose(converted.values, expected.as_numpy_array())
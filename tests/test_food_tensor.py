@@ -0,0 +1,160 @@
+"""
+Tests for the food of many countries stored in one (countries, food sources, nutrients,
+months) array
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.food_system.food import Food
+from src.food_system.food_array import FoodArray
+from src.food_system.unit_conversions import conversions_scope
+from src.optimizer.food_tensor import FoodTensor
+from src.optimizer.interpret_results import Interpreter
+
+NMONTHS = 6
+
+
+def make_country_results(rng, population, kcals_daily, percent_people_fed):
+    """
+    Makes the interpreted results of a country, with random percents of people fed by
+    each food source.
+    """
+    foods = {
+        name: Food(
+            kcals=rng.uniform(0, 50, NMONTHS),
+            fat=rng.uniform(0, 50, NMONTHS),
+            protein=rng.uniform(0, 50, NMONTHS),
+            kcals_units="percent people fed each month",
+            fat_units="percent people fed each month",
+            protein_units="percent people fed each month",
+        )
+        for name in FoodTensor.FOOD_SOURCES
+    }
+    constants = {name: True for name in FoodTensor.ADD_CONSTANTS}
+    constants["POP"] = population
+    constants["inputs"] = {
+        "NUTRITION": {"KCALS_DAILY": kcals_daily, "FAT_DAILY": 47, "PROTEIN_DAILY": 51}
+    }
+    return SimpleNamespace(
+        constants=constants,
+        include_fat=True,
+        include_protein=True,
+        time_months_middle=[month + 0.5 for month in range(NMONTHS)],
+        percent_people_fed=percent_people_fed,
+        **foods,
+    )
+
+
+@pytest.fixture
+def many_results():
+    rng = np.random.default_rng(0)
+    return {
+        "ARG": make_country_results(rng, 45e6, 2100, 250),
+        "NZL": make_country_results(rng, 5e6, 2300, 80),
+        "USA": make_country_results(rng, 330e6, 2500, 120),
+    }
+
+
+def add_up_countries(many_results, cap_at_100_percent):
+    """
+    Adds up the food of each food source of the countries one Food at a time.
+    """
+    world_food = {}
+    for interpreter in many_results.values():
+        nutrition = interpreter.constants["inputs"]["NUTRITION"]
+        with conversions_scope() as conversions:
+            conversions.set_nutrition_requirements(
+                kcals_daily=nutrition["KCALS_DAILY"],
+                fat_daily=nutrition["FAT_DAILY"],
+                protein_daily=nutrition["PROTEIN_DAILY"],
+                include_fat=True,
+                include_protein=True,
+                population=interpreter.constants["POP"],
+            )
+            for name in FoodTensor.FOOD_SOURCES:
+                food = getattr(
+                    interpreter, name
+                ).in_units_bil_kcals_thou_tons_thou_tons_per_month()
+                if cap_at_100_percent and interpreter.percent_people_fed > 100:
+                    food = food * (100 / interpreter.percent_people_fed)
+                if name in world_food:
+                    world_food[name] = world_food[name] + food
+                else:
+                    world_food[name] = food
+    return world_food
+
+
+@pytest.mark.parametrize("cap_at_100_percent", [False, True])
+def test_world_food_matches_adding_up_the_countries(many_results, cap_at_100_percent):
+    food_tensor = FoodTensor.from_interpreters(many_results)
+    if cap_at_100_percent:
+        food_tensor = food_tensor.get_capped_at_100_percent()
+    expected = add_up_countries(many_results, cap_at_100_percent)
+
+    assert food_tensor.values.shape == (3, len(FoodTensor.FOOD_SOURCES), 3, NMONTHS)
+    for name in FoodTensor.FOOD_SOURCES:
+        world_food = food_tensor.get_world_food(name)
+        assert world_food.units == expected[name].units
+        assert np.allclose(
+            world_food.values, expected[name].as_numpy_array(), rtol=1e-12
+        )
+
+    assert np.allclose(
+        food_tensor.get_world_total_food().values,
+        food_tensor.get_world_sum().sum(axis=0),
+    )
+    assert food_tensor.get_world_population() == 380e6
+
+
+def test_countries_stay_queryable(many_results):
+    food_tensor = FoodTensor.from_interpreters(many_results)
+
+    nzl_food = food_tensor.get_country_food("NZL")
+    assert isinstance(nzl_food["meat"], FoodArray)
+    assert np.shares_memory(nzl_food["meat"].values, food_tensor.values)
+    with conversions_scope() as conversions:
+        conversions.set_nutrition_requirements(
+            kcals_daily=2300,
+            fat_daily=47,
+            protein_daily=51,
+            include_fat=True,
+            include_protein=True,
+            population=5e6,
+        )
+        assert np.allclose(
+            nzl_food["meat"].in_units_percent_fed().values,
+            many_results["NZL"].meat.as_numpy_array(),
+        )
+
+    capped = food_tensor.get_capped_at_100_percent()
+    assert list(food_tensor.get_ratios_so_adds_to_100_percent()) == [0.4, 1, 1 / 1.2]
+    assert list(capped.percent_people_fed) == [100, 80, 100]
+    assert np.array_equal(
+        capped.get_country_food("NZL")["fish"].values, nzl_food["fish"].values
+    )
+    assert capped.get_population_weighted_percent_people_fed() == pytest.approx(
+        (45 * 100 + 5 * 80 + 330 * 100) / 380
+    )
+
+
+def test_sum_many_results_together(many_results):
+    with conversions_scope():
+        global_results = Interpreter.sum_many_results_together(
+            many_results, cap_at_100_percent=True
+        )
+        expected = add_up_countries(many_results, cap_at_100_percent=True)
+        expected_fed = sum(
+            food.in_units_percent_fed().as_numpy_array() for food in expected.values()
+        )
+        expected_meat = expected["meat"].in_units_kcals_equivalent()
+
+    assert np.allclose(global_results.kcals_fed, expected_fed[0])
+    assert np.allclose(global_results.protein_fed, expected_fed[2])
+    assert global_results.meat_kcals_equivalent.units == expected_meat.units
+    assert np.allclose(
+        global_results.meat_kcals_equivalent.kcals, expected_meat.kcals, rtol=1e-12
+    )
+    assert global_results.constants["ADD_SEAWEED"]
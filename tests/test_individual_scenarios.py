@@ -57,8 +57,11 @@ def test_run_all_scenarios():
                 file_path = os.path.join(root, file)
                 # Tell user which scenario is running
                 print_banner(f" RUNNING SCENARIO: {file} ")
-                # Run the scenario
-                run_scenarios_from_yaml.main(["False", "False", "False", file_path])
+                # Run the scenario, without the result cache so every country is
+                # solved again
+                run_scenarios_from_yaml.main(
+                    ["False", "False", "False", file_path, "--no-cache"]
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""
+Tests for solving a model in stages on one live model
+"""
+
+import pytest
+from pulp import LpMaximize, LpMinimize, LpProblem, LpVariable
+
+from src.optimizer.lexicographic_solver import LexicographicSolver
+from src.optimizer.linear_program import LinearProgram
+from src.optimizer.solver_backends import get_solver_backend
+
+
+@pytest.mark.parametrize(
+    "solver,reuse_basis", [("cbc", False), ("highs", False), ("highs", True)]
+)
+def test_stages_build_on_the_previous_solution(solver, reuse_basis):
+    model = LpProblem(name="test", sense=LpMaximize)
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    model += (x + y <= 4, "Limit")
+    model += (x <= 3, "Limit_X")
+    model += x
+    lexicographic_solver = LexicographicSolver(
+        model, get_solver_backend(solver), reuse_basis=reuse_basis
+    )
+
+    assert lexicographic_solver.solve(gap_rel=0.0001) == 1
+    assert x.varValue == pytest.approx(3)
+
+    # hold the first objective, then minimize a new variable
+    model += (x >= model.objective.value(), "Old_Objective")
+    z = LpVariable("z", lowBound=0)
+    model += (z >= 3 - y, "Z_Minimum")
+    model.sense = LpMinimize
+    model.setObjective(z)
+
+    assert lexicographic_solver.solve(gap_rel=0.0001) == 1
+    assert x.varValue == pytest.approx(3)
+    assert y.varValue == pytest.approx(1)
+    assert z.varValue == pytest.approx(2)
+    assert model.objective.value() == pytest.approx(2)
+
+
+def test_removing_constraints_is_not_allowed():
+    model = LpProblem(name="test", sense=LpMaximize)
+    x = LpVariable("x", lowBound=0)
+    model += (x <= 3, "Limit")
+    model += x
+    lexicographic_solver = LexicographicSolver(model, get_solver_backend("highs"))
+    lexicographic_solver.solve(gap_rel=0.0001)
+
+    del model.constraints["Limit"]
+    with pytest.raises(AssertionError):
+        lexicographic_solver.solve(gap_rel=0.0001)
+
+
+def test_linear_program_is_solved_with_later_constraints():
+    constraints = LpProblem(name="constraints", sense=LpMaximize)
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    constraints += (x + y <= 4, "Limit")
+    constraints += (x <= 3, "Limit_X")
+    linear_program = LinearProgram.from_pulp(constraints)
+
+    # the constraints are only in the solver, the model just holds the objective
+    model = LpProblem(name="test", sense=LpMaximize)
+    model += x
+    lexicographic_solver = LexicographicSolver(model, get_solver_backend("highs"))
+    lexicographic_solver.add_linear_program(
+        linear_program, [{"x": x, "y": y}[name] for name in linear_program.col_names]
+    )
+
+    assert lexicographic_solver.solve(gap_rel=0.0001) == 1
+    assert x.varValue == pytest.approx(3)
+
+    model += (x >= model.objective.value(), "Old_Objective")
+    model.setObjective(y)
+    assert lexicographic_solver.solve(gap_rel=0.0001) == 1
+    assert x.varValue == pytest.approx(3)
+    assert y.varValue == pytest.approx(1)
@@ -0,0 +1,126 @@
+"""
+Tests that the sparse matrix model assembled by LPMatrixBuilder is the same linear
+program as the PuLP model built by the Optimizer
+"""
+
+import pytest
+
+from src.optimizer.linear_program import LinearProgram
+from src.optimizer.lp_matrix_builder import LPMatrixBuilder
+from src.optimizer.optimizer import Optimizer
+from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+
+def run_with_cross_check(monkeypatch, simulation, changes):
+    """
+    Runs ARG with every model built by the Optimizer checked against LPMatrixBuilder,
+    and returns the optimization types that were checked.
+    """
+    checked = []
+    run_optimizations_on_constraints = Optimizer.run_optimizations_on_constraints
+
+    def cross_check_then_run(self, model, variables, consts, optimization_type):
+        LPMatrixBuilder(self).cross_check(model, optimization_type)
+        checked.append(optimization_type)
+        return run_optimizations_on_constraints(
+            self, model, variables, consts, optimization_type
+        )
+
+    monkeypatch.setattr(
+        Optimizer, "run_optimizations_on_constraints", cross_check_then_run
+    )
+
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"][simulation]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    scenario_option.update(changes)
+    ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_lp_matrix_builder",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG"],
+        return_results=True,
+    )
+    return checked
+
+
+@pytest.mark.parametrize(
+    "simulation,changes",
+    [
+        ("argentina_net_baseline", {}),
+        ("argentina_net_nuclear_resilient", {}),
+        ("argentina_net_nuclear_resilient_more_area", {}),
+        (
+            "argentina_net_nuclear_winter",
+            {"ratio_stocks_untouched": "no_stored_between_years"},
+        ),
+    ],
+)
+def test_matrix_model_matches_pulp_model(monkeypatch, simulation, changes):
+    checked = run_with_cross_check(monkeypatch, simulation, changes)
+    assert "to_humans" in checked
+    assert "to_animals" in checked
+
+
+def test_template_builds_match_fresh_builds(monkeypatch):
+    run_optimizations_on_constraints = Optimizer.run_optimizations_on_constraints
+    structure_keys = []
+
+    def compare_then_run(self, model, variables, consts, optimization_type):
+        fresh = LPMatrixBuilder(self).build(optimization_type, use_template=False)
+        # compiles the template the first time this structure is seen
+        LPMatrixBuilder(self).build(optimization_type)
+        builder = LPMatrixBuilder(self)
+        templated = builder.build(optimization_type)
+        assert builder.template is not None
+        assert templated.get_differences(fresh) == []
+        assert (templated.matrix != fresh.matrix).nnz == 0
+        structure_keys.append(builder.get_structure_key())
+        return run_optimizations_on_constraints(
+            self, model, variables, consts, optimization_type
+        )
+
+    monkeypatch.setattr(Optimizer, "run_optimizations_on_constraints", compare_then_run)
+    monkeypatch.setattr(LPMatrixBuilder, "templates", {})
+
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_lp_matrix_builder",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG", "USA"],
+        return_results=True,
+    )
+    # the countries share their structures
+    assert len(structure_keys) > len(LPMatrixBuilder.templates)
+    assert set(structure_keys) == set(LPMatrixBuilder.templates.keys())
+
+
+def test_differences_are_found():
+    lp = LinearProgram.from_pulp(pulp_model())
+    assert lp.get_differences(LinearProgram.from_pulp(pulp_model())) == []
+
+    changed = LinearProgram.from_pulp(pulp_model())
+    changed.row_upper[0] = 5
+    assert lp.get_differences(changed) == ["row Limit differs"]
+
+
+def pulp_model():
+    from pulp import LpMaximize, LpProblem, LpVariable
+
+    model = LpProblem(name="test", sense=LpMaximize)
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    model += (x + 2 * y <= 4, "Limit")
+    model += (4 <= 2 * x + y, "Minimum")
+    model += x + y
+    return model
@@ -0,0 +1,96 @@
+"""
+Tests for the food humans consume first in round 2, up to the minimum needs
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.food_system.food import Food
+from src.optimizer.parameters import Parameters
+
+FOODS_IN_ORDER_OF_PREFERENCE = [
+    "fish_kcals_equivalent",
+    "meat_kcals_equivalent",
+    "milk_kcals_equivalent",
+    "greenhouse_kcals_equivalent",
+    "immediate_outdoor_crops_kcals_equivalent",
+    "new_stored_outdoor_crops_kcals_equivalent",
+    "stored_food_kcals_equivalent",
+    "scp_kcals_equivalent",
+    "cell_sugar_kcals_equivalent",
+    "seaweed_kcals_equivalent",
+]
+
+
+def make_round1_results(kcals_by_food, percent_people_fed):
+    results = {
+        name: Food(
+            kcals=np.array(kcals, dtype=float),
+            fat=np.zeros(len(kcals)),
+            protein=np.zeros(len(kcals)),
+            kcals_units="kcals per person per day",
+            fat_units="effective kcals per person per day",
+            protein_units="effective kcals per person per day",
+        )
+        for name, kcals in kcals_by_food.items()
+    }
+    # the validation of the consumption only applies when only kcals are optimized
+    return SimpleNamespace(
+        percent_people_fed=percent_people_fed,
+        include_fat=True,
+        include_protein=True,
+        **results,
+    )
+
+
+def test_foods_are_consumed_in_order_of_preference_up_to_the_maximum():
+    rng = np.random.default_rng(0)
+    nmonths = 12
+    kcals_by_food = {
+        name: rng.uniform(0, 800, nmonths) for name in FOODS_IN_ORDER_OF_PREFERENCE
+    }
+    round1_results = make_round1_results(kcals_by_food, percent_people_fed=50)
+    constants_inputs = {
+        "MINIMUM_PERCENT_FED_BEFORE_NONHUMAN_CONSUMPTION_ALLOWED": 100,
+        "NUTRITION": {"KCALS_DAILY": 2100},
+        "NMONTHS": nmonths,
+    }
+
+    consumption = Parameters().calculate_human_consumption_for_min_needs(
+        constants_inputs, round1_results, extra_meat_round2=None
+    )
+
+    assert list(consumption) == [
+        "fish",
+        "meat",
+        "dairy",
+        "greenhouse",
+        "outdoor_crops",
+        "stored_food",
+        "methane_scp",
+        "cellulosic_sugar",
+        "seaweed",
+    ]
+    outdoor_crops = (
+        kcals_by_food["immediate_outdoor_crops_kcals_equivalent"]
+        + kcals_by_food["new_stored_outdoor_crops_kcals_equivalent"]
+    )
+    available = [
+        kcals_by_food["fish_kcals_equivalent"],
+        kcals_by_food["meat_kcals_equivalent"],
+        kcals_by_food["milk_kcals_equivalent"],
+        kcals_by_food["greenhouse_kcals_equivalent"],
+        outdoor_crops,
+        kcals_by_food["stored_food_kcals_equivalent"],
+        kcals_by_food["scp_kcals_equivalent"],
+        kcals_by_food["cell_sugar_kcals_equivalent"],
+        kcals_by_food["seaweed_kcals_equivalent"],
+    ]
+    for month in range(nmonths):
+        remaining_kcals = 2100 * 0.5
+        for food_name, food_kcals in zip(consumption, available):
+            expected = min(food_kcals[month], remaining_kcals)
+            remaining_kcals -= expected
+            assert consumption[food_name].kcals[month] == expected
+        assert remaining_kcals >= 0
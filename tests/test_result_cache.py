@@ -0,0 +1,92 @@
+"""
+Tests for the on-disk cache of country results
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src.scenarios.result_cache import ResultCache
+from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+
+def test_key_changes_with_the_inputs(tmp_path):
+    result_cache = ResultCache(tmp_path)
+    country_data = pd.Series({"iso3": "ARG", "population": 45e6})
+    scenario_option = {"scenario": "no_resilient_foods", "NMONTHS": 120}
+
+    key = result_cache.get_key(country_data, scenario_option)
+    assert key == result_cache.get_key(country_data.copy(), dict(scenario_option))
+    assert key != result_cache.get_key(country_data, {**scenario_option, "NMONTHS": 60})
+    assert key != result_cache.get_key(
+        pd.Series({"iso3": "ARG", "population": 46e6}), scenario_option
+    )
+
+
+def test_saved_results_are_loaded(tmp_path):
+    result_cache = ResultCache(tmp_path)
+    assert result_cache.load("missing") is None
+    result_cache.save("key", (0.5, "description", {"fed": [1, 2]}, []))
+    assert result_cache.load("key") == (0.5, "description", {"fed": [1, 2]}, [])
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    result = "x" * 1000
+    result_cache = ResultCache(tmp_path, max_size_bytes=2500)
+    result_cache.save("first", result)
+    result_cache.save("second", result)
+    os.utime(result_cache.get_path("first"), (0, 0))
+    os.utime(result_cache.get_path("second"), (1, 1))
+
+    # loading marks the first result as the most recently used
+    result_cache.load("first")
+    result_cache.save("third", result)
+
+    assert result_cache.load("first") == result
+    assert result_cache.load("second") is None
+    assert result_cache.load("third") == result
+
+
+def test_cached_countries_are_not_run_again(tmp_path, monkeypatch):
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    result_cache = ResultCache(tmp_path)
+
+    def run(title):
+        return ScenarioRunnerNoTrade().run_model_no_trade(
+            title=title,
+            create_pptx_with_all_countries=False,
+            show_country_figures=False,
+            show_map_figures=False,
+            add_map_slide_to_pptx=False,
+            scenario_option=scenario_option,
+            countries_list=["ARG"],
+            return_results=True,
+            result_cache=result_cache,
+        )
+
+    world, net_pop, net_pop_fed, results = run("test_result_cache")
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    def fail(*args, **kwargs):
+        pytest.fail("a cached country was run again")
+
+    monkeypatch.setattr(ScenarioRunnerNoTrade, "run_optimizer_for_country", fail)
+    (
+        world_cached,
+        net_pop_cached,
+        net_pop_fed_cached,
+        results_cached,
+    ) = run("test_result_cache_cached")
+
+    assert net_pop_cached == net_pop
+    assert net_pop_fed_cached == net_pop_fed
+    assert list(results_cached.keys()) == list(results.keys())
+    for country, interpreted_results in results.items():
+        assert (
+            results_cached[country].percent_people_fed
+            == interpreted_results.percent_people_fed
+        )
@@ -0,0 +1,201 @@
+"""
+Tests for running the no trade model over several countries
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.food_system import animal_populations
+from src.food_system.animal_populations import CalculateFeedAndMeat
+from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios import run_scenarios_from_yaml
+from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+
+def run_countries(n_workers):
+    config_data = load_config_data("baseline_USA.yaml")
+    scenario_option = config_data["simulations"]["baseline_model_by_country"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    return ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_workers",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG", "AUS", "USA"],
+        return_results=True,
+        n_workers=n_workers,
+    )
+
+
+def test_worker_pool_matches_serial_run():
+    world_serial, net_pop_serial, net_pop_fed_serial, results_serial = run_countries(
+        n_workers=1
+    )
+    world_pool, net_pop_pool, net_pop_fed_pool, results_pool = run_countries(
+        n_workers=2
+    )
+
+    assert net_pop_serial == net_pop_pool
+    assert net_pop_fed_serial == net_pop_fed_pool
+    assert list(results_serial.keys()) == list(results_pool.keys())
+    for country, interpreted_results in results_serial.items():
+        assert (
+            interpreted_results.percent_people_fed
+            == results_pool[country].percent_people_fed
+        )
+    assert world_serial["needs_ratio"].equals(world_pool["needs_ratio"])
+
+
+def test_first_round_animals_of_countries_are_run_together(monkeypatch):
+    runs_together = []
+    runs_with_zero_feed = []
+    main_for_countries = animal_populations.main_for_countries
+    main = animal_populations.main
+
+    def counting_main_for_countries(country_codes, *args, **kwargs):
+        runs_together.append(list(country_codes))
+        return main_for_countries(country_codes, *args, **kwargs)
+
+    def counting_main(country_code, available_feed, *args, **kwargs):
+        if np.all(available_feed.kcals == 0):
+            runs_with_zero_feed.append(country_code)
+        return main(country_code, available_feed, *args, **kwargs)
+
+    monkeypatch.setattr(
+        animal_populations, "main_for_countries", counting_main_for_countries
+    )
+    monkeypatch.setattr(animal_populations, "main", counting_main)
+    CalculateFeedAndMeat.clear_cache()
+
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_first_round_together",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG", "AUS", "JPN"],
+    )
+
+    # the first round of each country is then found in the cache
+    assert runs_together == [["ARG", "AUS", "JPN"]]
+    assert runs_with_zero_feed == []
+
+
+def test_every_solve_is_recorded(tmp_path):
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+    scenario_runner = ScenarioRunnerNoTrade()
+    scenario_runner.run_model_no_trade(
+        title="test_solve_records",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG"],
+    )
+
+    solve_records = scenario_runner.solve_records
+    assert [(record["round"], record["stage"]) for record in solve_records] == [
+        (1, "max-min"),
+        (1, "best-foods"),
+        (1, "smoothing"),
+        (2, "max-feed"),
+        (2, "best-foods"),
+        (2, "smoothing"),
+        (3, "max-min"),
+        (3, "best-foods"),
+        (3, "smoothing"),
+    ]
+    for record in solve_records:
+        assert record["country"] == "ARG"
+        assert record["status"] == "Optimal"
+        assert record["n_variables"] > 0 and record["n_constraints"] > 0
+        assert record["build_time"] >= 0 and record["solve_time"] > 0
+
+    scenario_runner.save_solve_records(
+        solve_records, "test_solve_records", output_dir=tmp_path
+    )
+    saved = pd.read_csv(tmp_path / "test_solve_records_solve_records.csv")
+    assert list(saved["stage"]) == [record["stage"] for record in solve_records]
+
+
+def test_stopped_run_is_resumed(tmp_path, monkeypatch):
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+
+    def run(run_dir):
+        return ScenarioRunnerNoTrade().run_model_no_trade(
+            title="test_resume",
+            create_pptx_with_all_countries=False,
+            show_country_figures=False,
+            show_map_figures=False,
+            add_map_slide_to_pptx=False,
+            scenario_option=scenario_option,
+            countries_list=["ARG", "AUS"],
+            return_results=True,
+            run_dir=run_dir,
+        )
+
+    world, net_pop, net_pop_fed, results = run(None)
+
+    run_optimizer_for_country = ScenarioRunnerNoTrade.run_optimizer_for_country
+    countries_run = []
+
+    def run_or_stop_at_australia(self, country_data, *args, **kwargs):
+        countries_run.append(country_data["iso3"])
+        if country_data["iso3"] == "AUS" and len(countries_run) == 2:
+            raise AssertionError("stopped")
+        return run_optimizer_for_country(self, country_data, *args, **kwargs)
+
+    monkeypatch.setattr(
+        ScenarioRunnerNoTrade, "run_optimizer_for_country", run_or_stop_at_australia
+    )
+    with pytest.raises(AssertionError, match="stopped"):
+        run(tmp_path)
+    assert (tmp_path / "ARG.pkl").exists()
+    assert not (tmp_path / "AUS.pkl").exists()
+
+    world_resumed, net_pop_resumed, net_pop_fed_resumed, results_resumed = run(
+        tmp_path
+    )
+    assert countries_run == ["ARG", "AUS", "AUS"]
+    assert net_pop_resumed == net_pop
+    assert net_pop_fed_resumed == net_pop_fed
+    assert list(results_resumed.keys()) == list(results.keys())
+    assert world_resumed["needs_ratio"].equals(world["needs_ratio"])
+
+    # a run can't be resumed with other options
+    with pytest.raises(AssertionError, match="different scenario options"):
+        scenario_option["NMONTHS"] = 60
+        run(tmp_path)
+
+
+def test_run_dir_is_only_made_with_checkpoint(tmp_path, monkeypatch):
+    run_dirs = []
+    monkeypatch.setattr(
+        run_scenarios_from_yaml,
+        "run_scenarios_from_yaml",
+        lambda *args: run_dirs.append(args[-1]),
+    )
+    monkeypatch.setattr(
+        run_scenarios_from_yaml, "get_new_run_dir", lambda yaml_filename: tmp_path
+    )
+
+    run_scenarios_from_yaml.main(["False", "False", "False", "argentina.yaml"])
+    run_scenarios_from_yaml.main(
+        ["False", "False", "False", "argentina.yaml", "--checkpoint"]
+    )
+    run_scenarios_from_yaml.main(
+        ["False", "False", "False", "argentina.yaml", "--resume", str(tmp_path)]
+    )
+    assert run_dirs == [None, tmp_path, tmp_path]
@@ -0,0 +1,89 @@
+"""
+Tests for the slaughter order and slaughter attributes tables shared by every country
+"""
+
+from src.food_system.animal_populations import (
+    AnimalDataReader,
+    AnimalModelBuilder,
+    create_country_animals,
+)
+
+KCALS_PER_HEAD_MEAT_DICT = {
+    "KCALS_PER_CHICKEN": 3.0e-6,
+    "KCALS_PER_PIG": 2.5e-4,
+    "KCALS_PER_SMALL_ANIMAL": 3.0e-6,
+    "KCALS_PER_MEDIUM_ANIMAL": 4.0e-5,
+    "KCALS_PER_LARGE_ANIMAL": 4.0e-4,
+}
+
+
+def test_tables_are_made_once_and_shared_by_countries():
+    AnimalModelBuilder.slaughter_priority_tables.clear()
+    AnimalModelBuilder.slaughter_attributes_tables.clear()
+
+    create_country_animals(
+        "ARG", "baseline", kcals_per_head_meat_dict=KCALS_PER_HEAD_MEAT_DICT
+    )
+    attributes_table = AnimalModelBuilder.get_slaughter_attributes_table(
+        AnimalDataReader.read_animal_nutrition_data("species_attributes.csv"),
+        AnimalDataReader.read_animal_options("species_options.csv"),
+        "baseline",
+    )
+    priority_table = AnimalModelBuilder.get_slaughter_priority_table(
+        KCALS_PER_HEAD_MEAT_DICT,
+        AnimalDataReader.read_animal_nutrition_data("species_attributes.csv"),
+    )
+
+    create_country_animals(
+        "NZL", "baseline", kcals_per_head_meat_dict=KCALS_PER_HEAD_MEAT_DICT
+    )
+    assert len(AnimalModelBuilder.slaughter_attributes_tables) == 1
+    assert len(AnimalModelBuilder.slaughter_priority_tables) == 1
+    assert (
+        AnimalModelBuilder.slaughter_attributes_tables["baseline"][2]
+        is attributes_table
+    )
+    assert (
+        AnimalModelBuilder.get_slaughter_priority_table(
+            KCALS_PER_HEAD_MEAT_DICT,
+            AnimalDataReader.read_animal_nutrition_data("species_attributes.csv"),
+        )
+        is priority_table
+    )
+
+    create_country_animals(
+        "NZL", "reduced", kcals_per_head_meat_dict=KCALS_PER_HEAD_MEAT_DICT
+    )
+    assert len(AnimalModelBuilder.slaughter_attributes_tables) == 2
+    assert len(AnimalModelBuilder.slaughter_priority_tables) == 1
+
+
+def test_animals_are_ranked_and_given_the_attributes_of_their_scenario():
+    all_animals, country_object = create_country_animals(
+        "IND", "reduced", kcals_per_head_meat_dict=KCALS_PER_HEAD_MEAT_DICT
+    )
+    df_animal_attributes = AnimalDataReader.read_animal_nutrition_data(
+        "species_attributes.csv"
+    )
+    df_animal_options = AnimalDataReader.read_animal_options("species_options.csv")
+    selected_scenario = df_animal_options.loc[
+        df_animal_options["scenario"] == "reduced"
+    ]
+
+    for animal in all_animals:
+        assert (
+            animal.gestation
+            == df_animal_attributes.loc[animal.animal_type]["gestation"]
+        )
+        assert (
+            animal.target_population_fraction
+            == selected_scenario.loc[animal.animal_type]["target_population_fraction"]
+        )
+
+    # the animals are fed and slaughtered in order of the kcals gained per hour of
+    # slaughter, whichever country they are in
+    priority_table = AnimalModelBuilder.get_slaughter_priority_table(
+        KCALS_PER_HEAD_MEAT_DICT, df_animal_attributes
+    )
+    net_kcals = [priority_table[animal.animal_type] for animal in all_animals]
+    assert net_kcals == sorted(net_kcals, reverse=True)
@@ -0,0 +1,64 @@
+import pytest
+from pulp import LpMaximize, LpProblem, LpVariable
+
+from src.optimizer.solver_backends import (
+    DEFAULT_SOLVER_BACKEND,
+    SOLVER_BACKENDS,
+    get_solver_backend,
+)
+
+
+def make_model():
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    model = LpProblem(name="test_backend", sense=LpMaximize)
+    model += (x + y <= 3, "Total_Constraint")
+    model += (x <= 2, "X_Constraint")
+    model += x + 2 * y
+    return model, x, y
+
+
+def test_default_backend_is_cbc():
+    assert DEFAULT_SOLVER_BACKEND == "cbc"
+    assert get_solver_backend().name == "cbc"
+
+
+@pytest.mark.parametrize("name", list(SOLVER_BACKENDS.keys()))
+def test_backends_solve_the_same_model(name):
+    model, x, y = make_model()
+    status = get_solver_backend(name).solve(model, gap_rel=0.0001)
+    assert status == 1
+    assert x.varValue == pytest.approx(0)
+    assert y.varValue == pytest.approx(3)
+    assert model.objective.value() == pytest.approx(6)
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(AssertionError):
+        get_solver_backend("not_a_solver")
+
+
+def test_highs_feeds_as_many_people_as_cbc():
+    # highs is given the model as sparse matrices, cbc is given the PuLP model
+    from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+    from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+    config_data = load_config_data("argentina.yaml")
+    people_fed = {}
+    for solver in ["cbc", "highs"]:
+        scenario_option = dict(
+            config_data["simulations"]["argentina_net_nuclear_resilient"]
+        )
+        scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+        scenario_option["SOLVER"] = solver
+        _, _, people_fed[solver], _ = ScenarioRunnerNoTrade().run_model_no_trade(
+            title="test_solver_backends",
+            create_pptx_with_all_countries=False,
+            show_country_figures=False,
+            show_map_figures=False,
+            add_map_slide_to_pptx=False,
+            scenario_option=scenario_option,
+            countries_list=["ARG"],
+            return_results=True,
+        )
+    assert people_fed["highs"] == pytest.approx(people_fed["cbc"], rel=1e-4)
@@ -0,0 +1,73 @@
+"""
+Tests for the static inputs shared by the rounds of optimization
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from src.food_system.food import Food
+from src.optimizer.parameters import Parameters
+from src.scenarios.run_model_no_trade import ScenarioRunnerNoTrade
+from src.scenarios.run_scenarios_from_yaml import load_config_data
+
+
+def make_parameters_with_static_inputs():
+    parameters = Parameters()
+    parameters.static_inputs = {
+        "constants_out": {"SEAWEED_KCALS": 1.5},
+        "time_consts": {"fish": Food(np.arange(3.0))},
+        "inputs": {"NMONTHS": 3},
+    }
+    return parameters
+
+
+def test_later_rounds_share_the_static_inputs():
+    parameters = make_parameters_with_static_inputs()
+    static_fish = parameters.static_inputs["time_consts"]["fish"]
+    constants_out_round1 = {
+        "SEAWEED_KCALS": 1.5,
+        "inputs": parameters.static_inputs["inputs"],
+    }
+    time_consts_round1 = {"fish": static_fish, "feed": Food(np.zeros(3))}
+
+    constants_out, time_consts = parameters.copy_constants_of_first_round(
+        constants_out_round1, time_consts_round1
+    )
+
+    assert time_consts["fish"] is static_fish
+    assert constants_out["inputs"] is parameters.static_inputs["inputs"]
+    # the values the rounds change are copied
+    assert time_consts["feed"] is not time_consts_round1["feed"]
+    assert time_consts["feed"] == time_consts_round1["feed"]
+
+
+def test_changing_the_static_inputs_is_caught(monkeypatch):
+    monkeypatch.setattr(Parameters, "ASSERT_STATIC_INPUTS_UNCHANGED", True)
+    parameters = make_parameters_with_static_inputs()
+    parameters.static_inputs_snapshot = pickle.dumps(parameters.static_inputs)
+    parameters.assert_static_inputs_unchanged()
+
+    parameters.static_inputs["time_consts"]["fish"].kcals[0] = 10
+    with pytest.raises(AssertionError):
+        parameters.assert_static_inputs_unchanged()
+
+
+def test_rounds_do_not_change_the_static_inputs(monkeypatch):
+    monkeypatch.setattr(Parameters, "ASSERT_STATIC_INPUTS_UNCHANGED", True)
+    config_data = load_config_data("argentina.yaml")
+    scenario_option = config_data["simulations"]["argentina_net_nuclear_resilient"]
+    scenario_option["NMONTHS"] = config_data["settings"]["NMONTHS"]
+
+    world, net_pop, net_pop_fed, results = ScenarioRunnerNoTrade().run_model_no_trade(
+        title="test_static_inputs",
+        create_pptx_with_all_countries=False,
+        show_country_figures=False,
+        show_map_figures=False,
+        add_map_slide_to_pptx=False,
+        scenario_option=scenario_option,
+        countries_list=["ARG"],
+        return_results=True,
+    )
+    assert net_pop_fed > 0
@@ -2,6 +2,11 @@
 Tests if the unit conversion is working as expected.
 """
 
+import copy
+import pickle
+import threading
+
+import pytest
 from pytest import raises
 
 from src.food_system import unit_conversions as uc
@@ -305,3 +310,119 @@ def test_in_units_billions_fed():
     # so 1 kcal per month is 1/(2100*30) people fed per month
 
     assert abs(food_converted.kcals - 1 * 1e9 / 30 / 2100 / 1e9) < 1e-9
+
+
+def test_units_are_parsed_once():
+    """
+    Tests that there is one Unit for each name, which knows the forms of the unit
+    """
+    unit = uc.Unit.get("percent people fed each month")
+    assert uc.Unit.get("percent people fed each month") is unit
+    assert copy.deepcopy(unit) is unit
+    assert pickle.loads(pickle.dumps(unit)) is unit
+
+    assert unit.is_each_month and unit.is_percent
+    assert not unit.is_per_month and not unit.is_ratio
+    assert unit.total_name == "percent people fed"
+    assert unit.element_name == "percent people fed per month"
+    assert uc.Unit.get("ratio").each_month_name == "ratio each month"
+    assert uc.Unit.get("ratio").per_month_name == "ratio per month"
+
+
+def test_food_units_are_interned():
+    """
+    Tests that foods with the same units share the names of the units
+    """
+    food1 = create_food_monthly(kcals_units="ratio", fat_units="ratio")
+    food2 = create_food_monthly(kcals_units="".join(["ra", "tio"]), fat_units="ratio")
+
+    assert food1.kcals_units == "ratio each month"
+    assert food1.kcals_units is food2.kcals_units
+    assert food1.unit_descriptors is food2.unit_descriptors
+    assert food1.is_a_ratio() is False
+    assert food1.unit_descriptors[0].is_ratio
+
+
+def set_population(conversions, population):
+    conversions.set_nutrition_requirements(
+        kcals_daily=2100,
+        fat_daily=47,
+        protein_daily=51,
+        include_fat=True,
+        include_protein=True,
+        population=population,
+    )
+
+
+def test_conversion_factors_are_cached_until_the_requirements_change():
+    """
+    Tests that the conversion factors are only calculated again when the nutrition
+    requirements or population change
+    """
+
+    food = Food(kcals=1.0, fat=1.0, protein=1.0)
+    set_population(Food.conversions, 1e9)
+    counts = Food.conversions.get_conversion_cache_counts()
+
+    percent_fed = food.in_units_percent_fed()
+    assert food.in_units_percent_fed().kcals == percent_fed.kcals
+    new_counts = Food.conversions.get_conversion_cache_counts()
+    assert new_counts["hits"] == counts["hits"] + 1
+    assert new_counts["misses"] == counts["misses"] + 1
+
+    # setting the same requirements keeps the cache
+    set_population(Food.conversions, 1e9)
+    assert Food.conversions.get_conversion_cache_counts()["size"] == new_counts["size"]
+
+    set_population(Food.conversions, 2e9)
+    assert Food.conversions.get_conversion_cache_counts()["size"] == 0
+    assert food.in_units_percent_fed().kcals == percent_fed.kcals / 2
+
+
+def test_conversions_scope_does_not_change_the_shared_conversions():
+    """
+    Tests that the conversions set in a scope are only used within it
+    """
+    food = Food(kcals=1.0, fat=1.0, protein=1.0)
+    set_population(Food.conversions, 1e9)
+    shared_percent_fed = food.in_units_percent_fed().kcals
+
+    with uc.conversions_scope() as conversions:
+        assert Food.conversions is conversions
+        set_population(Food.conversions, 2e9)
+        assert food.in_units_percent_fed().kcals == shared_percent_fed / 2
+
+        with uc.conversions_scope() as inner_conversions:
+            set_population(inner_conversions, 4e9)
+            assert food.in_units_percent_fed().kcals == shared_percent_fed / 4
+
+        assert food.in_units_percent_fed().kcals == shared_percent_fed / 2
+
+    assert Food.conversions.population == 1e9
+    assert food.in_units_percent_fed().kcals == shared_percent_fed
+
+
+def test_threads_convert_with_their_own_conversions():
+    """
+    Tests that many populations can be used for conversions at the same time
+    """
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def convert(population):
+        with uc.conversions_scope():
+            set_population(Food.conversions, population)
+            # every thread has set its population before any of them converts
+            barrier.wait()
+            food = Food(kcals=1.0, fat=1.0, protein=1.0)
+            results[population] = food.in_units_percent_fed().kcals
+
+    populations = [1e9, 2e9, 3e9, 4e9]
+    threads = [threading.Thread(target=convert, args=(p,)) for p in populations]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for population in populations:
+        assert results[population] == pytest.approx(results[1e9] * 1e9 / population)
@@ -0,0 +1,63 @@
+"""
+Tests for checking the optimizer's constraints against a solution
+"""
+
+import pytest
+from pulp import LpMaximize, LpProblem, LpVariable
+
+from src.optimizer.linear_program import LinearProgram
+from src.optimizer.validate_results import Validator
+
+
+def make_model():
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    model = LpProblem(name="test_validator", sense=LpMaximize)
+    model += (x + y <= 4, "Limit")
+    model += (x - y == 1, "Difference")
+    model += (x <= 10, "Objective_Constraint")
+    model += x
+    return model, x, y
+
+
+def test_row_violations():
+    model, x, y = make_model()
+    violations = LinearProgram.from_pulp(model).get_row_violations([5.0, 1.0])
+    assert list(violations) == [2.0, 3.0, 0.0]
+
+
+def test_satisfied_constraints_pass():
+    model, x, y = make_model()
+    x.varValue = 2.5
+    y.varValue = 1.5
+    Validator().check_constraints_satisfied(model, [], model.variables())
+
+
+def test_violated_constraints_are_reported_by_name():
+    model, x, y = make_model()
+    x.varValue = 12
+    y.varValue = 1
+
+    # the objective constraint is skipped, and the worst violation comes first
+    with pytest.raises(AssertionError, match="Difference is off by 10.0; Limit"):
+        Validator().check_constraints_satisfied(
+            model, ["Objective_Constraint"], model.variables()
+        )
+
+    # small violations are allowed
+    x.varValue = 2.8
+    y.varValue = 1.5
+    Validator().check_constraints_satisfied(model, [], model.variables())
+
+
+def test_constraints_passed_to_the_solver_as_matrices_are_checked():
+    model, x, y = make_model()
+    linear_program = LinearProgram.from_pulp(model)
+    model.constraints.clear()
+    x.varValue = 12
+    y.varValue = 1
+    Validator().check_constraints_satisfied(model, [], [x, y])
+    with pytest.raises(AssertionError):
+        Validator().check_constraints_satisfied(
+            model, [], [x, y], linear_program=linear_program
+        )